@@ -1,14 +1,34 @@
 import sys
 import traceback
 
-from gvcf_to_vds_pipeline.cli.command_setup import setup_parser, command_handlers, setup_spark_config
+from gvcf_to_vds_pipeline.cli.command_setup import setup_parser, command_handlers
+from gvcf_to_vds_pipeline.cli.server import submit_to_server
+from gvcf_to_vds_pipeline.utils.logging import setup_logging
+
+
+def strip_server_option(argv):
+    """
+    Removes --server <socket> from argv so the remaining arguments can be replayed by the server.
+    """
+    stripped = []
+    skip_next = False
+    for arg in argv:
+        if skip_next:
+            skip_next = False
+        elif arg == "--server":
+            skip_next = True
+        elif not arg.startswith("--server="):
+            stripped.append(arg)
+    return stripped
+
 
 def main():
     """
-    Entry point for the application. Parses CLI arguments, sets up Spark/Hail,
-    dispatches to the correct handler, and handles global exceptions.
+    Entry point for the application. Parses CLI arguments, dispatches to the correct
+    handler (which sets up Spark/Hail when it needs them), and handles global exceptions.
     """
     try:
+        setup_logging()
         parser = setup_parser()
         args = parser.parse_args()
 
@@ -16,9 +36,15 @@ def main():
             parser.print_usage()
             sys.exit(1)
 
-        # SparkConf from JSON
-        conf = setup_spark_config(args)
-        handlers = command_handlers(args, conf)
+        if args.server and not args.dry_run:
+            job = submit_to_server(args.server, strip_server_option(sys.argv[1:]))
+            if job["status"] != "done":
+                print(f"[ERROR] Job {job['job_id']} {job['status']}: {job['error']} (log: {job['log']})")
+                sys.exit(1)
+            print(f"[DONE] Job {job['job_id']} finished (log: {job['log']})")
+            return
+
+        handlers = command_handlers(args)
         command = args.command.lower()
 
         if command in handlers:
@@ -0,0 +1,151 @@
+import struct
+import zlib
+
+# Largest uncompressed payload per block, as used by htslib's bgzip.
+BGZF_BLOCK_SIZE = 0xff00
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+TABIX_LINEAR_SHIFT = 14  # 16 kb linear index windows
+TABIX_VCF_FORMAT = 2
+
+
+def _bgzf_block(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    body = compressor.compress(data) + compressor.flush()
+    header = struct.pack(
+        "<4BIBBHBBHH",
+        0x1f, 0x8b, 0x08, 0x04,   # gzip magic, deflate, FEXTRA
+        0, 0, 0xff,               # mtime, xfl, os
+        6, ord("B"), ord("C"), 2,  # XLEN, BC subfield
+        len(body) + 25            # BSIZE - 1
+    )
+    return header + body + struct.pack("<II", zlib.crc32(data) & 0xffffffff, len(data))
+
+
+class BgzfWriter:
+    """
+    Minimal BGZF writer that tracks virtual file offsets, so a tabix index can be
+    built while writing.
+    """
+
+    def __init__(self, path):
+        self.f = open(path, "wb")
+        self.buf = bytearray()
+        self.block_offset = 0
+
+    def tell(self):
+        """
+        Virtual offset of the next byte written: (compressed block offset << 16) | offset in block.
+        """
+        return (self.block_offset << 16) | len(self.buf)
+
+    def write(self, data):
+        self.buf.extend(data)
+        while len(self.buf) >= BGZF_BLOCK_SIZE:
+            self._flush_block(bytes(self.buf[:BGZF_BLOCK_SIZE]))
+            del self.buf[:BGZF_BLOCK_SIZE]
+
+    def flush(self):
+        """
+        End the current block, so the next write starts a new one.
+        """
+        if self.buf:
+            self._flush_block(bytes(self.buf))
+            self.buf.clear()
+
+    def _flush_block(self, data):
+        block = _bgzf_block(data)
+        self.f.write(block)
+        self.block_offset += len(block)
+
+    def close(self):
+        self.flush()
+        self.f.write(BGZF_EOF)
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def reg2bin(beg, end):
+    """
+    UCSC/tabix bin of the 0-based half-open interval [beg, end).
+    """
+    end -= 1
+    if beg >> 14 == end >> 14:
+        return ((1 << 15) - 1) // 7 + (beg >> 14)
+    if beg >> 17 == end >> 17:
+        return ((1 << 12) - 1) // 7 + (beg >> 17)
+    if beg >> 20 == end >> 20:
+        return ((1 << 9) - 1) // 7 + (beg >> 20)
+    if beg >> 23 == end >> 23:
+        return ((1 << 6) - 1) // 7 + (beg >> 23)
+    if beg >> 26 == end >> 26:
+        return ((1 << 3) - 1) // 7 + (beg >> 26)
+    return 0
+
+
+class TabixIndexBuilder:
+    """
+    Collects (contig, start, end, virtual offsets) of each record written to a
+    coordinate-sorted BGZF VCF and writes the matching .tbi file.
+    """
+
+    def __init__(self):
+        self.contigs = []
+        self.bins = {}
+        self.linear = {}
+
+    def add(self, contig, beg, end, voffset_start, voffset_end):
+        """
+        :param beg, end: 0-based half-open reference span of the record
+        """
+        if contig not in self.bins:
+            self.contigs.append(contig)
+            self.bins[contig] = {}
+            self.linear[contig] = []
+
+        chunks = self.bins[contig].setdefault(reg2bin(beg, end), [])
+        if chunks and chunks[-1][1] == voffset_start:
+            chunks[-1][1] = voffset_end
+        else:
+            chunks.append([voffset_start, voffset_end])
+
+        linear = self.linear[contig]
+        last_window = (end - 1) >> TABIX_LINEAR_SHIFT
+        if len(linear) <= last_window:
+            linear.extend([None] * (last_window + 1 - len(linear)))
+        for window in range(beg >> TABIX_LINEAR_SHIFT, last_window + 1):
+            if linear[window] is None:
+                linear[window] = voffset_start
+
+    def write(self, path):
+        names = b"".join(c.encode() + b"\0" for c in self.contigs)
+        out = bytearray(b"TBI\1")
+        # n_ref, format, col_seq, col_beg, col_end, meta char, skip, l_nm
+        out += struct.pack("<8i", len(self.contigs), TABIX_VCF_FORMAT, 1, 2, 0, ord("#"), 0, len(names))
+        out += names
+        for contig in self.contigs:
+            bins = self.bins[contig]
+            out += struct.pack("<i", len(bins))
+            for bin_id in sorted(bins):
+                chunks = bins[bin_id]
+                out += struct.pack("<Ii", bin_id, len(chunks))
+                for beg, end in chunks:
+                    out += struct.pack("<QQ", beg, end)
+
+            # Empty linear windows take the offset of the previous filled one.
+            linear = self.linear[contig]
+            last = 0
+            for i, offset in enumerate(linear):
+                if offset is None:
+                    linear[i] = last
+                last = linear[i]
+            out += struct.pack("<i", len(linear))
+            out += struct.pack(f"<{len(linear)}Q", *linear)
+
+        with BgzfWriter(path) as w:
+            w.write(bytes(out))
@@ -0,0 +1,229 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from gvcf_to_vds_pipeline.benchmark.synthetic import generate_cohort
+from gvcf_to_vds_pipeline.utils.metrics import path_size
+from gvcf_to_vds_pipeline.utils.resources import detect_host_resources, format_bytes
+
+# Cohort sizes the suite can run at. Sites are shared across the cohort; each
+# sample carries about 30% of them.
+SCALES = {
+    "tiny": {"n_samples": 4, "n_sites": 2_000},
+    "small": {"n_samples": 16, "n_sites": 20_000},
+    "medium": {"n_samples": 64, "n_sites": 100_000},
+    "large": {"n_samples": 256, "n_sites": 250_000},
+}
+BENCHMARK_COMMANDS = ("readgvcfs", "split_multi", "sample_qc", "filter_intervals", "to_dense_mt")
+RSS_POLL_SECONDS = 0.2
+
+
+def _process_tree_rss(root_pid):
+    """
+    Resident memory (bytes) of a process and all of its descendants, e.g. the Spark JVM.
+    """
+    children = {}
+    rss = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after it are fixed.
+        fields = stat[stat.rindex(")") + 2:].split()
+        pid, ppid = int(entry), int(fields[1])
+        children.setdefault(ppid, []).append(pid)
+        rss[pid] = int(fields[21]) * page_size
+
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total
+
+
+def run_timed(argv, log_path):
+    """
+    Run argv, polling the memory of its process tree.
+    :return: dict with returncode, wall_seconds and peak_rss_bytes
+    """
+    with open(log_path, "w") as log:
+        start = time.time()
+        proc = subprocess.Popen(argv, stdout=log, stderr=subprocess.STDOUT)
+        peak = 0
+        while proc.poll() is None:
+            peak = max(peak, _process_tree_rss(proc.pid))
+            time.sleep(RSS_POLL_SECONDS)
+        wall = time.time() - start
+    return {"returncode": proc.returncode, "wall_seconds": round(wall, 3), "peak_rss_bytes": peak}
+
+
+def _command_argv(command, data_dir, vds, out_dir, tmp_dir, contig):
+    if command == "readgvcfs":
+        return ["readgvcfs", "-f", str(data_dir), "-d", str(vds), "--temp", str(tmp_dir),
+                "--header_cache", str(tmp_dir / "header_cache.json")], vds
+    if command == "split_multi":
+        out = out_dir / "split.vds"
+        return ["split_multi", "-v", str(vds), "-o", str(out)], out
+    if command == "sample_qc":
+        out = out_dir / "sample_qc.tsv"
+        return ["sample_qc", "-v", str(vds), "-o", str(out)], out
+    if command == "filter_intervals":
+        out = out_dir / "filtered.vds"
+        return ["filter_intervals", "-v", str(vds), "-i", f"{contig}:1-1000000", "-o", str(out)], out
+    out = out_dir / "dense.mt"
+    return ["to_dense_mt", "-v", str(vds), "-o", str(out)], out
+
+
+def default_label():
+    """
+    Short git commit of the source tree, so results can be compared between commits.
+    """
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unlabelled"
+
+
+def run_benchmarks(
+        scales,
+        commands,
+        work_dir,
+        results_path,
+        label=None,
+        reference_genome="GRCh38",
+        chr_prefix=None,
+        repeat=1,
+        spark_args=()
+):
+    """
+    Generate synthetic cohorts and time CLI commands on them, each in its own process.
+    Every run appends one JSON line to results_path.
+
+    :param scales: names from SCALES
+    :param commands: names from BENCHMARK_COMMANDS; commands after readgvcfs run on its VDS
+    :param work_dir: holds the generated GVCFs (reused between runs) and outputs
+    :param spark_args: extra arguments passed to every command, e.g. --spark_profile laptop
+    :return: list of result records
+    """
+    work_dir = Path(work_dir)
+    label = label or default_label()
+    host = {"hostname": platform.node(), **detect_host_resources()}
+    if chr_prefix is None:
+        chr_prefix = reference_genome == "GRCh38"
+    # readgvcfs recodes contigs to the reference's own naming.
+    contig = "chr1" if reference_genome == "GRCh38" else "1"
+
+    records = []
+    for scale in scales:
+        spec = SCALES[scale]
+        data_dir = work_dir / "data" / f"{scale}_{reference_genome}_{'chr' if chr_prefix else 'bare'}"
+        print(f"[INFO] Benchmark scale '{scale}': {spec['n_samples']} sample(s), {spec['n_sites']:,} site(s)")
+        generate_cohort(
+            data_dir, spec["n_samples"], spec["n_sites"],
+            reference_genome=reference_genome, chr_prefix=chr_prefix
+        )
+        input_bytes = path_size(data_dir)
+
+        for iteration in range(repeat):
+            run_dir = work_dir / "runs" / scale
+            shutil.rmtree(run_dir, ignore_errors=True)
+            tmp_dir = run_dir / "tmp"
+            tmp_dir.mkdir(parents=True)
+            vds = run_dir / "cohort.vds"
+
+            # Everything else needs the VDS, so readgvcfs always runs first.
+            to_run = ["readgvcfs"] + [c for c in commands if c != "readgvcfs"]
+            for command in to_run:
+                argv, out = _command_argv(command, data_dir, vds, run_dir, tmp_dir, contig)
+                log_path = run_dir / f"{command}.log"
+                result = run_timed([sys.executable, "-m", "gvcf_to_vds_pipeline", *argv, *spark_args], log_path)
+
+                status = "done" if result["returncode"] == 0 else "failed"
+                print(
+                    f"[INFO]   {command:<16} {status:<6} {result['wall_seconds']:>8.1f}s "
+                    f"peak {format_bytes(result['peak_rss_bytes'])} (log: {log_path})"
+                )
+                if command in commands:
+                    record = {
+                        "label": label,
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "scale": scale,
+                        "iteration": iteration,
+                        **spec,
+                        "reference_genome": reference_genome,
+                        "command": command,
+                        "status": status,
+                        **result,
+                        "input_bytes": input_bytes,
+                        "output_bytes": path_size(out) if status == "done" and os.path.exists(out) else None,
+                        "spark_args": list(spark_args),
+                        "host": host,
+                    }
+                    records.append(record)
+                    with open(results_path, "a") as f:
+                        f.write(json.dumps(record) + "\n")
+                if status == "failed" and command == "readgvcfs":
+                    print(f"[WARN] readgvcfs failed at scale '{scale}'; skipping the remaining commands.")
+                    break
+    return records
+
+
+def load_results(results_path):
+    with open(results_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_results(records, baseline, candidate):
+    """
+    Compare median wall time and peak memory of two labels per (scale, command).
+    :return: the comparison as text
+    """
+    def medians(label):
+        groups = {}
+        for r in records:
+            if r["label"] == label and r["status"] == "done":
+                groups.setdefault((r["scale"], r["command"]), []).append(r)
+        out = {}
+        for key, runs in groups.items():
+            walls = sorted(r["wall_seconds"] for r in runs)
+            rss = sorted(r["peak_rss_bytes"] for r in runs)
+            out[key] = (walls[len(walls) // 2], rss[len(rss) // 2])
+        return out
+
+    base, cand = medians(baseline), medians(candidate)
+    if not base or not cand:
+        missing = baseline if not base else candidate
+        raise ValueError(f"No successful benchmark results for label '{missing}'")
+
+    scale_order = list(SCALES)
+    keys = sorted(set(base) & set(cand), key=lambda k: (scale_order.index(k[0]), k[1]))
+    lines = [
+        f"Benchmark comparison: {baseline} -> {candidate}",
+        f"  {'scale':<8} {'command':<16} {'wall (s)':>20} {'change':>8} {'peak memory':>24}",
+    ]
+    for key in keys:
+        (bw, br), (cw, cr) = base[key], cand[key]
+        change = (cw - bw) / bw * 100 if bw else 0.0
+        lines.append(
+            f"  {key[0]:<8} {key[1]:<16} {bw:>9.1f} -> {cw:>8.1f} {change:>+7.1f}% "
+            f"{format_bytes(br):>11} -> {format_bytes(cr):>10}"
+        )
+    for key in sorted(set(base) ^ set(cand)):
+        lines.append(f"  {key[0]:<8} {key[1]:<16} only in {baseline if key in base else candidate}")
+    return "\n".join(lines)
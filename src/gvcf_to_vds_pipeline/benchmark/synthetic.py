@@ -0,0 +1,178 @@
+import random
+from pathlib import Path
+
+from gvcf_to_vds_pipeline.benchmark.bgzf import BgzfWriter, TabixIndexBuilder
+from gvcf_to_vds_pipeline.data_processing.gvcf.contigs import PRIMARY_CONTIG_LENGTHS
+
+BASES = "ACGT"
+# Reference blocks are split where GQ would change; these are typical GATK GQ bands.
+GQ_BANDS = (0, 10, 20, 30, 40, 60, 99)
+
+
+def _pl(n_alleles, gt_index, gq):
+    """
+    Phred-scaled likelihoods for a diploid call: 0 for the called genotype, >= gq elsewhere.
+    """
+    n_genotypes = n_alleles * (n_alleles + 1) // 2
+    return ",".join("0" if i == gt_index else str(gq + 5 * i) for i in range(n_genotypes))
+
+
+def _header(sample, contig_lengths, reference_genome):
+    lines = [
+        "##fileformat=VCFv4.2",
+        '##ALT=<ID=NON_REF,Description="Represents any possible alternative allele not already represented">',
+        '##INFO=<ID=END,Number=1,Type=Integer,Description="Stop position of the interval">',
+        '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+        '##FORMAT=<ID=AD,Number=R,Type=Integer,Description="Allelic depths">',
+        '##FORMAT=<ID=DP,Number=1,Type=Integer,Description="Read depth">',
+        '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype quality">',
+        '##FORMAT=<ID=MIN_DP,Number=1,Type=Integer,Description="Minimum DP observed within the block">',
+        '##FORMAT=<ID=PL,Number=G,Type=Integer,Description="Phred-scaled genotype likelihoods">',
+    ]
+    lines += [f"##contig=<ID={name},length={length}>" for name, length in contig_lengths.items()]
+    lines.append(f"##reference={reference_genome}")
+    lines.append("\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", sample]))
+    return "\n".join(lines) + "\n"
+
+
+def cohort_sites(n_sites, contigs, span, seed):
+    """
+    Variant sites shared by the cohort: {contig: sorted [(pos, ref, alts)]}.
+    Sites are spread over the first `span` bases of each contig, at least 4 bp apart.
+
+    :param contigs: {contig name: length}
+    """
+    rng = random.Random(seed)
+    per_contig = max(1, n_sites // len(contigs))
+    sites = {}
+    for contig, length in contigs.items():
+        limit = min(span, length - 10)
+        slots = rng.sample(range(1, limit // 4), min(per_contig, limit // 4 - 1))
+        contig_sites = []
+        for slot in sorted(slots):
+            pos = slot * 4
+            ref = rng.choice(BASES)
+            alts = [b for b in BASES if b != ref]
+            rng.shuffle(alts)
+            # ~10% multi-allelic, ~5% deletions
+            roll = rng.random()
+            if roll < 0.10:
+                alleles = alts[:2]
+            elif roll < 0.15:
+                ref, alleles = ref + rng.choice(BASES), [ref]
+            else:
+                alleles = alts[:1]
+            contig_sites.append((pos, ref, alleles))
+        sites[contig] = contig_sites
+    return sites
+
+
+def _ref_blocks(rng, start, end):
+    """
+    Split [start, end] (1-based, inclusive) into 1-3 reference blocks with different GQ.
+    """
+    cuts = sorted(rng.sample(range(start + 1, end + 1), min(2, end - start))) if end > start else []
+    bounds = [start] + cuts + [end + 1]
+    for block_start, next_start in zip(bounds, bounds[1:]):
+        if next_start > block_start:
+            yield block_start, next_start - 1, rng.choice(GQ_BANDS)
+
+
+def write_gvcf(path, sample, sites, contig_lengths, reference_genome, seed, variant_rate=0.3):
+    """
+    Write one single-sample, bgzipped and tabix-indexed GVCF covering the span of `sites`.
+
+    :param sites: output of cohort_sites
+    :param contig_lengths: {contig name: length} written to the header
+    :param variant_rate: probability the sample carries a non-reference call at each cohort site
+    """
+    rng = random.Random(seed)
+    index = TabixIndexBuilder()
+    with BgzfWriter(path) as w:
+        w.write(_header(sample, contig_lengths, reference_genome).encode())
+        w.flush()
+
+        def emit(contig, pos, end, line):
+            start = w.tell()
+            w.write(line.encode())
+            index.add(contig, pos - 1, end, start, w.tell())
+
+        for contig, contig_sites in sites.items():
+            cursor = 1
+            span_end = contig_sites[-1][0] + 10 if contig_sites else 1
+            for pos, ref, alts in contig_sites:
+                if rng.random() >= variant_rate:
+                    continue
+                for block_start, block_end, gq in _ref_blocks(rng, cursor, pos - 1):
+                    dp = rng.randint(8, 40)
+                    emit(contig, block_start, block_end,
+                         f"{contig}\t{block_start}\t.\tN\t<NON_REF>\t.\t.\tEND={block_end}\t"
+                         f"GT:DP:GQ:MIN_DP:PL\t0/0:{dp}:{gq}:{max(1, dp - 5)}:{_pl(2, 0, gq)}\n")
+
+                alleles = alts + ["<NON_REF>"]  # ALT column; REF is counted separately for PL
+                dp = rng.randint(10, 60)
+                if len(alts) > 1:
+                    gt, gt_index = "1/2", 4
+                    ad = [rng.randint(0, 2), dp // 2, dp - dp // 2, 0]
+                elif rng.random() < 0.3:
+                    gt, gt_index = "1/1", 2
+                    ad = [0, dp, 0]
+                else:
+                    gt, gt_index = "0/1", 1
+                    ad = [dp // 2, dp - dp // 2, 0]
+                gq = rng.randint(20, 99)
+                qual = rng.randint(30, 3000)
+                emit(contig, pos, pos + len(ref) - 1,
+                     f"{contig}\t{pos}\t.\t{ref}\t{','.join(alleles)}\t{qual}\t.\t.\t"
+                     f"GT:AD:DP:GQ:PL\t{gt}:{','.join(map(str, ad))}:{dp}:{gq}:{_pl(len(alleles) + 1, gt_index, gq)}\n")
+                cursor = pos + len(ref)
+
+            for block_start, block_end, gq in _ref_blocks(rng, cursor, span_end):
+                dp = rng.randint(8, 40)
+                emit(contig, block_start, block_end,
+                     f"{contig}\t{block_start}\t.\tN\t<NON_REF>\t.\t.\tEND={block_end}\t"
+                     f"GT:DP:GQ:MIN_DP:PL\t0/0:{dp}:{gq}:{max(1, dp - 5)}:{_pl(2, 0, gq)}\n")
+    index.write(f"{path}.tbi")
+
+
+def generate_cohort(
+        out_dir,
+        n_samples,
+        n_sites,
+        n_contigs=2,
+        reference_genome="GRCh38",
+        chr_prefix=None,
+        span=5_000_000,
+        seed=0
+):
+    """
+    Write a synthetic cohort of GVCFs for benchmarking.
+
+    :param n_samples: number of single-sample GVCFs
+    :param n_sites: variant sites across the cohort (each sample carries a random subset)
+    :param n_contigs: number of autosomes used, starting at chromosome 1
+    :param chr_prefix: use 'chr1' naming; defaults to the convention of reference_genome
+    :param span: bases covered on each contig
+    :return: sorted list of GVCF paths
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if chr_prefix is None:
+        chr_prefix = reference_genome == "GRCh38"
+
+    lengths = PRIMARY_CONTIG_LENGTHS[reference_genome]
+    header_contigs = {}
+    for name, length in lengths.items():
+        bare = name[3:] if name.startswith("chr") else name
+        header_contigs[f"chr{bare}" if chr_prefix else bare] = length
+    used = dict(list(header_contigs.items())[:n_contigs])
+
+    sites = cohort_sites(n_sites, used, span, seed)
+    paths = []
+    for i in range(n_samples):
+        sample = f"SYN{i:05d}"
+        path = out_dir / f"{sample}.g.vcf.gz"
+        if not path.exists() or not Path(f"{path}.tbi").exists():
+            write_gvcf(path, sample, sites, header_contigs, reference_genome, seed=seed * 1_000_003 + i)
+        paths.append(str(path))
+    return paths
@@ -1,21 +1,102 @@
-import argparse
+from gvcf_to_vds_pipeline.benchmark.suite import BENCHMARK_COMMANDS, SCALES
+from gvcf_to_vds_pipeline.cli.server import DEFAULT_SOCKET, DEFAULT_LOG_DIR
+from gvcf_to_vds_pipeline.utils.spark_profiles import PROFILE_NAMES
+from gvcf_to_vds_pipeline.data_processing.genes import DEFAULT_GENE_PADDING
+from gvcf_to_vds_pipeline.data_processing.gvcf.contigs import PRIMARY_CONTIG_LENGTHS
+from gvcf_to_vds_pipeline.data_processing.gvcf.prescan import DEFAULT_HEADER_CACHE, DEFAULT_SCAN_THREADS
+from gvcf_to_vds_pipeline.data_processing.gvcf.read import DEFAULT_WALK_THREADS
+from gvcf_to_vds_pipeline.utils.config import gene_set_names
+from gvcf_to_vds_pipeline.utils.result_cache import DEFAULT_CACHE_MAX_GB
 
 class CommandFactory:
     def __init__(self, parser):
         self.parser = parser
         self.subparsers = parser.add_subparsers(title="commands", dest="command")
 
+    def add_parser(self, name, **kwargs):
+        """
+        Adds a subcommand parser with the options shared by every command.
+        """
+        cmd = self.subparsers.add_parser(name, **kwargs)
+        cmd.add_argument(
+            "--spark_profile", choices=PROFILE_NAMES, default="auto",
+            help="Spark resource profile. 'auto' sizes a local session from the host's cores and memory."
+        )
+        cmd.add_argument(
+            "--spark_conf", "--spark-conf", action="append", default=[], metavar="KEY=VALUE",
+            help="Spark setting overriding the profile, e.g. spark.driver.memory=24g. Repeatable."
+        )
+        cmd.add_argument(
+            "--metrics_out", type=str, default=None,
+            help="Write a JSON run report (phase timings, input/output sizes, Spark stage metrics) here."
+        )
+        cmd.add_argument(
+            "--report_metrics", action="store_true",
+            help="Collect data sizes and Spark stage metrics and log a run summary at the end."
+        )
+        cmd.add_argument(
+            "--dry_run", action="store_true",
+            help="Resolve and check inputs and outputs, print what would run, and exit without starting Spark."
+        )
+        return cmd
+
+    def add_gene_arguments(self, cmd):
+        """
+        Adds the options that turn gene panels into intervals.
+        """
+        cmd.add_argument(
+            "--gene_set", choices=gene_set_names(), default=None,
+            help="Gene panel from config/gene_config.json to resolve to intervals."
+        )
+        cmd.add_argument(
+            "--gene_list", type=str, default=None,
+            help="File with one gene symbol (or Ensembl gene ID) per line to resolve to intervals."
+        )
+        cmd.add_argument(
+            "--annotation", type=str, default=None,
+            help="GTF or BED (name in column 4) annotation used to resolve genes. "
+                 "Indexed once; the index is cached next to the file."
+        )
+        cmd.add_argument(
+            "--gene_padding", type=int, default=DEFAULT_GENE_PADDING,
+            help=f"Bases added on both sides of each gene (default: {DEFAULT_GENE_PADDING})."
+        )
+
+    def add_cache_arguments(self, cmd):
+        """
+        Adds the options of the opt-in result cache.
+        """
+        cmd.add_argument(
+            "--result_cache", type=str, default=None,
+            help="Directory of a result cache; outputs computed before from the same input and "
+                 "parameters are hard-linked from it instead of recomputed."
+        )
+        cmd.add_argument(
+            "--result_cache_max_gb", type=float, default=DEFAULT_CACHE_MAX_GB,
+            help=f"Evict least recently used cache entries above this size (default: {DEFAULT_CACHE_MAX_GB} GB)."
+        )
+
     def create_read_gvcfs_command(self):
         """
         Command for building or combining a VDS from GVCF(s).
         """
-        read_cmd = self.subparsers.add_parser(
+        read_cmd = self.add_parser(
             "readgvcfs",
             help="Combine GVCF file(s) (and optional existing VDS) into a new or updated VDS."
         )
         read_cmd.add_argument(
-            "-f", "--file", nargs="+", required=True,
-            help="Path(s) to GVCF file(s) or directories containing .g.vcf/.g.vcf.gz"
+            "-f", "--file", nargs="+", default=None,
+            help="Path(s) or URI(s) (hdfs://, s3a://, gs://, file://) to GVCF file(s) "
+                 "or directories containing .g.vcf/.g.vcf.gz"
+        )
+        read_cmd.add_argument(
+            "--file_list", type=str, default=None,
+            help="Manifest of GVCF paths (one per line, or TSV with 'path' and optional 'sample' columns). "
+                 "Skips walking directories."
+        )
+        read_cmd.add_argument(
+            "--walk_threads", type=int, default=DEFAULT_WALK_THREADS,
+            help=f"Threads listing directories during GVCF discovery (default: {DEFAULT_WALK_THREADS})."
         )
         read_cmd.add_argument(
             "--vds_in", type=str, default=None,
@@ -31,27 +112,88 @@ class CommandFactory:
         )
         read_cmd.add_argument(
             "--save_plan", type=str, default=None,
-            help="Path to store the combiner plan JSON for restart if needed."
+            help="Path to store the combiner plan JSON (default: <temp>/combiner-plan.json). "
+                 "An interrupted combine is resumed from it when rerun with the same inputs."
+        )
+        read_cmd.add_argument(
+            "--restart", action="store_true", default=False,
+            help="Discard a saved combiner plan and start the combine over."
         )
         read_cmd.add_argument(
             "--use_genome_intervals", action="store_true", default=False,
-            help="Use Hail's default intervals for whole-genome partitioning."
+            help="Import genomes in Hail's default whole-genome interval size (unless --import_interval_size is given)."
         )
         read_cmd.add_argument(
             "--use_exome_intervals", action="store_true", default=False,
-            help="Use Hail's default intervals for exome partitioning."
+            help="Import exomes in Hail's default exome interval size (unless --import_interval_size is given)."
         )
         read_cmd.add_argument(
             "--intervals", nargs="+", default=None,
             help="List of intervals (e.g. chr1:1-100000) for GVCF partitioning."
         )
+        self.add_gene_arguments(read_cmd)
         read_cmd.add_argument(
             "--import_interval_size", type=int, default=None,
-            help="Interval size in base pairs for GVCF partitioning."
+            help="Interval size in base pairs for GVCF partitioning. Chosen automatically if omitted."
+        )
+        read_cmd.add_argument(
+            "--gvcf_batch_size", type=int, default=None,
+            help="Override the number of GVCF merge groups per combiner job (autotuned by default)."
+        )
+        read_cmd.add_argument(
+            "--branch_factor", type=int, default=None,
+            help="Override the number of inputs merged per group (autotuned by default)."
+        )
+        read_cmd.add_argument(
+            "--target_records", type=int, default=None,
+            help="Override the target rows per partition for VDS merges (autotuned by default)."
+        )
+        read_cmd.add_argument(
+            "--plan_only", action="store_true", default=False,
+            help="Print the autotuned combiner plan and exit without starting a combine."
+        )
+        read_cmd.add_argument(
+            "--reimport", action="store_true", default=False,
+            help="Combine every GVCF, even if its sample is already in --vds_in (skips the ingestion ledger)."
+        )
+        read_cmd.add_argument(
+            "--reference_genome", choices=sorted(PRIMARY_CONTIG_LENGTHS), default=None,
+            help="Reference genome of the GVCFs. Detected from the ##contig header lines if omitted."
+        )
+        read_cmd.add_argument(
+            "--shards", type=int, default=None,
+            help="Split the combine into this many independent jobs over consecutive genomic ranges, "
+                 "then concatenate them into --dest."
+        )
+        read_cmd.add_argument(
+            "--shard_workers", type=int, default=None,
+            help="Shard jobs run at once on this machine, each with its own Spark session "
+                 "(default: all shards). Cores and driver memory are divided between them."
+        )
+        read_cmd.add_argument(
+            "--shard_dir", type=str, default=None,
+            help="Local or network-mounted directory for the shard manifest, shard VDSs, plans and logs "
+                 "(default: <temp>/shards). With --plan_only, the commands to run each shard elsewhere are printed."
+        )
+        read_cmd.add_argument(
+            "--shard_manifest", type=str, default=None,
+            help="Run one shard (--shard) of a manifest written by --shards. Used by shard jobs."
+        )
+        read_cmd.add_argument(
+            "--shard", type=str, default=None,
+            help="Name of the shard in --shard_manifest to run."
+        )
+        read_cmd.add_argument(
+            "--header_cache", type=str, default=DEFAULT_HEADER_CACHE,
+            help=f"Cache file for parsed GVCF headers (default: {DEFAULT_HEADER_CACHE})."
+        )
+        read_cmd.add_argument(
+            "--scan_threads", type=int, default=DEFAULT_SCAN_THREADS,
+            help=f"Threads for the GVCF header pre-scan (default: {DEFAULT_SCAN_THREADS})."
         )
 
     def create_filter_samples_command(self):
-        filter_cmd = self.subparsers.add_parser(
+        filter_cmd = self.add_parser(
             "filter_samples",
             help="Filter samples in a VariantDataset."
         )
@@ -60,20 +202,60 @@ class CommandFactory:
             help="Path to the input VDS"
         )
         filter_cmd.add_argument(
-            "-s", "--samples", type=str, required=True,
-            help="File with one sample ID per line to keep or remove."
+            "-s", "--samples", type=str, default=None,
+            help="Samples to keep or remove: one ID per line, a TSV with an 's'/'sample' column, "
+                 ".parquet or .ht. Matched by join, so lists of any size are fine."
+        )
+        filter_cmd.add_argument(
+            "--where", type=str, default=None,
+            help="Select samples by an expression over sample QC and metadata fields, "
+                 "e.g. \"call_rate < 0.95\". Combined with -s, a sample must match both."
+        )
+        filter_cmd.add_argument(
+            "--metadata", type=str, default=None,
+            help="(Optional) Per-sample table (same formats as -s) whose columns --where can use."
+        )
+        filter_cmd.add_argument(
+            "--recompute_qc", action="store_true", default=False,
+            help="Ignore sample QC stored with the VDS when --where uses QC fields."
         )
         filter_cmd.add_argument(
             "-k", "--keep", action="store_true", default=False,
-            help="Keep these samples (default is remove)."
+            help="Keep the selected samples (default is remove)."
         )
         filter_cmd.add_argument(
             "-o", "--out", type=str, required=False,
             help="Path to the output VDS. If omitted, overwrites original."
         )
+        self.add_cache_arguments(filter_cmd)
+
+    def create_split_cohorts_command(self):
+        """
+        Command for writing several cohort VDSs from one read of a VDS.
+        """
+        split_cmd = self.add_parser(
+            "split_cohorts",
+            help="Split a VDS into one VDS per cohort in a single job."
+        )
+        split_cmd.add_argument(
+            "-v", "--vds", type=str, required=True,
+            help="Path to the input VDS."
+        )
+        split_cmd.add_argument(
+            "-m", "--cohort_map", type=str, required=True,
+            help="TSV of sample and cohort (header 'sample'/'cohort' optional). A sample may be in several cohorts."
+        )
+        split_cmd.add_argument(
+            "--cohort_spec", type=str, default=None,
+            help="(Optional) JSON/YAML with per-cohort 'intervals', 'exclude_samples' (sample file) and 'output'."
+        )
+        split_cmd.add_argument(
+            "-o", "--out_dir", type=str, default=None,
+            help="Directory for cohorts without an 'output' in the spec, written as <out_dir>/<cohort>.vds."
+        )
 
     def create_filter_intervals_command(self):
-        filter_cmd = self.subparsers.add_parser(
+        filter_cmd = self.add_parser(
             "filter_intervals",
             help="Filter intervals in a VDS. Removes all data outside intervals."
         )
@@ -82,9 +264,10 @@ class CommandFactory:
             help="Path to input VDS."
         )
         filter_cmd.add_argument(
-            "-i", "--intervals", nargs="+", required=True,
+            "-i", "--intervals", nargs="+", default=None,
             help="List of intervals (e.g. chr1:1-100000) to keep or remove."
         )
+        self.add_gene_arguments(filter_cmd)
         filter_cmd.add_argument(
             "--keep", action="store_true", default=True,
             help="Keep only these intervals (default). If false, remove intervals."
@@ -93,9 +276,10 @@ class CommandFactory:
             "-o", "--out", type=str, required=False,
             help="Path to output VDS. If omitted, overwrites original."
         )
+        self.add_cache_arguments(filter_cmd)
 
     def create_sample_qc_command(self):
-        qc_cmd = self.subparsers.add_parser(
+        qc_cmd = self.add_parser(
             "sample_qc",
             help="Compute sample QC metrics on a VDS."
         )
@@ -105,11 +289,114 @@ class CommandFactory:
         )
         qc_cmd.add_argument(
             "-o", "--out", type=str, required=False,
-            help="Path to output with QC results (e.g. a text file)."
+            help="Path to output with QC results: .tsv, .tsv.bgz, .parquet or .ht."
+        )
+        qc_cmd.add_argument(
+            "--recompute", action="store_true", default=False,
+            help="Ignore QC results stored with the VDS and compute every sample."
+        )
+
+    def create_variant_qc_command(self):
+        """
+        Command for site-level statistics without densifying.
+        """
+        vqc_cmd = self.add_parser(
+            "variant_qc",
+            help="Compute AC, AN, AF, call rate and genotype counts per site from the sparse VDS."
+        )
+        vqc_cmd.add_argument(
+            "-v", "--vds", type=str, required=True,
+            help="Path to input VDS."
+        )
+        vqc_cmd.add_argument(
+            "-o", "--out", type=str, required=True,
+            help="Path to output Hail Table (.ht), keyed by locus and alleles."
+        )
+        vqc_cmd.add_argument(
+            "--vcf_out", type=str, default=None,
+            help="(Optional) Also export a sites-only VCF; a .vcf.bgz path is tabix-indexed."
+        )
+        vqc_cmd.add_argument(
+            "-i", "--intervals", nargs="+", default=None,
+            help="(Optional) Restrict to these intervals (e.g. chr1:1-100000)."
+        )
+        self.add_gene_arguments(vqc_cmd)
+
+    def create_burden_command(self):
+        """
+        Command for gene-level rare-variant counts per sample.
+        """
+        burden_cmd = self.add_parser(
+            "burden",
+            help="Count qualifying rare variants per gene and sample for a gene set, from the sparse VDS."
+        )
+        burden_cmd.add_argument(
+            "-v", "--vds", type=str, required=True,
+            help="Path to input VDS."
+        )
+        self.add_gene_arguments(burden_cmd)
+        burden_cmd.add_argument(
+            "--max_af", type=float, default=0.01,
+            help="Maximum alternate allele frequency of a qualifying variant (default: 0.01)."
+        )
+        burden_cmd.add_argument(
+            "--min_gq", type=int, default=20,
+            help="Minimum GQ of a qualifying call (default: 20)."
+        )
+        burden_cmd.add_argument(
+            "--min_dp", type=int, default=10,
+            help="Minimum DP of a qualifying call (default: 10)."
+        )
+        burden_cmd.add_argument(
+            "--af_table", type=str, default=None,
+            help="(Optional) Hail Table keyed by locus, alleles with an AF array (e.g. variant_qc output). "
+                 "Defaults to AF computed from the VDS cohort."
+        )
+        burden_cmd.add_argument(
+            "--cache_dir", type=str, default=None,
+            help="Directory for cached per-gene results (default: <vds>/burden_cache)."
+        )
+        burden_cmd.add_argument(
+            "-o", "--out", type=str, required=True,
+            help="Output: a .mt path, or a text file with one row per gene and one column per sample."
+        )
+
+    def create_coverage_command(self):
+        """
+        Command for per-gene depth and callability from the sparse VDS.
+        """
+        cov_cmd = self.add_parser(
+            "coverage",
+            help="Per-gene, per-sample mean DP, fraction of bases over DP/GQ thresholds, without densifying."
+        )
+        cov_cmd.add_argument(
+            "-v", "--vds", type=str, required=True,
+            help="Path to input VDS."
+        )
+        cov_cmd.add_argument(
+            "-i", "--intervals", nargs="+", default=None,
+            help="Additional target intervals (e.g. chr1:1-100000), each reported on its own."
+        )
+        self.add_gene_arguments(cov_cmd)
+        cov_cmd.add_argument(
+            "--dp_thresholds", nargs="+", type=int, default=[10, 20],
+            help="Report the fraction of bases with DP >= each threshold (default: 10 20)."
+        )
+        cov_cmd.add_argument(
+            "--gq_thresholds", nargs="+", type=int, default=[0, 20, 30, 40],
+            help="Report the fraction of bases with GQ >= each threshold (default: 0 20 30 40)."
+        )
+        cov_cmd.add_argument(
+            "-o", "--out", type=str, required=True,
+            help="Per-gene, per-sample output: a .ht path, or a text file (.tsv, .tsv.bgz)."
+        )
+        cov_cmd.add_argument(
+            "--summary_out", type=str, default=None,
+            help="(Optional) Per-gene output averaged over samples, same formats as --out."
         )
 
     def create_split_multi_command(self):
-        sm_cmd = self.subparsers.add_parser(
+        sm_cmd = self.add_parser(
             "split_multi",
             help="Split multi-allelic variants in a VDS's variant_data."
         )
@@ -125,9 +412,39 @@ class CommandFactory:
             "--filter_changed_loci", action="store_true", default=False,
             help="If true, filter out variants whose locus changes after splitting."
         )
+        self.add_cache_arguments(sm_cmd)
+
+    def create_compact_command(self):
+        """
+        Command for rebalancing partitions and truncating reference blocks.
+        """
+        compact_cmd = self.add_parser(
+            "compact",
+            help="Rewrite a VDS with balanced partitions and bounded reference blocks."
+        )
+        compact_cmd.add_argument(
+            "-v", "--vds", type=str, required=True,
+            help="Path to input VDS."
+        )
+        compact_cmd.add_argument(
+            "-o", "--out", type=str, required=True,
+            help="Path to the compacted VDS (must differ from the input)."
+        )
+        compact_cmd.add_argument(
+            "--partition_mb", type=int, default=128,
+            help="Target on-disk partition size in MiB (default: 128)."
+        )
+        compact_cmd.add_argument(
+            "--n_partitions", type=int, default=None,
+            help="(Optional) Exact partition count; overrides --partition_mb."
+        )
+        compact_cmd.add_argument(
+            "--max_ref_block", type=int, default=None,
+            help="(Optional) Split reference blocks longer than this many bases (e.g. 10000)."
+        )
 
     def create_to_dense_mt_command(self):
-        td_cmd = self.subparsers.add_parser(
+        td_cmd = self.add_parser(
             "to_dense_mt",
             help="Convert a VariantDataset to a dense MatrixTable."
         )
@@ -137,21 +454,130 @@ class CommandFactory:
         )
         td_cmd.add_argument(
             "-o", "--out", type=str, required=True,
-            help="Path to the resulting dense MT."
+            help="Path to the resulting dense MT, or the export path/directory for other formats."
+        )
+        td_cmd.add_argument(
+            "--format", choices=["mt", "vcf", "plink", "parquet"], default="mt",
+            help="Output format: mt (default), vcf (bgzipped, tabix-indexed shards), plink or parquet."
+        )
+        td_cmd.add_argument(
+            "--shard_by", choices=["partition", "contig"], default="partition",
+            help="Export shards: one per partition (default) or one per contig."
+        )
+        td_cmd.add_argument(
+            "-i", "--intervals", nargs="+", default=None,
+            help="(Optional) Only densify these intervals (e.g. chr1:1-100000)."
+        )
+        self.add_gene_arguments(td_cmd)
+        td_cmd.add_argument(
+            "-s", "--samples", type=str, default=None,
+            help="(Optional) Sample IDs (one per line, TSV with 's'/'sample' column, .parquet or .ht); "
+                 "only these samples are densified."
         )
 
-    def setup_parser():
+    def create_pipeline_command(self):
         """
-        Sets up the command-line argument parser.
+        Command for running several VDS operations in one session from a step file.
         """
-        parser = argparse.ArgumentParser(description="GVCF to VDS Pipeline")
-        factory = CommandFactory(parser)
+        pipe_cmd = self.add_parser(
+            "pipeline",
+            help="Run a declarative chain of VDS operations, writing only the marked outputs."
+        )
+        pipe_cmd.add_argument(
+            "-p", "--steps", type=str, required=True,
+            help="Step file (.json, .yaml or .yml) with 'input' and a list of 'steps'."
+        )
+        pipe_cmd.add_argument(
+            "-v", "--vds", type=str, default=None,
+            help="(Optional) Input VDS path, overriding 'input' from the step file."
+        )
+        self.add_cache_arguments(pipe_cmd)
+
+    def create_serve_command(self):
+        """
+        Command for keeping one Hail/Spark session warm and running submitted commands.
+        """
+        serve_cmd = self.add_parser(
+            "serve",
+            help="Start a persistent Hail session that runs commands submitted with --server."
+        )
+        serve_cmd.add_argument(
+            "--socket", type=str, default=DEFAULT_SOCKET,
+            help=f"Local socket path to listen on (default: {DEFAULT_SOCKET})."
+        )
+        serve_cmd.add_argument(
+            "--log_dir", type=str, default=DEFAULT_LOG_DIR,
+            help=f"Directory for per-job log files (default: {DEFAULT_LOG_DIR})."
+        )
+        serve_cmd.add_argument(
+            "--temp", type=str, default="/tmp",
+            help="Temporary directory for the Hail session."
+        )
 
-        factory.create_read_gvcfs_command()
-        factory.create_filter_samples_command()
-        factory.create_filter_intervals_command()
-        factory.create_sample_qc_command()
-        factory.create_split_multi_command()
-        factory.create_to_dense_mt_command()
+    def create_cache_command(self):
+        """
+        Command for inspecting and pruning a result cache.
+        """
+        cache_cmd = self.add_parser(
+            "cache",
+            help="List, prune or clear a result cache directory."
+        )
+        cache_cmd.add_argument(
+            "action", choices=["list", "prune", "clear"],
+            help="list: show entries; prune: evict least recently used entries down to --max_gb; clear: remove all."
+        )
+        cache_cmd.add_argument(
+            "--result_cache", type=str, required=True,
+            help="Result cache directory."
+        )
+        cache_cmd.add_argument(
+            "--max_gb", type=float, default=DEFAULT_CACHE_MAX_GB,
+            help=f"Size to prune to (default: {DEFAULT_CACHE_MAX_GB} GB)."
+        )
 
-        return parser
+    def create_benchmark_command(self):
+        """
+        Command for timing the CLI commands on synthetic GVCF cohorts.
+        """
+        bench_cmd = self.add_parser(
+            "benchmark",
+            help="Generate synthetic GVCFs and record wall time, peak memory and output size of each command."
+        )
+        bench_cmd.add_argument(
+            "--scales", nargs="+", choices=list(SCALES), default=["tiny", "small"],
+            help="Cohort sizes to run at: " + ", ".join(
+                f"{name} ({s['n_samples']} samples, {s['n_sites']:,} sites)" for name, s in SCALES.items()
+            ) + " (default: tiny small)."
+        )
+        bench_cmd.add_argument(
+            "--commands", nargs="+", choices=BENCHMARK_COMMANDS, default=list(BENCHMARK_COMMANDS),
+            help="Commands to time (default: all). The cohort VDS is always built first."
+        )
+        bench_cmd.add_argument(
+            "--work_dir", type=str, default="/tmp/gvcf-to-vds-benchmark",
+            help="Directory for generated GVCFs (reused between runs) and command outputs."
+        )
+        bench_cmd.add_argument(
+            "--results", type=str, default="benchmark_results.jsonl",
+            help="JSON-lines file each result is appended to (default: benchmark_results.jsonl)."
+        )
+        bench_cmd.add_argument(
+            "--label", type=str, default=None,
+            help="Label stored with the results (default: the current git commit)."
+        )
+        bench_cmd.add_argument(
+            "--reference_genome", choices=sorted(PRIMARY_CONTIG_LENGTHS), default="GRCh38",
+            help="Reference genome of the synthetic GVCFs (default: GRCh38)."
+        )
+        bench_cmd.add_argument(
+            "--contig_style", choices=["chr", "bare"], default=None,
+            help="Contig naming in the synthetic GVCFs (chr1 or 1); defaults to the reference's own style."
+        )
+        bench_cmd.add_argument(
+            "--repeat", type=int, default=1,
+            help="Times to run each scale (default: 1)."
+        )
+        bench_cmd.add_argument(
+            "--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), default=None,
+            help="Compare two labels already in --results instead of running."
+        )
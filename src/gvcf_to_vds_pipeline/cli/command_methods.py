@@ -1,14 +1,51 @@
-import hail as hl
-from pathlib import Path
-
-from gvcf_to_vds_pipeline.data_processing.gvcf.read import gather_gvcfs
-from gvcf_to_vds_pipeline.data_processing.gvcf.process import build_or_combine_vds
-from gvcf_to_vds_pipeline.data_processing.vds.operations import (
-    filter_samples,
-    filter_intervals,
-    run_sample_qc,
-    split_multi,
-    to_dense_mt
+import argparse
+import os
+
+from gvcf_to_vds_pipeline.benchmark.suite import compare_results, load_results, run_benchmarks
+from gvcf_to_vds_pipeline.cli.dry_run import (
+    OUTPUT_ARGS,
+    check_inputs,
+    check_outputs,
+    format_dry_run,
+    vds_reference_genome_name,
+)
+from gvcf_to_vds_pipeline.data_processing.genes import (
+    format_interval,
+    gene_intervals,
+    load_gene_index,
+    merge_intervals,
+    read_gene_list
+)
+from gvcf_to_vds_pipeline.data_processing.gvcf.read import gather_gvcfs, read_file_list
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import is_remote
+from gvcf_to_vds_pipeline.data_processing.gvcf.ledger import local_ledger_samples
+from gvcf_to_vds_pipeline.data_processing.gvcf.plan import (
+    HAIL_EXOME_INTERVAL_SIZE,
+    HAIL_GENOME_INTERVAL_SIZE,
+    format_plan,
+    plan_combine,
+)
+from gvcf_to_vds_pipeline.data_processing.gvcf.prescan import prescan_gvcfs
+from gvcf_to_vds_pipeline.data_processing.gvcf.shards import (
+    SHARD_MANIFEST_FILENAME,
+    build_shard_manifest,
+    chunk_genome,
+    format_shard_plan,
+    get_shard,
+    load_shard_manifest,
+    plan_shards,
+    run_shards,
+    save_shard_manifest,
+    shard_spark_args
+)
+from gvcf_to_vds_pipeline.utils.config import get_target_genes
+from gvcf_to_vds_pipeline.utils.metrics import RunMetrics
+from gvcf_to_vds_pipeline.utils.resources import format_bytes
+from gvcf_to_vds_pipeline.utils.result_cache import ResultCache, check_cacheable_output, format_cache_entries
+from gvcf_to_vds_pipeline.utils.spark_profiles import (
+    conf_resources,
+    parse_spark_conf_overrides,
+    resolve_profile_conf
 )
 
 class CommandHandler:
@@ -19,92 +56,702 @@ class CommandHandler:
 
     def __init__(self, args):
         self.args = args
+        self.metrics = RunMetrics.from_args(args)
+
+    def preflight(self):
+        """
+        Checks that run before Spark is started, so bad inputs fail fast.
+        Returns True if the command has nothing left to do (e.g. --plan_only),
+        in which case Spark is never started.
+        """
+        self.check_arguments()
+        check_inputs(self.args, sizes=False)
+        if self.args.command == "readgvcfs":
+            if self.args.shard_manifest:
+                self.load_read_gvcfs_shard()
+                return False
+            if any(is_remote(p) for p in self.args.file or []):
+                print("[INFO] Remote GVCF inputs: discovery and header pre-scan run once Hail has started.")
+                return False
+            self.discover_gvcfs()
+            if any(is_remote(p) for p in self.gvcf_paths):
+                print("[INFO] Remote GVCF inputs: header pre-scan runs once Hail has started.")
+                return False
+            self.prescan_read_gvcfs()
+            if self.args.vds_in and self.existing_sample_count() is None:
+                print("[INFO] Samples in --vds_in are counted and the combine planned once Hail has started.")
+                return False
+            self.plan_read_gvcfs()
+            if self.args.shards:
+                self.plan_read_gvcfs_shards()
+                if not (self.args.plan_only or self.args.dry_run):
+                    self.run_read_gvcfs_shards()
+            return self.args.plan_only
+        if self.args.command == "split_cohorts":
+            self.plan_split_cohorts()
+        return False
+
+    def check_arguments(self):
+        """
+        Argument checks that need no data, run before Spark starts and by --dry_run.
+        """
+        command = self.args.command
+        has_genes = bool(getattr(self.args, "gene_set", None) or getattr(self.args, "gene_list", None))
+        if command == "filter_samples":
+            if not self.args.samples and not self.args.where:
+                raise ValueError("filter_samples needs -s/--samples, --where, or both.")
+            if self.args.where:
+                try:
+                    compile(self.args.where, "--where", "eval")
+                except SyntaxError as e:
+                    raise ValueError(f"--where is not a valid expression: {e.msg}")
+        elif command == "filter_intervals" and not (self.args.intervals or has_genes):
+            raise ValueError("filter_intervals needs -i/--intervals, --gene_set or --gene_list.")
+        elif command == "coverage" and not (self.args.intervals or has_genes):
+            raise ValueError("coverage needs --gene_set, --gene_list or -i/--intervals.")
+        elif command == "burden" and not has_genes:
+            raise ValueError("burden needs --gene_set or --gene_list.")
+        elif command == "compact" and self.args.out.rstrip("/") == self.args.vds.rstrip("/"):
+            raise ValueError("compact cannot overwrite its input; write to a new path and swap it in afterwards.")
+        if getattr(self.args, "result_cache", None):
+            for arg in OUTPUT_ARGS:
+                if getattr(self.args, arg, None):
+                    check_cacheable_output(getattr(self.args, arg), f"--{arg}")
+
+    def dry_run(self):
+        """
+        Resolve and check the command's inputs and outputs without starting Spark,
+        and print what a real run would read and write. No dataset is written.
+        """
+        command = self.args.command
+        inputs = check_inputs(self.args)
+        outputs = check_outputs(self.args)
+        details = []
+        if command == "readgvcfs":
+            self.preflight()
+            if hasattr(self, "gvcf_paths"):
+                details.append(f"{len(self.gvcf_paths)} GVCF(s) to combine")
+        elif command == "cache":
+            details += self.dry_run_cache()
+        elif command == "benchmark":
+            details.append(
+                f"compare {' vs '.join(self.args.compare)} in {self.args.results}" if self.args.compare
+                else f"{len(self.args.scales) * len(self.args.commands) * self.args.repeat} benchmark run(s)"
+            )
+        elif command != "serve":
+            self.check_arguments()
+            if command == "split_cohorts":
+                self.plan_split_cohorts()
+            elif command == "pipeline":
+                details += self.dry_run_pipeline(inputs)
+            elif getattr(self.args, "gene_set", None) or getattr(self.args, "gene_list", None):
+                details += self.dry_run_genes()
+            elif getattr(self.args, "intervals", None):
+                details.append(f"{len(self.args.intervals)} interval(s) given")
+            if command in ("filter_samples", "filter_intervals") and not self.args.out:
+                details.append(f"no -o/--out: {self.args.vds} is overwritten")
+            if getattr(self.args, "result_cache", None):
+                details.append(f"result cache: {self.args.result_cache}")
+
+        print(format_dry_run(command, inputs, outputs, details))
+
+    def dry_run_genes(self):
+        """
+        Resolve --gene_set/--gene_list against --annotation, if the VDS's reference
+        genome can be read from its metadata without Hail.
+        """
+        reference_genome = vds_reference_genome_name(self.args.vds)
+        if reference_genome is None:
+            return ["genes are resolved to intervals at run time (reference genome not readable without Hail)"]
+        if self.args.command in ("coverage", "burden"):
+            return [f"{len(self.resolve_gene_loci(reference_genome))} gene(s) on {reference_genome}"]
+        return [f"{len(self.resolve_intervals(reference_genome))} interval(s) on {reference_genome}"]
+
+    def dry_run_pipeline(self, inputs):
+        """
+        Load and validate the step file, listing each step and what it writes.
+        The pipeline's input VDS is checked and added to inputs.
+        """
+        from gvcf_to_vds_pipeline.data_processing.vds.pipeline import load_pipeline_spec, validate_pipeline_spec
+
+        spec = load_pipeline_spec(self.args.steps)
+        if self.args.vds:
+            spec["input"] = self.args.vds
+        validate_pipeline_spec(spec)
+        if not self.args.vds:
+            inputs += check_inputs(argparse.Namespace(vds=spec["input"]))
+        lines = []
+        for n, step in enumerate(spec["steps"], start=1):
+            writes = [step[k] for k in ("checkpoint", "output") if step.get(k)]
+            lines.append(f"step {n}: {step['op']}" + (f" -> {', '.join(writes)}" if writes else ""))
+        return lines
+
+    def dry_run_cache(self):
+        """
+        Describe what cache list/prune/clear would do, without changing the cache.
+        """
+        if not os.path.isdir(self.args.result_cache):
+            raise ValueError(f"--result_cache: {self.args.result_cache} is not a directory")
+        entries = ResultCache(self.args.result_cache).entries()
+        if self.args.action == "prune":
+            entries = ResultCache(self.args.result_cache).eviction_candidates(int(self.args.max_gb * 1024 ** 3))
+        verb = {"list": "cached", "prune": "would be evicted", "clear": "would be removed"}[self.args.action]
+        return [f"{len(entries)} entr{'y' if len(entries) == 1 else 'ies'} {verb} "
+                f"({format_bytes(sum(e['bytes'] for e in entries))})"]
+
+    def plan_split_cohorts(self):
+        """
+        Read the cohort map and spec, resolving each cohort's samples, filters and output.
+        """
+        from gvcf_to_vds_pipeline.data_processing.vds.cohorts import plan_cohorts, read_cohort_map
+        from gvcf_to_vds_pipeline.data_processing.vds.pipeline import load_pipeline_spec
+
+        spec = load_pipeline_spec(self.args.cohort_spec) if self.args.cohort_spec else None
+        self.cohort_plan = plan_cohorts(read_cohort_map(self.args.cohort_map), self.args.out_dir, spec)
+        for cohort, options in self.cohort_plan.items():
+            print(f"[INFO] Cohort '{cohort}': {len(options['samples'])} sample(s) -> {options['output']}")
+
+    def result_cache(self):
+        """
+        The result cache given with --result_cache, or None.
+        """
+        if not getattr(self.args, "result_cache", None):
+            return None
+        return ResultCache(self.args.result_cache, max_bytes=int(self.args.result_cache_max_gb * 1024 ** 3))
+
+    def vds_reference_genome(self):
+        """
+        Name of the reference genome of the input VDS.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import vds_reference_genome
+
+        return vds_reference_genome(hl.vds.read_vds(self.args.vds)).name
+
+    def resolve_gene_loci(self, reference_genome):
+        """
+        Resolve the genes of --gene_set/--gene_list against --annotation.
+        Returns {gene: [(contig, start, end), ...]}, empty if no genes were given.
+        """
+        genes = []
+        if self.args.gene_set:
+            genes += get_target_genes(self.args.gene_set)
+        if self.args.gene_list:
+            genes += read_gene_list(self.args.gene_list)
+        if not genes:
+            return {}
+
+        if not self.args.annotation:
+            raise ValueError("--gene_set/--gene_list need --annotation (GTF or BED) to resolve genes to intervals.")
+        with self.metrics.phase("resolve_genes"):
+            index = load_gene_index(self.args.annotation)
+            per_gene, missing = gene_intervals(genes, index, reference_genome, self.args.gene_padding)
+        if not per_gene:
+            raise ValueError(f"None of the {len(genes)} requested genes were found in {self.args.annotation}")
+        if missing:
+            shown = ", ".join(missing[:10]) + (" ..." if len(missing) > 10 else "")
+            print(f"[WARN] {len(missing)} gene(s) not found in {self.args.annotation}: {shown}")
+        return per_gene
+
+    def resolve_intervals(self, reference_genome):
+        """
+        Combine -i/--intervals with the genes of --gene_set/--gene_list, merged.
+        Returns interval strings, or None if none were given.
+        """
+        intervals = list(self.args.intervals or [])
+        per_gene = self.resolve_gene_loci(reference_genome)
+        if not per_gene:
+            return intervals or None
+
+        merged = merge_intervals([locus for loci in per_gene.values() for locus in loci], reference_genome)
+        print(
+            f"[INFO] Resolved {len(per_gene)} gene(s) to {len(merged)} interval(s) "
+            f"({sum(end - start + 1 for _, start, end in merged):,} bp, padding {self.args.gene_padding} bp)"
+        )
+        return intervals + [format_interval(*locus) for locus in merged]
+
+    def discover_gvcfs(self):
+        """
+        Collect GVCF paths from -f/--file (files, directories or URIs) and --file_list.
+        """
+        if not self.args.file and not self.args.file_list:
+            raise ValueError("readgvcfs needs GVCF inputs: pass -f/--file and/or --file_list.")
+
+        self.gvcf_paths = []
+        self.manifest_samples = {}
+        with self.metrics.phase("discover"):
+            if self.args.file:
+                self.gvcf_paths = gather_gvcfs(self.args.file, threads=self.args.walk_threads)
+            if self.args.file_list:
+                listed, self.manifest_samples = read_file_list(self.args.file_list)
+                known = set(self.gvcf_paths)
+                self.gvcf_paths.extend(p for p in listed if p not in known)
+        if not self.gvcf_paths and not self.args.vds_in:
+            raise ValueError("No GVCFs found in -f/--file or --file_list.")
+        self.metrics.count("n_gvcfs", len(self.gvcf_paths))
+
+    def prescan_read_gvcfs(self):
+        """
+        Scan GVCF headers to pick the reference genome and contig recoding,
+        rejecting duplicate samples or inconsistent contigs.
+        """
+        if not hasattr(self, "gvcf_paths"):
+            self.discover_gvcfs()
+        with self.metrics.phase("prescan"):
+            self.prescan = prescan_gvcfs(
+                self.gvcf_paths,
+                reference_genome=self.args.reference_genome,
+                cache_path=self.args.header_cache,
+                threads=self.args.scan_threads,
+                expected_samples=self.manifest_samples
+            )
+        self.metrics.count("input_bytes", self.prescan["total_bytes"])
+
+    def existing_sample_count(self, read_vds=False):
+        """
+        Number of samples in --vds_in: 0 without one, taken from its ingestion ledger when
+        that is complete and can be read locally, otherwise counted with Hail if read_vds
+        is set, else None.
+        """
+        if not self.args.vds_in:
+            return 0
+        samples = local_ledger_samples(self.args.vds_in)
+        if samples is not None:
+            return len(samples)
+        if not read_vds:
+            return None
+        import hail as hl
+
+        return hl.vds.read_vds(self.args.vds_in).variant_data.count_cols()
+
+    def plan_read_gvcfs(self):
+        """
+        Choose combiner parameters from the inputs and the machine, and print the plan.
+        """
+        self.intervals = self.resolve_intervals(self.prescan["reference_genome"])
+        mode, preset_interval_size = None, None
+        if self.args.use_genome_intervals:
+            if self.args.use_exome_intervals:
+                print("[WARN] Both genome and exome intervals requested; using genome intervals.")
+            mode, preset_interval_size = "genome", HAIL_GENOME_INTERVAL_SIZE
+        elif self.args.use_exome_intervals:
+            mode, preset_interval_size = "exome", HAIL_EXOME_INTERVAL_SIZE
+
+        self.plan = plan_combine(
+            n_gvcfs=len(self.gvcf_paths),
+            total_bytes=self.prescan["total_bytes"],
+            mode=mode,
+            reference_genome=self.prescan["reference_genome"],
+            n_intervals=len(self.intervals) if self.intervals else None,
+            n_vds_inputs=1 if self.args.vds_in else 0,
+            n_vds_samples=self.existing_sample_count(read_vds=True),
+            import_interval_size=self.args.import_interval_size or preset_interval_size,
+            gvcf_batch_size=self.args.gvcf_batch_size,
+            branch_factor=self.args.branch_factor,
+            target_records=self.args.target_records,
+            **conf_resources(resolve_profile_conf(
+                self.args.spark_profile, parse_spark_conf_overrides(self.args.spark_conf)
+            )[1])
+        )
+        print(format_plan(self.plan))
+
+    def plan_read_gvcfs_shards(self):
+        """
+        Split the combine into shards over consecutive genomic ranges and write the
+        shard manifest, printing the command that runs each shard.
+        """
+        if self.args.vds_in:
+            raise ValueError("--shards builds a new VDS; combine with --vds_in without --shards.")
+        shard_dir = self.args.shard_dir or f"{self.args.temp.rstrip('/')}/shards"
+        if is_remote(shard_dir):
+            raise ValueError(f"--shard_dir must be a local or network-mounted path, not {shard_dir}")
+
+        reference_genome = self.prescan["reference_genome"]
+        intervals = self.intervals or chunk_genome(reference_genome, self.plan["import_interval_size"])
+        shards = plan_shards(intervals, self.args.shards, reference_genome)
+        self.shard_manifest_path = f"{shard_dir.rstrip('/')}/{SHARD_MANIFEST_FILENAME}"
+        self.shard_manifest = build_shard_manifest(
+            shards, shard_dir, self.args.temp, self.args.dest, self.gvcf_paths, self.prescan, self.plan
+        )
+        if not self.args.dry_run:
+            save_shard_manifest(self.shard_manifest, self.shard_manifest_path)
+        print(format_shard_plan(self.shard_manifest, self.shard_manifest_path))
+
+    def run_read_gvcfs_shards(self):
+        """
+        Run the pending shards as separate processes on this machine.
+        """
+        workers = self.args.shard_workers or len(self.shard_manifest["shards"])
+        conf = resolve_profile_conf(self.args.spark_profile, parse_spark_conf_overrides(self.args.spark_conf))[1]
+        with self.metrics.phase("shards"):
+            run_shards(
+                self.shard_manifest_path,
+                self.shard_manifest,
+                workers=workers,
+                spark_args=shard_spark_args(self.args.spark_profile, self.args.spark_conf, conf, workers)
+            )
+
+    def load_read_gvcfs_shard(self):
+        """
+        Take the inputs, reference genome, intervals and combiner parameters of one
+        shard from its manifest instead of discovering and scanning the GVCFs again.
+        """
+        if not self.args.shard:
+            raise ValueError("--shard_manifest needs --shard NAME.")
+        manifest = load_shard_manifest(self.args.shard_manifest)
+        shard = get_shard(manifest, self.args.shard)
+        self.gvcf_paths = [g["path"] for g in manifest["gvcfs"]]
+        self.prescan = {
+            "reference_genome": manifest["reference_genome"],
+            "contig_recoding": manifest["contig_recoding"],
+            "samples": {g["path"]: g["sample"] for g in manifest["gvcfs"] if g["sample"]},
+            "total_bytes": manifest["total_bytes"],
+        }
+        self.intervals = shard["intervals"]
+        self.plan = {"import_interval_size": None, **manifest["combiner"]}
+        print(
+            f"[INFO] Shard {shard['name']}: {len(self.gvcf_paths)} GVCF(s), "
+            f"{len(self.intervals)} interval(s), {shard['bp']:,} bp"
+        )
 
     def handle_read_gvcfs_command(self):
         """
         Combine GVCFs (and optional existing VDS) into a new/updated VDS.
         """
-        contig_map = {
-            "chr1": "1", "chr2": "2", "chr3": "3", "chr4": "4", "chr5": "5", "chr6": "6", "chr7": "7", "chr8": "8",
-            "chr9": "9", "chr10": "10",
-            "chr11": "11", "chr12": "12", "chr13": "13", "chr14": "14", "chr15": "15", "chr16": "16", "chr17": "17",
-            "chr18": "18", "chr19": "19",
-            "chr20": "20", "chr21": "21", "chr22": "22", "chrX": "X", "chrY": "Y", "chrM": "MT"
-        }
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.gvcf.process import build_or_combine_vds
 
-        gvcf_paths = gather_gvcfs([Path(p) for p in self.args.file])
-
-        build_or_combine_vds(
-            gvcf_paths=gvcf_paths,
-            existing_vds=self.args.vds_in,
-            output_path=self.args.dest,
-            temp_path=self.args.temp,
-            save_path=self.args.save_plan,
-            use_genome=self.args.use_genome_intervals,
-            use_exome=self.args.use_exome_intervals,
-            intervals = self.args.intervals,
-            import_interval_size = self.args.import_interval_size,
-            reference_genome = "GRCh37",
-            contig_recoding = contig_map
-        )
+        if not hasattr(self, "prescan"):
+            self.prescan_read_gvcfs()
+        if not hasattr(self, "plan"):
+            self.plan_read_gvcfs()
+        if self.args.plan_only:
+            return
+        if self.args.shards:
+            self.handle_read_gvcfs_shards()
+            return
+
+        with self.metrics.phase("combine"):
+            combined = build_or_combine_vds(
+                gvcf_paths=self.gvcf_paths,
+                existing_vds=self.args.vds_in,
+                output_path=self.args.dest,
+                temp_path=self.args.temp,
+                save_path=self.args.save_plan,
+                intervals = self.intervals,
+                import_interval_size = self.plan["import_interval_size"],
+                reference_genome = self.prescan["reference_genome"],
+                contig_recoding = self.prescan["contig_recoding"],
+                skip_ingested=not self.args.reimport,
+                known_samples=self.prescan["samples"],
+                gvcf_batch_size=self.plan["gvcf_batch_size"],
+                branch_factor=self.plan["branch_factor"],
+                target_records=self.plan["target_records"],
+                restart=self.args.restart
+            )
+
+        if combined:
+            self.metrics.record_output(self.args.dest, kind="vds")
+            hl.utils.info(f"[DONE] Created or updated VDS at {self.args.dest}")
+        else:
+            hl.utils.info(f"[DONE] No new samples; {self.args.vds_in} is up to date")
+
+    def handle_read_gvcfs_shards(self):
+        """
+        Run any shards not yet complete, then concatenate the shard VDSs into --dest.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.concat import concat_vds
 
-        hl.utils.info(f"[DONE] Created or updated VDS at {self.args.dest}")
+        if not hasattr(self, "shard_manifest"):
+            self.plan_read_gvcfs_shards()
+            self.run_read_gvcfs_shards()
+        shards = self.shard_manifest["shards"]
+        with self.metrics.phase("concat"):
+            concat_vds([shard["dest"] for shard in shards], self.args.dest)
+        self.metrics.record_output(self.args.dest, kind="vds")
+        hl.utils.info(f"[DONE] Concatenated {len(shards)} shard(s) into {self.args.dest}")
 
     def handle_filter_samples_command(self):
         """
         Filter samples from a VDS.
         """
-        vds = hl.vds.read_vds(self.args.vds)
-        with open(self.args.samples) as f:
-            sample_list = [line.strip() for line in f]
-        new_vds = hl.vds.filter_samples(vds, sample_list, keep=self.args.keep)
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import filter_samples
+
         out = self.args.out if self.args.out else self.args.vds
-        new_vds.write(out, overwrite=True)
+        self.metrics.record_input(self.args.vds)
+        filter_samples(
+            vds_path=self.args.vds,
+            sample_file=self.args.samples,
+            keep=self.args.keep,
+            out_path=out,
+            where=self.args.where,
+            metadata=self.args.metadata,
+            recompute_qc=self.args.recompute_qc,
+            cache=self.result_cache(),
+            metrics=self.metrics
+        )
+        self.metrics.record_output(out, kind="vds")
 
         hl.utils.info(f"[DONE] Filtered samples -> {out}")
 
+    def handle_split_cohorts_command(self):
+        """
+        Write one VDS per cohort from a single read of the input VDS.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.cohorts import split_cohorts
+
+        if not hasattr(self, "cohort_plan"):
+            self.plan_split_cohorts()
+        plan = self.cohort_plan
+        self.metrics.record_input(self.args.vds)
+        written = split_cohorts(self.args.vds, plan, metrics=self.metrics)
+        for cohort in written:
+            self.metrics.record_output(plan[cohort]["output"], kind="vds")
+        hl.utils.info(f"[DONE] Wrote {len(written)} cohort VDS(s) from {self.args.vds}")
+
     def handle_filter_intervals_command(self):
         """
         Keep or remove intervals from a VDS.
         """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import filter_intervals
+
         out = self.args.out if self.args.out else self.args.vds
+        reference_genome = self.vds_reference_genome()
+        intervals = self.resolve_intervals(reference_genome)
+
+        self.metrics.record_input(self.args.vds)
         filter_intervals(
             vds_path=self.args.vds,
-            intervals=self.args.intervals,
+            intervals=intervals,
             keep=self.args.keep,
-            out_path=out
+            out_path=out,
+            cache=self.result_cache(),
+            metrics=self.metrics
         )
+        self.metrics.record_output(out, kind="vds")
         hl.utils.info(f"[DONE] Filtered intervals -> {out}")
 
     def handle_sample_qc_command(self):
         """
         Compute sample QC metrics on a VDS.
         """
-        result_table = run_sample_qc(self.args.vds)
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import run_sample_qc, write_table
+
+        self.metrics.record_input(self.args.vds)
+        result_table = run_sample_qc(self.args.vds, recompute=self.args.recompute, metrics=self.metrics)
         if self.args.out:
-            result_table.export(self.args.out)
+            with self.metrics.phase("write"):
+                write_table(result_table, self.args.out)
+            self.metrics.record_output(self.args.out)
             hl.utils.info(f"[DONE] Sample QC results exported to {self.args.out}")
         else:
             hl.utils.info("[INFO] Sample QC results (first few rows):")
             result_table.show(5)
 
+    def handle_coverage_command(self):
+        """
+        Per-gene, per-sample depth and GQ coverage from the sparse VDS.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import gene_coverage, write_table
+
+        reference_genome = self.vds_reference_genome()
+        targets = {
+            gene: [format_interval(*locus) for locus in loci]
+            for gene, loci in self.resolve_gene_loci(reference_genome).items()
+        }
+        # Raw intervals are reported under their own string.
+        for interval in self.args.intervals or []:
+            targets.setdefault(interval, []).append(interval)
+
+        self.metrics.record_input(self.args.vds)
+        per_sample, summary = gene_coverage(
+            vds_path=self.args.vds,
+            targets=targets,
+            dp_thresholds=self.args.dp_thresholds,
+            gq_thresholds=self.args.gq_thresholds,
+            metrics=self.metrics
+        )
+        with self.metrics.phase("write"):
+            write_table(per_sample, self.args.out)
+            if self.args.summary_out:
+                write_table(summary, self.args.summary_out)
+        self.metrics.record_output(self.args.out)
+        hl.utils.info(f"[DONE] Coverage of {len(targets)} target(s) -> {self.args.out}")
+
+    def handle_variant_qc_command(self):
+        """
+        Site-level QC and allele frequencies from the sparse VDS.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import run_variant_qc
+
+        intervals = None
+        if self.args.intervals or self.args.gene_set or self.args.gene_list:
+            reference_genome = self.vds_reference_genome()
+            intervals = self.resolve_intervals(reference_genome)
+
+        self.metrics.record_input(self.args.vds)
+        run_variant_qc(
+            vds_path=self.args.vds,
+            out_path=self.args.out,
+            vcf_path=self.args.vcf_out,
+            intervals=intervals,
+            metrics=self.metrics
+        )
+        self.metrics.record_output(self.args.out, kind="ht")
+        if self.args.vcf_out:
+            self.metrics.record_output(self.args.vcf_out)
+        hl.utils.info(f"[DONE] Variant QC -> {self.args.out}" + (f", {self.args.vcf_out}" if self.args.vcf_out else ""))
+
+    def handle_burden_command(self):
+        """
+        Per-gene, per-sample counts of qualifying rare variants for a gene set.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import run_burden
+
+        reference_genome = self.vds_reference_genome()
+        gene_loci = self.resolve_gene_loci(reference_genome)
+
+        self.metrics.record_input(self.args.vds)
+        run_burden(
+            vds_path=self.args.vds,
+            gene_loci=gene_loci,
+            out_path=self.args.out,
+            max_af=self.args.max_af,
+            min_gq=self.args.min_gq,
+            min_dp=self.args.min_dp,
+            af_table_path=self.args.af_table,
+            cache_dir=self.args.cache_dir,
+            metrics=self.metrics
+        )
+        self.metrics.record_output(self.args.out)
+        hl.utils.info(f"[DONE] Burden counts for {len(gene_loci)} gene(s) -> {self.args.out}")
+
     def handle_split_multi_command(self):
         """
         Split multi-allelic variants in the variant data.
         """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import split_multi
+
+        self.metrics.record_input(self.args.vds)
         split_multi(
             vds_path=self.args.vds,
             out_path=self.args.out,
-            filter_changed_loci=self.args.filter_changed_loci
+            filter_changed_loci=self.args.filter_changed_loci,
+            cache=self.result_cache(),
+            metrics=self.metrics
         )
+        self.metrics.record_output(self.args.out, kind="vds")
         hl.utils.info(f"[DONE] Split multi -> {self.args.out}")
 
+    def handle_compact_command(self):
+        """
+        Rebalance the partitions of a VDS and bound its reference block length.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.compact import compact_vds, format_partition_stats
+
+        self.metrics.record_input(self.args.vds)
+        before, after = compact_vds(
+            vds_path=self.args.vds,
+            out_path=self.args.out,
+            n_partitions=self.args.n_partitions,
+            partition_mb=self.args.partition_mb,
+            max_ref_block=self.args.max_ref_block,
+            metrics=self.metrics
+        )
+        print(format_partition_stats(before, after))
+        for component in after:
+            self.metrics.count(f"{component}_partitions_before", before[component]["n_partitions"])
+            self.metrics.count(f"{component}_partitions_after", after[component]["n_partitions"])
+        self.metrics.record_output(self.args.out, kind="vds")
+        hl.utils.info(f"[DONE] Compacted VDS -> {self.args.out}")
+
     def handle_to_dense_mt_command(self):
         """
         Convert a VDS to a dense MatrixTable.
         """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.operations import to_dense_mt
+
+        intervals = None
+        if self.args.intervals or self.args.gene_set or self.args.gene_list:
+            reference_genome = self.vds_reference_genome()
+            intervals = self.resolve_intervals(reference_genome)
+
+        self.metrics.record_input(self.args.vds)
         to_dense_mt(
             vds_path=self.args.vds,
-            out_path=self.args.out
+            out_path=self.args.out,
+            intervals=intervals,
+            samples=self.args.samples,
+            fmt=self.args.format,
+            shard_by=self.args.shard_by,
+            metrics=self.metrics
+        )
+        self.metrics.record_output(self.args.out, kind="mt" if self.args.format == "mt" else None)
+        hl.utils.info(f"[DONE] Wrote dense {self.args.format} to {self.args.out}")
+
+    def handle_pipeline_command(self):
+        """
+        Run a chain of VDS operations from a step file in one session.
+        """
+        import hail as hl
+        from gvcf_to_vds_pipeline.data_processing.vds.pipeline import load_pipeline_spec, run_pipeline
+
+        spec = load_pipeline_spec(self.args.steps)
+        if self.args.vds:
+            spec["input"] = self.args.vds
+        self.metrics.record_input(spec["input"])
+        written = run_pipeline(spec, metrics=self.metrics, cache=self.result_cache())
+        for path in written:
+            self.metrics.record_output(path)
+        hl.utils.info(f"[DONE] Pipeline wrote: {', '.join(written)}")
+
+    def handle_cache_command(self):
+        """
+        List, prune or clear a result cache. Runs without Spark.
+        """
+        cache = ResultCache(self.args.result_cache)
+        if self.args.action == "list":
+            print(format_cache_entries(cache.entries()))
+        elif self.args.action == "prune":
+            evicted = cache.evict(max_bytes=int(self.args.max_gb * 1024 ** 3))
+            print(f"[DONE] Evicted {len(evicted)} entr{'y' if len(evicted) == 1 else 'ies'} "
+                  f"({format_bytes(sum(e['bytes'] for e in evicted))})")
+        else:
+            cache.clear()
+            print(f"[DONE] Cleared {self.args.result_cache}")
+
+    def handle_benchmark_command(self):
+        """
+        Time CLI commands on synthetic cohorts, or compare two labelled result sets.
+        """
+        if self.args.compare:
+            print(compare_results(load_results(self.args.results), *self.args.compare))
+            return
+
+        spark_args = ["--spark_profile", self.args.spark_profile]
+        for pair in self.args.spark_conf:
+            spark_args += ["--spark_conf", pair]
+        records = run_benchmarks(
+            scales=self.args.scales,
+            commands=self.args.commands,
+            work_dir=self.args.work_dir,
+            results_path=self.args.results,
+            label=self.args.label,
+            reference_genome=self.args.reference_genome,
+            chr_prefix=None if self.args.contig_style is None else self.args.contig_style == "chr",
+            repeat=self.args.repeat,
+            spark_args=spark_args
         )
-        hl.utils.info(f"[DONE] Wrote dense MT to {self.args.out}")
+        failed = sum(r["status"] != "done" for r in records)
+        print(f"[DONE] {len(records)} benchmark run(s), {failed} failed; results appended to {self.args.results}")
@@ -2,34 +2,49 @@ import argparse
 import json
 from pathlib import Path
 
-import hail as hl
-from pyspark import SparkContext, SparkConf
-
 from gvcf_to_vds_pipeline.cli.command_factory import CommandFactory
-from gvcf_to_vds_pipeline.cli.command_methods import CommandHandler
+from gvcf_to_vds_pipeline.utils.metrics import timed
+from gvcf_to_vds_pipeline.utils.spark_profiles import parse_spark_conf_overrides, resolve_profile_conf
 
 
 def setup_parser():
     parser = argparse.ArgumentParser(
         description="CLI tool for combining GVCFs into a Hail VDS and performing common VDS operations."
     )
+    parser.add_argument(
+        "--server", type=str, default=None,
+        help="Submit the command to a running 'serve' session at this socket instead of starting Spark."
+    )
 
     cf = CommandFactory(parser=parser)
     cf.create_read_gvcfs_command()
     cf.create_filter_samples_command()
+    cf.create_split_cohorts_command()
     cf.create_filter_intervals_command()
     cf.create_sample_qc_command()
+    cf.create_variant_qc_command()
+    cf.create_coverage_command()
+    cf.create_burden_command()
     cf.create_split_multi_command()
+    cf.create_compact_command()
     cf.create_to_dense_mt_command()
+    cf.create_pipeline_command()
+    cf.create_serve_command()
+    cf.create_benchmark_command()
+    cf.create_cache_command()
 
     return parser
 
 
 def setup_spark_config(args):
     """
-    Loads spark_conf.json and sets all SparkConf accordingly.
+    Loads spark_conf.json, applies the machine-sized profile and any --spark_conf
+    overrides, and sets all SparkConf accordingly.
     The config file can have placeholders for hail_home if needed.
     """
+    import hail as hl
+    from pyspark import SparkConf
+
     config_path = Path(__file__).parent / "../config/spark_config.json"
     with config_path.open() as f:
         conf_data = json.load(f)
@@ -40,52 +55,111 @@ def setup_spark_config(args):
         if isinstance(v, str):
             conf_data[k] = v.format(hail_home=str(hail_home))
 
+    profile, profile_conf = resolve_profile_conf(
+        getattr(args, "spark_profile", "auto"),
+        parse_spark_conf_overrides(getattr(args, "spark_conf", None))
+    )
+    conf_data.update(profile_conf)
+
+    print(f"[INFO] Spark profile '{profile}':")
+    for k in sorted(conf_data):
+        print(f"[INFO]   {k}={conf_data[k]}")
+
     conf = SparkConf().setAll(conf_data.items())
     return conf
 
 
-def command_handlers(args, conf):
+# CLI command name -> CommandHandler method that runs it.
+COMMAND_METHODS = {
+    "readgvcfs": "handle_read_gvcfs_command",
+    "filter_samples": "handle_filter_samples_command",
+    "split_cohorts": "handle_split_cohorts_command",
+    "filter_intervals": "handle_filter_intervals_command",
+    "sample_qc": "handle_sample_qc_command",
+    "variant_qc": "handle_variant_qc_command",
+    "coverage": "handle_coverage_command",
+    "burden": "handle_burden_command",
+    "split_multi": "handle_split_multi_command",
+    "compact": "handle_compact_command",
+    "to_dense_mt": "handle_to_dense_mt_command",
+    "pipeline": "handle_pipeline_command",
+}
+
+# Commands with their own handlers rather than run_command.
+OTHER_COMMANDS = ("serve", "benchmark", "cache")
+
+
+def command_handlers(args):
     """
     Returns a dict mapping command -> function that runs the command logic.
+    Spark is only configured once a command needs it, and with --dry_run never.
     """
-    return {
-        "readgvcfs": lambda: init_spark_and_run(
-            args, conf, CommandHandler(args).handle_read_gvcfs_command
-        ),
-        "filter_samples": lambda: init_spark_and_run(
-            args, conf, CommandHandler(args).handle_filter_samples_command
-        ),
-        "filter_intervals": lambda: init_spark_and_run(
-            args, conf, CommandHandler(args).handle_filter_intervals_command
-        ),
-        "sample_qc": lambda: init_spark_and_run(
-            args, conf, CommandHandler(args).handle_sample_qc_command
-        ),
-        "split_multi": lambda: init_spark_and_run(
-            args, conf, CommandHandler(args).handle_split_multi_command
-        ),
-        "to_dense_mt": lambda: init_spark_and_run(
-            args, conf, CommandHandler(args).handle_to_dense_mt_command
-        ),
+    from gvcf_to_vds_pipeline.cli.command_methods import CommandHandler
+    from gvcf_to_vds_pipeline.cli.server import SessionServer
+
+    if getattr(args, "dry_run", False):
+        return {command: (lambda: CommandHandler(args).dry_run()) for command in [*COMMAND_METHODS, *OTHER_COMMANDS]}
+
+    handlers = {
+        command: (lambda method=method: run_command(args, method))
+        for command, method in COMMAND_METHODS.items()
     }
+    handlers["serve"] = lambda: init_spark_and_run(
+        args, setup_spark_config(args), SessionServer(args.socket, args.log_dir).serve_forever
+    )
+    # Runs every command in its own process; no Spark session here.
+    handlers["benchmark"] = lambda: CommandHandler(args).handle_benchmark_command()
+    handlers["cache"] = lambda: CommandHandler(args).handle_cache_command()
+    return handlers
 
 
-def init_spark_and_run(args, conf, func):
+def run_command(args, method):
     """
-    Initializes SparkContext with the config, then calls hail.init().
-    Finally, runs the given function (the CLI subcommand logic).
+    Runs the command's pre-flight checks, then configures and starts Spark/Hail and runs the command.
     """
-    sc = SparkContext(conf=conf)
-
-    hl.init(
-        sc=sc,
-        tmp_dir=args.temp if hasattr(args, "temp") else "/tmp",
-        local_tmpdir=args.temp if hasattr(args, "temp") else "/tmp",
-        # You can log to a file if you wish:
-        # log=hl.utils.timestamp_path(f"/tmp/hail_{args.command}", suffix=".log")
-    )
+    from gvcf_to_vds_pipeline.cli.command_methods import CommandHandler
 
-    func()
+    handler = CommandHandler(args)
+    try:
+        with handler.metrics.phase("preflight"):
+            done = handler.preflight()
+        if not done:
+            init_spark_and_run(args, setup_spark_config(args), getattr(handler, method), metrics=handler.metrics)
+    except BaseException:
+        handler.metrics.finish("failed")
+        raise
+    handler.metrics.finish("done")
 
-    # stop or keep hail environment for inspection
-    hl.stop()
+
+def init_spark_and_run(args, conf, func, metrics=None):
+    """
+    Initializes SparkContext with the config, then calls hail.init().
+    Finally, runs the given function (the CLI subcommand logic).
+    If metrics (a RunMetrics) is given, startup and the command are timed and
+    Spark stage metrics are collected before the session stops.
+    """
+    import hail as hl
+    from pyspark import SparkContext
+
+    with timed(metrics, "spark_init"):
+        sc = SparkContext(conf=conf)
+
+        hl.init(
+            sc=sc,
+            tmp_dir=args.temp if hasattr(args, "temp") else "/tmp",
+            local_tmpdir=args.temp if hasattr(args, "temp") else "/tmp",
+            # You can log to a file if you wish:
+            # log=hl.utils.timestamp_path(f"/tmp/hail_{args.command}", suffix=".log")
+        )
+    hl.utils.info("[INFO] Resolved Spark configuration: " + ", ".join(
+        f"{k}={v}" for k, v in sorted(sc.getConf().getAll())
+    ))
+
+    try:
+        with timed(metrics, "command"):
+            func()
+    finally:
+        if metrics is not None:
+            metrics.collect_spark_metrics(sc)
+        # stop or keep hail environment for inspection
+        hl.stop()
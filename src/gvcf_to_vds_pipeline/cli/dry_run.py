@@ -0,0 +1,120 @@
+"""Checks behind --dry_run. Nothing here imports Hail or starts Spark."""
+import gzip
+import json
+import os
+import re
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import is_remote, to_local_path
+from gvcf_to_vds_pipeline.utils.metrics import path_size
+from gvcf_to_vds_pipeline.utils.resources import format_bytes
+
+# Arguments naming inputs that must exist: "vds" inputs must hold both written
+# components, "path" inputs are files or table directories.
+INPUT_ARGS = {
+    "vds": "vds",
+    "vds_in": "vds",
+    "samples": "path",
+    "metadata": "path",
+    "cohort_map": "path",
+    "cohort_spec": "path",
+    "steps": "path",
+    "gene_list": "path",
+    "annotation": "path",
+    "file_list": "path",
+    "af_table": "path",
+    "shard_manifest": "path",
+}
+
+# Arguments naming paths a command writes.
+OUTPUT_ARGS = ("dest", "out", "out_dir", "vcf_out", "summary_out", "metrics_out")
+
+_LOCUS_TYPE_RE = re.compile(r"[Ll]ocus[<(]([^>)]+)[>)]")
+
+
+def check_inputs(args, sizes=True):
+    """
+    Check that every input named on the command line exists.
+
+    :param sizes: measure each local input (walks directories; skip when only existence matters)
+    :return: list of (argument, path, bytes); bytes is None for remote paths, which need Hail
+        to check, and when sizes is False
+    :raises ValueError: for a missing input or a VDS that was not completely written
+    """
+    found = []
+    for arg, kind in INPUT_ARGS.items():
+        path = getattr(args, arg, None)
+        if not path:
+            continue
+        if is_remote(path):
+            found.append((arg, path, None))
+            continue
+        local = to_local_path(path)
+        if not os.path.exists(local):
+            raise ValueError(f"--{arg}: {path} does not exist")
+        if kind == "vds":
+            for component in ("reference_data", "variant_data"):
+                if not os.path.exists(os.path.join(local, component, "_SUCCESS")):
+                    raise ValueError(f"--{arg}: {path} is not a completely written VDS (no {component}/_SUCCESS)")
+        found.append((arg, path, path_size(local) if sizes else None))
+    return found
+
+
+def check_outputs(args):
+    """
+    Check that every output can be written. A new local output needs a writable
+    directory to be created in; an existing one is reported, as the command replaces it.
+
+    :return: list of (argument, path, status)
+    :raises ValueError: if an output cannot be created
+    """
+    found = []
+    for arg in OUTPUT_ARGS:
+        path = getattr(args, arg, None)
+        if not path:
+            continue
+        if is_remote(path):
+            found.append((arg, path, "remote, checked at run time"))
+            continue
+        local = os.path.abspath(to_local_path(path))
+        if os.path.exists(local):
+            found.append((arg, path, "exists, will be replaced"))
+            continue
+        parent = os.path.dirname(local)
+        while not os.path.exists(parent):
+            parent = os.path.dirname(parent)
+        if not os.path.isdir(parent) or not os.access(parent, os.W_OK):
+            raise ValueError(f"--{arg}: cannot create {path}; {parent} is not a writable directory")
+        found.append((arg, path, "new"))
+    return found
+
+
+def vds_reference_genome_name(vds_path):
+    """
+    Reference genome of a local VDS, read from the row type in its metadata,
+    or None if it cannot be determined without Hail.
+    """
+    if is_remote(vds_path):
+        return None
+    metadata = os.path.join(to_local_path(vds_path), "reference_data", "metadata.json.gz")
+    try:
+        with gzip.open(metadata, "rt") as f:
+            match = _LOCUS_TYPE_RE.search(json.dumps(json.load(f)))
+    except (OSError, ValueError):
+        return None
+    return match.group(1) if match else None
+
+
+def format_dry_run(command, inputs, outputs, details=()):
+    """
+    Readable summary of a dry run: checked inputs with sizes, outputs, and command-specific lines.
+    """
+    lines = [f"Dry run of '{command}' (Spark not started):"]
+    for arg, path, size in inputs:
+        lines.append(
+            f"  input  --{arg:<15}{path}"
+            + (f" ({format_bytes(size)})" if size is not None else " (remote, checked at run time)")
+        )
+    for arg, path, status in outputs:
+        lines.append(f"  output --{arg:<15}{path} ({status})")
+    lines.extend(f"  {line}" for line in details)
+    return "\n".join(lines)
@@ -0,0 +1,235 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+DEFAULT_SOCKET = "/tmp/gvcf-to-vds.sock"
+DEFAULT_LOG_DIR = "/tmp/gvcf-to-vds-jobs"
+
+# Arguments holding local paths, made absolute against the submitting client's cwd.
+PATH_ARGS = (
+    "vds", "vds_in", "file", "file_list", "dest", "temp", "save_plan", "shard_dir", "shard_manifest",
+    "header_cache", "samples", "metadata", "cohort_map", "cohort_spec", "out", "out_dir", "vcf_out",
+    "summary_out", "steps", "gene_list", "annotation", "af_table", "cache_dir", "result_cache", "metrics_out",
+)
+
+
+def _absolute(path, cwd):
+    if "://" in path or os.path.isabs(path):
+        return path
+    return os.path.normpath(os.path.join(cwd, path))
+
+
+def absolutize_paths(args, cwd):
+    """
+    Resolve relative path arguments against cwd, so a job reads and writes what the
+    same command would when run from the client's working directory.
+    """
+    for name in PATH_ARGS:
+        value = getattr(args, name, None)
+        if isinstance(value, list):
+            setattr(args, name, [_absolute(v, cwd) for v in value])
+        elif isinstance(value, str) and value:
+            setattr(args, name, _absolute(value, cwd))
+
+
+class _ThreadOutput:
+    """
+    Stand-in for sys.stdout/sys.stderr that sends writes from a thread running a job
+    to that job's log, and everything else to the original stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.targets = {}
+
+    def _target(self):
+        return self.targets.get(threading.get_ident(), self.stream)
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Job:
+    """
+    A single CLI command submitted to the session server.
+    """
+
+    def __init__(self, job_id, argv, log_path, cwd=None):
+        self.job_id = job_id
+        self.argv = argv
+        self.cwd = cwd
+        self.log_path = log_path
+        self.status = "queued"
+        self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "argv": self.argv,
+            "log": str(self.log_path),
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class SessionServer:
+    """
+    Keeps one Hail session warm and runs CommandHandler commands sent by the CLI.
+
+    Jobs are queued and executed one at a time on a single worker thread, since a
+    Hail session is not safe to drive from several threads. Each job writes its
+    stdout/stderr and pipeline log messages to its own file in log_dir.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, log_dir=DEFAULT_LOG_DIR):
+        self.socket_path = os.path.abspath(socket_path)
+        self.log_dir = Path(log_dir).resolve()
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        """
+        Accept submissions on the local socket until interrupted.
+        Runs inside an initialized Hail session (see init_spark_and_run).
+        """
+        import hail as hl
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout, sys.stderr = _ThreadOutput(sys.stdout), _ThreadOutput(sys.stderr)
+
+        worker = threading.Thread(target=self._worker, daemon=True)
+        worker.start()
+
+        listener = Listener(self.socket_path, family="AF_UNIX")
+        os.chmod(self.socket_path, 0o600)
+        hl.utils.info(f"[INFO] Hail session server listening on {self.socket_path}")
+        print(f"[INFO] Listening on {self.socket_path}, job logs in {self.log_dir}")
+        try:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            print("[INFO] Shutting down session server.")
+        finally:
+            listener.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def submit(self, argv, cwd=None):
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+        log_path = self.log_dir / f"job_{job_id:05d}_{time.strftime('%Y%m%d-%H%M%S')}.log"
+        job = Job(job_id, argv, log_path, cwd)
+        self.jobs[job_id] = job
+        self.queue.put(job)
+        return job
+
+    def _serve_connection(self, conn):
+        with conn:
+            request = conn.recv()
+            if request.get("op") == "status":
+                conn.send({"jobs": [job.to_dict() for job in self.jobs.values()]})
+                return
+
+            job = self.submit(request["argv"], request.get("cwd"))
+            conn.send(job.to_dict())
+            job.done.wait()
+            conn.send(job.to_dict())
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            job.status = "running"
+            try:
+                self._run_job(job)
+                job.status = "done"
+            except BaseException as e:  # keep the session alive whatever the job does
+                job.status = "failed"
+                job.error = str(e) or e.__class__.__name__
+            finally:
+                job.done.set()
+                self.queue.task_done()
+
+    def _run_job(self, job):
+        import hail as hl
+
+        from gvcf_to_vds_pipeline.cli.command_methods import CommandHandler
+        from gvcf_to_vds_pipeline.cli.command_setup import COMMAND_METHODS, setup_parser
+        from gvcf_to_vds_pipeline.utils.metrics import last_stage_id
+
+        logger = logging.getLogger("hail_vds_pipeline")
+        thread = threading.get_ident()
+        with open(job.log_path, "w") as log_file:
+            log_handler = logging.StreamHandler(log_file)
+            log_handler.setFormatter(logging.Formatter(
+                "[%(asctime)s] [%(levelname)s] %(name)s - %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S"
+            ))
+            log_handler.addFilter(lambda record: record.thread == thread)
+            logger.addHandler(log_handler)
+            outputs = [s for s in (sys.stdout, sys.stderr) if isinstance(s, _ThreadOutput)]
+            for output in outputs:
+                output.targets[thread] = log_file
+            try:
+                print(f"[INFO] Job {job.job_id}: {' '.join(job.argv)}")
+                args = setup_parser().parse_args(job.argv)
+                if job.cwd:
+                    absolutize_paths(args, job.cwd)
+                if args.command not in COMMAND_METHODS:
+                    raise ValueError(f"Command '{args.command}' cannot run inside a session server.")
+                start = time.time()
+                handler = CommandHandler(args)
+                # The session is shared; only stages submitted after this point belong to the job.
+                first_stage = last_stage_id(hl.spark_context()) if handler.metrics.enabled else None
+                try:
+                    with handler.metrics.phase("preflight"):
+                        done = handler.preflight()
+                    if not done:
+                        with handler.metrics.phase("command"):
+                            getattr(handler, COMMAND_METHODS[args.command])()
+                except BaseException:
+                    traceback.print_exc()
+                    handler.metrics.finish("failed")
+                    raise
+                handler.metrics.collect_spark_metrics(hl.spark_context(), after_stage=first_stage)
+                handler.metrics.finish("done")
+                print(f"[DONE] Job {job.job_id} finished in {time.time() - start:.1f}s")
+            finally:
+                for output in outputs:
+                    output.targets.pop(thread, None)
+                logger.removeHandler(log_handler)
+
+
+def submit_to_server(socket_path, argv):
+    """
+    Send a command to a running session server and block until it finishes.
+    Returns the final job record as a dict.
+    """
+    if not os.path.exists(socket_path):
+        raise FileNotFoundError(f"No session server socket at {socket_path}. Start one with 'gvcf-to-vds serve'.")
+
+    with Client(socket_path, family="AF_UNIX") as conn:
+        conn.send({"argv": argv, "cwd": os.getcwd()})
+        job = conn.recv()
+        print(f"[INFO] Submitted job {job['job_id']} (log: {job['log']})")
+        return conn.recv()
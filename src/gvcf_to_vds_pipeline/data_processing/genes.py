@@ -0,0 +1,199 @@
+"""Gene symbol -> genomic interval resolution from a local GTF or BED annotation."""
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.contigs import PRIMARY_CONTIG_LENGTHS, to_reference_contig
+
+INDEX_SUFFIX = ".geneidx.json"
+INDEX_VERSION = 1
+FALLBACK_INDEX_DIR = Path.home() / ".cache" / "gvcf-to-vds" / "gene_index"
+DEFAULT_GENE_PADDING = 0
+
+GTF_ATTRIBUTE = re.compile(r'(\S+) "([^"]*)"')
+
+
+def _open_text(path):
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rt") if compressed else open(path)
+
+
+def _parse_gtf(path):
+    """
+    Yield (name, contig, start, end) for each 'gene' record; 1-based, inclusive.
+    Genes are indexed by gene_name and by gene_id without its version suffix.
+    """
+    with _open_text(path) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 9 or fields[2] != "gene":
+                continue
+            attrs = dict(GTF_ATTRIBUTE.findall(fields[8]))
+            start, end = int(fields[3]), int(fields[4])
+            for key in ("gene_name", "gene_id"):
+                if key in attrs:
+                    yield attrs[key].split(".")[0] if key == "gene_id" else attrs[key], fields[0], start, end
+
+
+def _parse_bed(path):
+    """
+    Yield (name, contig, start, end) for each BED record with a name column; 1-based, inclusive.
+    """
+    with _open_text(path) as f:
+        for line in f:
+            if line.startswith(("#", "track", "browser")) or not line.strip():
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 4:
+                raise ValueError(f"{path}: BED records need a 4th (name) column to resolve genes")
+            yield fields[3], fields[0], int(fields[1]) + 1, int(fields[2])
+
+
+class GeneIndex:
+    """
+    Gene loci from an annotation, kept sorted by (contig, start) as parallel lists.
+    Saved as a small JSON file so large GTFs are parsed once.
+    """
+
+    def __init__(self, contigs, names, contig_ids, starts, ends):
+        self.contigs = contigs
+        self.names = names
+        self.contig_ids = contig_ids
+        self.starts = starts
+        self.ends = ends
+        self._by_name = {}
+        for i, name in enumerate(names):
+            self._by_name.setdefault(name, []).append(i)
+
+    @classmethod
+    def from_annotation(cls, path):
+        suffixes = Path(path).suffixes
+        parser = _parse_bed if ".bed" in suffixes else _parse_gtf
+        contig_order = {}
+        records = set()
+        for name, contig, start, end in parser(path):
+            records.add((contig_order.setdefault(contig, len(contig_order)), start, end, name))
+        records = sorted(records)
+        return cls(
+            contigs=list(contig_order),
+            names=[r[3] for r in records],
+            contig_ids=[r[0] for r in records],
+            starts=[r[1] for r in records],
+            ends=[r[2] for r in records],
+        )
+
+    def lookup(self, name):
+        """
+        All loci of a gene as (contig, start, end), in annotation naming; [] if unknown.
+        """
+        return [(self.contigs[self.contig_ids[i]], self.starts[i], self.ends[i]) for i in self._by_name.get(name, [])]
+
+    def __len__(self):
+        return len(self.names)
+
+    def to_dict(self):
+        return {
+            "contigs": self.contigs, "names": self.names, "contig_ids": self.contig_ids,
+            "starts": self.starts, "ends": self.ends,
+        }
+
+
+def _index_path(annotation_path):
+    """
+    Index file next to the annotation, or in the user cache if that directory is not writable.
+    """
+    annotation_path = os.path.abspath(annotation_path)
+    if os.access(os.path.dirname(annotation_path), os.W_OK):
+        return Path(annotation_path + INDEX_SUFFIX)
+    digest = hashlib.sha1(annotation_path.encode()).hexdigest()[:12]
+    return FALLBACK_INDEX_DIR / f"{os.path.basename(annotation_path)}.{digest}{INDEX_SUFFIX}"
+
+
+def load_gene_index(annotation_path):
+    """
+    Load the gene index of a GTF/BED annotation, building and caching it on first use.
+    The cache is rebuilt when the annotation's size or mtime changes.
+    """
+    st = os.stat(annotation_path)
+    signature = {"version": INDEX_VERSION, "size": st.st_size, "mtime": int(st.st_mtime)}
+    index_path = _index_path(annotation_path)
+
+    if index_path.exists():
+        try:
+            with index_path.open() as f:
+                data = json.load(f)
+            if data.get("signature") == signature:
+                return GeneIndex(**data["index"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # unreadable or stale cache: rebuild below
+
+    print(f"[INFO] Building gene index from {annotation_path} (cached at {index_path})")
+    index = GeneIndex.from_annotation(annotation_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with tmp_path.open("w") as f:
+        json.dump({"signature": signature, "index": index.to_dict()}, f, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+    return index
+
+
+def read_gene_list(path):
+    """
+    Read gene symbols, one per line; blank lines and '#' comments are skipped.
+    """
+    with open(path) as f:
+        return [line.split("#")[0].strip() for line in f if line.split("#")[0].strip()]
+
+
+def gene_intervals(genes, index, reference_genome, padding=DEFAULT_GENE_PADDING):
+    """
+    Resolve genes to padded loci on the primary contigs of reference_genome.
+
+    :param genes: gene symbols (or Ensembl gene IDs)
+    :param index: GeneIndex
+    :param padding: bases added on both sides of each gene, clipped to the contig
+    :return: ({gene: [(contig, start, end), ...]}, [genes not found]); 1-based, inclusive,
+        contigs in the reference's naming
+    """
+    lengths = PRIMARY_CONTIG_LENGTHS[reference_genome]
+    resolved = {}
+    missing = []
+    for gene in dict.fromkeys(genes):
+        loci = []
+        for contig, start, end in index.lookup(gene):
+            contig = to_reference_contig(contig, reference_genome)
+            if contig not in lengths:
+                continue  # alt haplotypes, patches and other non-primary contigs
+            loci.append((contig, max(1, start - padding), min(lengths[contig], end + padding)))
+        if loci:
+            resolved[gene] = loci
+        else:
+            missing.append(gene)
+    return resolved, missing
+
+
+def merge_intervals(loci, reference_genome):
+    """
+    Sort (contig, start, end) loci in reference order and merge overlapping or adjacent ones.
+    """
+    order = {contig: i for i, contig in enumerate(PRIMARY_CONTIG_LENGTHS[reference_genome])}
+    merged = []
+    for contig, start, end in sorted(loci, key=lambda l: (order[l[0]], l[1], l[2])):
+        if merged and merged[-1][0] == contig and start <= merged[-1][2] + 1:
+            merged[-1][2] = max(merged[-1][2], end)
+        else:
+            merged.append([contig, start, end])
+    return [tuple(m) for m in merged]
+
+
+def format_interval(contig, start, end):
+    """
+    Interval string parseable by hl.parse_locus_interval, inclusive at both ends.
+    """
+    return f"[{contig}:{start}-{end}]"
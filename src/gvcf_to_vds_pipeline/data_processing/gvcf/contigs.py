@@ -0,0 +1,44 @@
+"""Primary contig names/lengths and contig recodings for the supported reference genomes."""
+
+GRCH37_CONTIG_RECODING = {
+    "chr1": "1", "chr2": "2", "chr3": "3", "chr4": "4", "chr5": "5", "chr6": "6", "chr7": "7", "chr8": "8", "chr9": "9", "chr10": "10",
+    "chr11": "11", "chr12": "12", "chr13": "13", "chr14": "14", "chr15": "15", "chr16": "16", "chr17": "17", "chr18": "18", "chr19": "19",
+    "chr20": "20", "chr21": "21", "chr22": "22", "chrX": "X", "chrY": "Y", "chrM": "MT"
+}
+
+GRCH38_CONTIG_RECODING = {v: k for k, v in GRCH37_CONTIG_RECODING.items()}
+
+# Primary contig lengths, keyed by each reference's own contig names.
+PRIMARY_CONTIG_LENGTHS = {
+    "GRCh37": {
+        "1": 249250621, "2": 243199373, "3": 198022430, "4": 191154276, "5": 180915260, "6": 171115067,
+        "7": 159138663, "8": 146364022, "9": 141213431, "10": 135534747, "11": 135006516, "12": 133851895,
+        "13": 115169878, "14": 107349540, "15": 102531392, "16": 90354753, "17": 81195210, "18": 78077248,
+        "19": 59128983, "20": 63025520, "21": 48129895, "22": 51304566, "X": 155270560, "Y": 59373566,
+        "MT": 16569
+    },
+    "GRCh38": {
+        "chr1": 248956422, "chr2": 242193529, "chr3": 198295559, "chr4": 190214555, "chr5": 181538259,
+        "chr6": 170805979, "chr7": 159345973, "chr8": 145138636, "chr9": 138394717, "chr10": 133797422,
+        "chr11": 135086622, "chr12": 133275309, "chr13": 114364328, "chr14": 107043718, "chr15": 101991189,
+        "chr16": 90338345, "chr17": 83257441, "chr18": 80373285, "chr19": 58617616, "chr20": 64444167,
+        "chr21": 46709983, "chr22": 50818468, "chrX": 156040895, "chrY": 57227415, "chrM": 16569
+    },
+}
+
+# Mitochondrial contig names; its length differs between builds of the same reference
+# (16571 bp in UCSC hg19, 16569 bp rCRS elsewhere), so it does not identify the genome.
+MITOCHONDRIAL_CONTIGS = ("MT", "chrM")
+
+# Recoding from GVCF contig names to each reference's names.
+CONTIG_RECODINGS = {
+    "GRCh37": GRCH37_CONTIG_RECODING,
+    "GRCh38": GRCH38_CONTIG_RECODING,
+}
+
+
+def to_reference_contig(contig, reference_genome):
+    """
+    Translate a contig name (chr-prefixed or not) to the naming used by reference_genome.
+    """
+    return CONTIG_RECODINGS[reference_genome].get(contig, contig)
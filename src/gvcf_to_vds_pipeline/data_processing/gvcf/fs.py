@@ -0,0 +1,73 @@
+"""File access that works on local paths and on URIs readable through Hail's Hadoop FS layer."""
+import os
+import shutil
+from urllib.parse import urlparse
+
+LOCAL_SCHEMES = ("", "file")
+
+
+def is_remote(path):
+    """
+    True for URIs (hdfs://, s3a://, gs://, ...) that must be read through Hail's FS layer.
+    """
+    return urlparse(str(path)).scheme not in LOCAL_SCHEMES
+
+
+def to_local_path(path):
+    """
+    Strip a file:// scheme so the path can be used with the os module.
+    """
+    path = str(path)
+    parsed = urlparse(path)
+    return parsed.path if parsed.scheme == "file" else path
+
+
+def open_binary(path, mode="rb"):
+    """
+    Open a file for raw binary reading. Remote files go through Hail's FS without
+    the Hadoop codec, so compressed data is returned as stored on disk.
+    """
+    if is_remote(path):
+        import hail as hl
+        return hl.current_backend().fs.open(path, mode)
+    return open(to_local_path(path), mode)
+
+
+def file_signature(path):
+    """
+    Return (size, mtime) used to detect whether a GVCF changed since it was last seen.
+    """
+    if is_remote(path):
+        import hail as hl
+        st = hl.hadoop_stat(path)
+        return st["size_bytes"], st["modification_time"]
+    st = os.stat(to_local_path(path))
+    return st.st_size, int(st.st_mtime)
+
+
+def exists(path):
+    if is_remote(path):
+        import hail as hl
+        return hl.hadoop_exists(path)
+    return os.path.exists(to_local_path(path))
+
+
+def remove_tree(path):
+    """
+    Delete a file or directory tree, locally or through Hail's FS. Missing paths are ignored.
+    """
+    if is_remote(path):
+        import hail as hl
+        fs = hl.current_backend().fs
+        if not fs.exists(path):
+            return
+        if fs.is_dir(path):
+            fs.rmtree(path)
+        else:
+            fs.remove(path)
+        return
+    local = to_local_path(path)
+    if os.path.isdir(local):
+        shutil.rmtree(local)
+    elif os.path.exists(local):
+        os.remove(local)
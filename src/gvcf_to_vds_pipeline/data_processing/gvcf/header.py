@@ -0,0 +1,110 @@
+import gzip
+import re
+import struct
+import zlib
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import open_binary
+
+BGZF_MAGIC = b"\x1f\x8b\x08\x04"
+CONTIG_LINE = re.compile(r"^##contig=<(.*)>$")
+
+
+def iter_bgzf_blocks(f):
+    """
+    Yield the decompressed payload of each BGZF block of an open binary file.
+    Blocks are read one at a time, so callers can stop after the header.
+    """
+    while True:
+        head = f.read(12)
+        if len(head) < 12:
+            return
+        if head[:4] != BGZF_MAGIC:
+            raise ValueError("Not a BGZF block")
+        xlen = struct.unpack("<H", head[10:12])[0]
+        extra = f.read(xlen)
+
+        bsize = None
+        pos = 0
+        while pos + 4 <= len(extra):
+            si, slen = extra[pos:pos + 2], struct.unpack("<H", extra[pos + 2:pos + 4])[0]
+            if si == b"BC":
+                bsize = struct.unpack("<H", extra[pos + 4:pos + 6])[0] + 1
+                break
+            pos += 4 + slen
+        if bsize is None:
+            raise ValueError("BGZF block without BC subfield")
+
+        body = f.read(bsize - 12 - xlen)
+        # body = deflate data + CRC32 (4 bytes) + ISIZE (4 bytes)
+        yield zlib.decompress(body[:-8], -15)
+
+
+def _iter_chunks(f):
+    magic = f.peek(4)[:4]
+    if magic == BGZF_MAGIC:
+        yield from iter_bgzf_blocks(f)
+    elif magic[:2] == b"\x1f\x8b":
+        with gzip.GzipFile(fileobj=f) as gz:
+            yield from iter(lambda: gz.read(65536), b"")
+    else:
+        yield from iter(lambda: f.read(65536), b"")
+
+
+def iter_header_lines(path, open_func=open_binary):
+    """
+    Yield the '#' header lines of a (bgzipped) GVCF, stopping at the #CHROM line.
+    open_func must return a buffered binary file object (supporting peek) for path.
+    """
+    with open_func(path, "rb") as f:
+        buf = b""
+        for chunk in _iter_chunks(f):
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                line = line.decode().rstrip("\r")
+                if not line.startswith("#"):
+                    return
+                yield line
+                if line.startswith("#CHROM"):
+                    return
+
+
+def read_gvcf_header(path, open_func=open_binary):
+    """
+    Read the parts of a GVCF header needed for planning a combine.
+
+    Returns:
+        dict: {"samples": [names], "contigs": {name: length or None}} in header order.
+    """
+    contigs = {}
+    for line in iter_header_lines(path, open_func):
+        m = CONTIG_LINE.match(line)
+        if m:
+            fields = dict(
+                kv.split("=", 1) for kv in re.split(r",(?=[A-Za-z_]+=)", m.group(1)) if "=" in kv
+            )
+            length = fields.get("length")
+            contigs[fields["ID"]] = int(length) if length and length.isdigit() else None
+        elif line.startswith("#CHROM"):
+            return {"samples": line.split("\t")[9:], "contigs": contigs}
+    raise ValueError(f"No #CHROM header line found in {path}")
+
+
+def read_gvcf_samples(path):
+    """
+    Read the sample name(s) from the #CHROM line of a GVCF header.
+
+    Returns:
+        list of str: Sample names (a single entry for a single-sample GVCF).
+    """
+    return read_gvcf_header(path)["samples"]
+
+
+def read_gvcf_sample(path):
+    """
+    Read the single sample name of a single-sample GVCF.
+    """
+    samples = read_gvcf_samples(path)
+    if len(samples) != 1:
+        raise ValueError(f"Expected exactly one sample in {path}, found {len(samples)}")
+    return samples[0]
@@ -0,0 +1,127 @@
+import json
+import os
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import file_signature, is_remote, to_local_path
+from gvcf_to_vds_pipeline.data_processing.gvcf.header import read_gvcf_sample
+
+LEDGER_FILENAME = "ingest_ledger.json"
+
+
+class IngestionLedger:
+    """
+    Record of which GVCF files have been combined into a VDS.
+
+    Stored as ingest_ledger.json inside the VDS directory and maps each file's
+    path to its size, mtime and sample ID, so unchanged files can be recognized
+    without opening them again. A ledger is complete when it was checked to hold
+    an entry for every sample in the VDS; only then does it list the VDS's samples.
+    """
+
+    def __init__(self, entries=None, complete=False):
+        self.entries = entries or {}
+        self.complete = complete
+
+    @staticmethod
+    def ledger_path(vds_path):
+        return os.path.join(vds_path, LEDGER_FILENAME)
+
+    @classmethod
+    def load(cls, vds_path):
+        """
+        Load the ledger stored with a VDS. Returns an empty ledger if none exists.
+        """
+        import hail as hl
+
+        if not vds_path:
+            return cls()
+        path = cls.ledger_path(vds_path)
+        if not hl.hadoop_exists(path):
+            return cls()
+        with hl.hadoop_open(path, "r") as f:
+            data = json.load(f)
+        return cls(data.get("files", {}), data.get("complete", False))
+
+    def save(self, vds_path):
+        import hail as hl
+
+        with hl.hadoop_open(self.ledger_path(vds_path), "w") as f:
+            json.dump({"files": self.entries, "complete": self.complete}, f, indent=1, sort_keys=True)
+
+    def lookup(self, path, size, mtime):
+        """
+        Return the recorded sample ID for path if its size and mtime are unchanged, else None.
+        """
+        entry = self.entries.get(path)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry["sample"]
+        return None
+
+    def record(self, path, size, mtime, sample):
+        self.entries[path] = {"size": size, "mtime": mtime, "sample": sample}
+
+
+def local_ledger_samples(vds_path):
+    """
+    Sample IDs recorded in the ingestion ledger of a local VDS, read without Hail,
+    or None if the VDS is remote or has no complete ledger.
+    """
+    if is_remote(vds_path):
+        return None
+    path = IngestionLedger.ledger_path(to_local_path(vds_path))
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    if not data.get("complete"):
+        return None
+    return {entry["sample"] for entry in data.get("files", {}).values()}
+
+
+def select_new_gvcfs(gvcf_paths, existing_vds=None, known_samples=None):
+    """
+    Work out which GVCFs still need to be combined into existing_vds.
+
+    Sample IDs come from the ingestion ledger when a file is unchanged, then from
+    known_samples (path -> sample, e.g. from the header pre-scan), and from the
+    GVCF header otherwise. Files whose sample is already in the VDS are skipped.
+
+    Returns:
+        tuple: (list of new GVCF paths, IngestionLedger covering the existing and new files)
+    """
+    import hail as hl
+
+    ledger = IngestionLedger.load(existing_vds)
+    existing_samples = set()
+    if existing_vds:
+        existing_samples = set(hl.vds.read_vds(existing_vds).variant_data.s.collect())
+
+    new_paths = []
+    new_samples = {}
+    skipped = 0
+    for path in gvcf_paths:
+        size, mtime = file_signature(path)
+        sample = ledger.lookup(path, size, mtime)
+        if sample is None and known_samples:
+            sample = known_samples.get(path)
+        if sample is None:
+            sample = read_gvcf_sample(path)
+        ledger.record(path, size, mtime, sample)
+
+        if sample in existing_samples:
+            skipped += 1
+            continue
+        if sample in new_samples:
+            raise ValueError(f"Sample '{sample}' appears in both {new_samples[sample]} and {path}")
+        new_samples[sample] = path
+        new_paths.append(path)
+
+    # Drop ledger entries for samples that are no longer in the output.
+    keep_samples = existing_samples | set(new_samples)
+    ledger.entries = {p: e for p, e in ledger.entries.items() if e["sample"] in keep_samples}
+    # Incremental runs given only the new GVCFs, or a VDS built before ledgers were kept,
+    # leave samples without an entry.
+    ledger.complete = {e["sample"] for e in ledger.entries.values()} == keep_samples
+
+    if skipped:
+        hl.utils.info(f"[INFO] Skipping {skipped} GVCF(s) whose samples are already in {existing_vds}")
+    return new_paths, ledger
@@ -0,0 +1,166 @@
+import math
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.contigs import PRIMARY_CONTIG_LENGTHS
+from gvcf_to_vds_pipeline.utils.resources import format_bytes
+
+# Defaults of hl.vds.new_combiner, used as upper bounds by the planner.
+HAIL_GVCF_BATCH_SIZE = 50
+HAIL_BRANCH_FACTOR = 100
+HAIL_TARGET_RECORDS = 24_000
+HAIL_GENOME_INTERVAL_SIZE = 1_200_000
+HAIL_EXOME_INTERVAL_SIZE = 60_000_000
+
+# Average compressed GVCF size above which inputs are treated as whole genomes.
+GENOME_GVCF_BYTES = 2 * 1024 ** 3
+# Rough driver/executor memory needed per GVCF stream merged in one task.
+BYTES_PER_BRANCH = 48 * 1024 ** 2
+MIN_BRANCH_FACTOR = 10
+
+
+def _genome_length(reference_genome):
+    return sum(PRIMARY_CONTIG_LENGTHS[reference_genome].values())
+
+
+def plan_combine(
+        n_gvcfs,
+        total_bytes,
+        mode=None,
+        reference_genome="GRCh37",
+        n_intervals=None,
+        n_vds_inputs=0,
+        n_vds_samples=0,
+        cores=1,
+        memory_bytes=None,
+        import_interval_size=None,
+        gvcf_batch_size=None,
+        branch_factor=None,
+        target_records=None
+):
+    """
+    Choose hl.vds.new_combiner parameters from the size of the input and the machine.
+
+    :param n_gvcfs: number of GVCFs to combine
+    :param total_bytes: total compressed size of the GVCFs
+    :param mode: "genome", "exome" or "panel"; guessed from the average file size if None
+    :param n_intervals: number of explicit import intervals (panel/targeted runs)
+    :param n_vds_inputs: number of existing VDSs combined in
+    :param n_vds_samples: samples already in those VDSs
+    :param cores: cores available to Spark
+    :param memory_bytes: memory available to Spark, None if unknown
+    :param import_interval_size, gvcf_batch_size, branch_factor, target_records:
+        user overrides; any value given is used as-is
+    :return: dict with the chosen parameters, where each came from ("auto"/"user"),
+        and projected batch and partition counts
+    """
+    cores = max(1, cores)
+    source = {}
+
+    if mode is None:
+        if n_intervals:
+            mode = "panel"
+        else:
+            avg_bytes = total_bytes / n_gvcfs if n_gvcfs else 0
+            mode = "genome" if avg_bytes >= GENOME_GVCF_BYTES else "exome"
+
+    genome_length = _genome_length(reference_genome)
+    if n_intervals:
+        import_interval_size = None
+        source["import_interval_size"] = "user"
+        n_partitions = n_intervals
+    else:
+        if import_interval_size is not None:
+            source["import_interval_size"] = "user"
+        else:
+            source["import_interval_size"] = "auto"
+            if mode == "genome":
+                import_interval_size = HAIL_GENOME_INTERVAL_SIZE
+            else:
+                # Enough partitions to keep every core busy, never larger than Hail's exome default.
+                per_core = genome_length // (3 * cores)
+                import_interval_size = max(
+                    HAIL_GENOME_INTERVAL_SIZE,
+                    min(HAIL_EXOME_INTERVAL_SIZE, per_core // 100_000 * 100_000)
+                )
+        n_partitions = math.ceil(genome_length / import_interval_size)
+
+    if branch_factor is not None:
+        source["branch_factor"] = "user"
+    else:
+        source["branch_factor"] = "auto"
+        branch_factor = HAIL_BRANCH_FACTOR
+        if memory_bytes:
+            # Each task merges branch_factor GVCF streams at once; keep that within memory per core.
+            branch_factor = min(branch_factor, int(memory_bytes / cores / BYTES_PER_BRANCH))
+        branch_factor = max(MIN_BRANCH_FACTOR, min(branch_factor, max(n_gvcfs + n_vds_inputs, 2)))
+
+    if gvcf_batch_size is not None:
+        source["gvcf_batch_size"] = "user"
+    else:
+        source["gvcf_batch_size"] = "auto"
+        # Just enough datasets per job that the first layer can be merged in one VDS step.
+        gvcf_batch_size = max(1, min(HAIL_GVCF_BATCH_SIZE, math.ceil(n_gvcfs / branch_factor)))
+
+    n_samples = n_gvcfs + n_vds_samples
+    if target_records is not None:
+        source["target_records"] = "user"
+    else:
+        source["target_records"] = "auto"
+        # Wide rows from large cohorts make partitions heavy; scale the row target down.
+        target_records = HAIL_TARGET_RECORDS
+        if n_samples > 5_000:
+            target_records = max(2_000, int(HAIL_TARGET_RECORDS * 5_000 / n_samples))
+
+    n_intermediate = math.ceil(n_gvcfs / branch_factor) if n_gvcfs else 0
+    n_gvcf_jobs = math.ceil(n_gvcfs / (gvcf_batch_size * branch_factor)) if n_gvcfs else 0
+    n_merge_jobs = 0
+    n_datasets = n_intermediate + n_vds_inputs
+    while n_datasets > 1:
+        n_datasets = math.ceil(n_datasets / branch_factor)
+        n_merge_jobs += 1
+
+    return {
+        "mode": mode,
+        "reference_genome": reference_genome,
+        "n_gvcfs": n_gvcfs,
+        "total_bytes": total_bytes,
+        "n_samples": n_samples,
+        "cores": cores,
+        "memory_bytes": memory_bytes,
+        "import_interval_size": import_interval_size,
+        "gvcf_batch_size": gvcf_batch_size,
+        "branch_factor": branch_factor,
+        "target_records": target_records,
+        "source": source,
+        "projected": {
+            "import_partitions": n_partitions,
+            "gvcf_jobs": n_gvcf_jobs,
+            "intermediate_datasets": n_intermediate,
+            "vds_merge_jobs": n_merge_jobs,
+        },
+    }
+
+
+def format_plan(plan):
+    """
+    Render a combine plan as readable text.
+    """
+    src = plan["source"]
+    proj = plan["projected"]
+    interval = (
+        "explicit intervals" if plan["import_interval_size"] is None
+        else f"{plan['import_interval_size']:,} bp"
+    )
+    lines = [
+        "Combiner plan:",
+        f"  Input:             {plan['n_gvcfs']} GVCF(s), {format_bytes(plan['total_bytes'])} compressed, "
+        f"{plan['n_samples']} total sample(s), mode={plan['mode']}, {plan['reference_genome']}",
+        f"  Machine:           {plan['cores']} core(s), {format_bytes(plan['memory_bytes'])} memory",
+        f"  Import interval:   {interval} ({src['import_interval_size']})",
+        f"  Branch factor:     {plan['branch_factor']} ({src['branch_factor']})",
+        f"  GVCF batch size:   {plan['gvcf_batch_size']} ({src['gvcf_batch_size']})",
+        f"  Target records:    {plan['target_records']:,} ({src['target_records']})",
+        f"  Projected:         {proj['import_partitions']:,} import partition(s), "
+        f"{proj['gvcf_jobs']} GVCF job(s) -> {proj['intermediate_datasets']} intermediate dataset(s), "
+        f"{proj['vds_merge_jobs']} VDS merge job(s)",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,243 @@
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.contigs import (
+    CONTIG_RECODINGS,
+    MITOCHONDRIAL_CONTIGS,
+    PRIMARY_CONTIG_LENGTHS,
+    to_reference_contig
+)
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import exists, file_signature
+from gvcf_to_vds_pipeline.data_processing.gvcf.header import read_gvcf_header
+
+DEFAULT_HEADER_CACHE = str(Path.home() / ".cache" / "gvcf-to-vds" / "header_cache.json")
+DEFAULT_SCAN_THREADS = 16
+INDEX_SUFFIXES = (".tbi", ".csi")
+
+
+class HeaderCache:
+    """
+    On-disk cache of parsed GVCF headers, keyed by path and invalidated by size/mtime.
+    """
+
+    def __init__(self, cache_path=DEFAULT_HEADER_CACHE):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.entries = {}
+        self.dirty = False
+        if self.cache_path and self.cache_path.exists():
+            try:
+                with self.cache_path.open() as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                print(f"[WARN] Ignoring unreadable header cache at {self.cache_path}")
+
+    def get(self, path, size, mtime):
+        entry = self.entries.get(path)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry
+        return None
+
+    def put(self, path, entry):
+        self.entries[path] = entry
+        self.dirty = True
+
+    def save(self):
+        if not (self.cache_path and self.dirty):
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+
+def _scan_one(path, cache):
+    """
+    Return (header entry, True if it came from the cache) for one GVCF.
+    """
+    size, mtime = file_signature(path)
+    entry = cache.get(path, size, mtime)
+    if entry is not None:
+        return entry, True
+
+    header = read_gvcf_header(path)
+    return {
+        "size": size,
+        "mtime": mtime,
+        "samples": header["samples"],
+        "contigs": header["contigs"],
+        "indexed": any(exists(path + suffix) for suffix in INDEX_SUFFIXES),
+    }, False
+
+
+def scan_gvcf_headers(gvcf_paths, cache_path=DEFAULT_HEADER_CACHE, threads=DEFAULT_SCAN_THREADS):
+    """
+    Read the headers of all GVCFs in a thread pool, reusing cached results for unchanged files.
+    Only the BGZF blocks holding the header are decompressed.
+
+    Returns:
+        dict: path -> {"size", "mtime", "samples", "contigs", "indexed"}
+    """
+    cache = HeaderCache(cache_path)
+    headers = {}
+    n_read = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(gvcf_paths)))) as pool:
+        results = pool.map(lambda path: _scan_one(path, cache), gvcf_paths)
+        for path, (entry, cached) in zip(gvcf_paths, results):
+            headers[path] = entry
+            if not cached:
+                cache.put(path, entry)
+                n_read += 1
+    cache.save()
+
+    print(f"[INFO] Header pre-scan: {len(gvcf_paths)} GVCF(s), {n_read} read, "
+          f"{len(gvcf_paths) - n_read} from cache")
+    return headers
+
+
+def _matching_references(contigs):
+    """
+    Return the reference genomes whose primary contig lengths agree with a header's contigs,
+    or None if the header has no primary contig with a length.
+    The mitochondrial contig is not compared: UCSC hg19 uses the 16571 bp chrM of the
+    older Yoruba sequence, while GRCh37 and GRCh38 both use the 16569 bp rCRS.
+
+    >>> hg19 = {f"chr{c}": n for c, n in PRIMARY_CONTIG_LENGTHS["GRCh37"].items() if c != "MT"}
+    >>> _matching_references({**hg19, "chrM": 16571})
+    ['GRCh37']
+    """
+    matches = []
+    informative = False
+    for reference_genome, lengths in PRIMARY_CONTIG_LENGTHS.items():
+        agrees = True
+        for name, length in contigs.items():
+            ref_name = to_reference_contig(name, reference_genome)
+            if length is None or ref_name not in lengths or ref_name in MITOCHONDRIAL_CONTIGS:
+                continue
+            informative = True
+            if lengths[ref_name] != length:
+                agrees = False
+                break
+        if agrees:
+            matches.append(reference_genome)
+    return matches if informative else None
+
+
+def detect_reference_genome(headers):
+    """
+    Pick the reference genome every GVCF agrees with, based on ##contig lengths.
+    Returns None if no header carries primary contig lengths.
+    """
+    by_match = defaultdict(list)
+    for path, entry in headers.items():
+        matches = _matching_references(entry["contigs"])
+        if matches is not None:
+            by_match[tuple(matches)].append(path)
+
+    if not by_match:
+        return None
+    if () in by_match:
+        paths = by_match[()]
+        raise ValueError(
+            f"{len(paths)} GVCF(s) have contig lengths matching no supported reference, e.g. {paths[0]}"
+        )
+
+    candidates = set(PRIMARY_CONTIG_LENGTHS)
+    for matches in by_match:
+        candidates &= set(matches)
+    if not candidates:
+        summary = "; ".join(f"{'/'.join(m)}: {len(p)} file(s), e.g. {p[0]}" for m, p in by_match.items())
+        raise ValueError(f"GVCFs were called against different reference genomes ({summary})")
+    return sorted(candidates)[0]
+
+
+def contig_recoding_for(headers, reference_genome):
+    """
+    Return the contig recoding needed to map every GVCF's contig names onto reference_genome,
+    or None if all files already use the reference's names.
+    """
+    recoding = CONTIG_RECODINGS[reference_genome]
+    names = {name for entry in headers.values() for name in entry["contigs"]}
+    if any(name in recoding for name in names):
+        return dict(recoding)
+    return None
+
+
+def validate_headers(headers, reference_genome, expected_samples=None):
+    """
+    Reject inputs that would only fail hours into a combine: duplicate samples,
+    multi-sample or unindexed GVCFs, contigs whose lengths disagree between files,
+    and headers whose sample differs from expected_samples (path -> sample, e.g. a manifest).
+    """
+    errors = []
+
+    if expected_samples:
+        mismatched = [
+            f"{path} (expected {expected_samples[path]}, header has {headers[path]['samples']})"
+            for path in headers
+            if path in expected_samples and headers[path]["samples"] != [expected_samples[path]]
+        ]
+        if mismatched:
+            errors.append(f"{len(mismatched)} GVCF(s) disagree with the manifest sample ID, e.g. {mismatched[0]}")
+
+    by_sample = defaultdict(list)
+    for path, entry in headers.items():
+        if len(entry["samples"]) != 1:
+            errors.append(f"{path}: expected one sample, found {len(entry['samples'])}")
+        for sample in entry["samples"]:
+            by_sample[sample].append(path)
+    for sample, paths in by_sample.items():
+        if len(paths) > 1:
+            errors.append(f"sample '{sample}' appears in {len(paths)} files: {', '.join(paths[:3])}")
+
+    unindexed = [path for path, entry in headers.items() if not entry["indexed"]]
+    if unindexed:
+        errors.append(f"{len(unindexed)} GVCF(s) have no .tbi/.csi index, e.g. {unindexed[0]}")
+
+    lengths = defaultdict(set)
+    for entry in headers.values():
+        for name, length in entry["contigs"].items():
+            if length is not None:
+                lengths[to_reference_contig(name, reference_genome)].add(length)
+    for name, seen in sorted(lengths.items()):
+        if len(seen) > 1:
+            errors.append(f"contig {name} has inconsistent lengths across files: {sorted(seen)}")
+
+    if errors:
+        raise ValueError("GVCF pre-flight check failed:\n  " + "\n  ".join(errors))
+
+
+def prescan_gvcfs(gvcf_paths, reference_genome=None, cache_path=DEFAULT_HEADER_CACHE,
+                  threads=DEFAULT_SCAN_THREADS, expected_samples=None):
+    """
+    Pre-flight stage for readgvcfs: scan headers, pick the reference genome and contig
+    recoding, and validate the inputs. For local inputs this runs before Spark is started.
+
+    :param gvcf_paths: list of GVCF paths; remote URIs need a running Hail session
+    :param reference_genome: force a reference genome instead of detecting it
+    :param expected_samples: optional dict of path -> sample ID to check headers against
+    :return: dict with "reference_genome", "contig_recoding", "samples" (path -> sample)
+        and "total_bytes" (compressed size of all GVCFs)
+    """
+    headers = scan_gvcf_headers(gvcf_paths, cache_path=cache_path, threads=threads)
+
+    if reference_genome is None:
+        reference_genome = detect_reference_genome(headers)
+        if reference_genome is None:
+            reference_genome = "GRCh37"
+            print("[WARN] No ##contig lengths in GVCF headers; defaulting to GRCh37")
+        else:
+            print(f"[INFO] Detected reference genome {reference_genome} from GVCF headers")
+
+    validate_headers(headers, reference_genome, expected_samples)
+
+    return {
+        "reference_genome": reference_genome,
+        "contig_recoding": contig_recoding_for(headers, reference_genome),
+        "samples": {path: entry["samples"][0] for path, entry in headers.items()},
+        "total_bytes": sum(entry["size"] for entry in headers.values()),
+    }
@@ -1,11 +1,15 @@
 import hail as hl
-from pathlib import Path
 
-GRCH37_CONTIG_RECODING = {
-    "chr1": "1", "chr2": "2", "chr3": "3", "chr4": "4", "chr5": "5", "chr6": "6", "chr7": "7", "chr8": "8", "chr9": "9", "chr10": "10",
-    "chr11": "11", "chr12": "12", "chr13": "13", "chr14": "14", "chr15": "15", "chr16": "16", "chr17": "17", "chr18": "18", "chr19": "19",
-    "chr20": "20", "chr21": "21", "chr22": "22", "chrX": "X", "chrY": "Y", "chrM": "MT"
-}
+from gvcf_to_vds_pipeline.data_processing.gvcf.ledger import select_new_gvcfs
+from gvcf_to_vds_pipeline.data_processing.gvcf.resume import (
+    combine_fingerprint,
+    default_plan_path,
+    record_plan_inputs,
+    remove_saved_plan,
+    run_combiner,
+    saved_plan_matches
+)
+from gvcf_to_vds_pipeline.data_processing.vds.sample_qc import carry_forward_sample_qc
 
 def build_or_combine_vds(
         gvcf_paths,
@@ -13,12 +17,16 @@ def build_or_combine_vds(
         output_path=None,
         temp_path=None,
         save_path=None,
-        use_genome=False,
-        use_exome=False,
         intervals=None,
         import_interval_size=None,
         reference_genome="GRCh37",
-        contig_recoding = None
+        contig_recoding = None,
+        skip_ingested=True,
+        known_samples=None,
+        gvcf_batch_size=None,
+        branch_factor=None,
+        target_records=None,
+        restart=False
 ):
     """
     Build a new VDS from GVCFs or combine GVCFs with an existing VDS.
@@ -27,17 +35,27 @@ def build_or_combine_vds(
     :param existing_vds: path to existing VDS (str) if combining
     :param output_path: path for the resulting VDS
     :param temp_path: Hail combiner temp path
-    :param save_path: path to store combiner plan JSON
-    :param use_genome: use hail's default intervals for whole-genome partitioning
-    :param use_exome: use hail's default intervals for exome partitioning
+    :param save_path: path to store combiner plan JSON; defaults to <temp_path>/combiner-plan.json.
+        A plan left by an interrupted run with the same inputs is resumed, and removed on success.
+    :param intervals: explicit import intervals; otherwise the genome is cut into import_interval_size pieces
+    :param reference_genome: reference genome of the GVCFs
+    :param contig_recoding: mapping of GVCF contig names to reference contig names
+    :param skip_ingested: only combine GVCFs whose samples are not yet in existing_vds,
+        and record all ingested files in the output's ingestion ledger
+    :param known_samples: optional dict of GVCF path -> sample ID (e.g. from the header pre-scan)
+    :param gvcf_batch_size, branch_factor, target_records: combiner tuning; Hail's defaults if None
+    :param restart: discard a saved plan instead of resuming it
+    :return: True if a combine ran, False if there was nothing new to add
     """
     if not gvcf_paths and not existing_vds:
         raise ValueError("No GVCFs and no existing VDS. Nothing to combine.")
 
-    # If both flags are true, prefer genome
-    if use_genome and use_exome:
-        hl.utils.warning("Both genome and exome intervals requested; using genome intervals.")
-        use_exome = False
+    ledger = None
+    if skip_ingested:
+        gvcf_paths, ledger = select_new_gvcfs(gvcf_paths, existing_vds, known_samples)
+        if not gvcf_paths and existing_vds:
+            hl.utils.info(f"[INFO] All GVCF samples are already in {existing_vds}; nothing to combine.")
+            return False
 
     # If combining with existing VDS, we pass it in as vds_paths
     vds_paths = []
@@ -46,7 +64,22 @@ def build_or_combine_vds(
 
     parsed_intervals = None
     if intervals:
-        parsed_intervals = [hl.parse_locus_interval(i) for i in intervals]
+        parsed_intervals = [hl.parse_locus_interval(i, reference_genome=reference_genome) for i in intervals]
+
+    tuning = {
+        name: value for name, value in (
+            ("gvcf_batch_size", gvcf_batch_size),
+            ("branch_factor", branch_factor),
+            ("target_records", target_records),
+        ) if value is not None
+    }
+
+    save_path = save_path or default_plan_path(temp_path)
+    inputs_fingerprint = combine_fingerprint(
+        gvcf_paths, vds_paths, output_path, reference_genome, intervals,
+        {**tuning, "import_interval_size": import_interval_size}
+    )
+    resume = saved_plan_matches(save_path, inputs_fingerprint, restart=restart)
 
     combiner = hl.vds.new_combiner(
         output_path=output_path,
@@ -56,9 +89,20 @@ def build_or_combine_vds(
         vds_paths=vds_paths,
         intervals=parsed_intervals,
         import_interval_size=import_interval_size,
-        use_genome_default_intervals=use_genome,
-        use_exome_default_intervals=use_exome,
         reference_genome = reference_genome,
-        contig_recoding = contig_recoding
+        contig_recoding = contig_recoding,
+        force=not resume,
+        **tuning
     )
-    combiner.run()
+    if resume:
+        hl.utils.info(f"[INFO] Resuming the combine saved at {save_path}")
+    else:
+        record_plan_inputs(save_path, inputs_fingerprint)
+    run_combiner(combiner, temp_path, keep_paths=vds_paths)
+    remove_saved_plan(save_path)
+
+    if ledger is not None:
+        ledger.save(output_path)
+    if existing_vds:
+        carry_forward_sample_qc(existing_vds, output_path)
+    return True
@@ -1,30 +1,167 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import is_remote, to_local_path
 
-def gather_gvcfs(paths):
+GVCF_EXTENSIONS = (".g.vcf", ".g.vcf.gz", ".gvcf", ".gvcf.gz", ".gvcf.bgz")
+DEFAULT_WALK_THREADS = 16
+
+
+def is_gvcf(name):
+    return name.endswith(GVCF_EXTENSIONS)
+
+
+def _scan_directory(directory):
+    """
+    List one directory, returning (GVCF file paths, subdirectory paths).
+    Symlinked files are included; symlinked directories are not followed.
+    """
+    files, subdirs = [], []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif is_gvcf(entry.name) and entry.is_file():
+                    files.append(entry.path)
+    except PermissionError:
+        print(f"[WARN] Skipping unreadable directory {directory}")
+    return files, subdirs
+
+
+def _scan_hadoop_directory(directory):
+    """
+    List one directory (or file) URI through Hail's Hadoop FS layer,
+    returning (GVCF file URIs, subdirectory URIs).
+    """
+    import hail as hl
+
+    files, subdirs = [], []
+    for entry in hl.hadoop_ls(directory):
+        if entry["is_dir"]:
+            subdirs.append(entry["path"])
+        elif is_gvcf(entry["path"].rstrip("/").rsplit("/", 1)[-1]):
+            files.append(entry["path"])
+    return files, subdirs
+
+
+def walk_gvcfs(directories, threads=DEFAULT_WALK_THREADS, scan_func=_scan_directory):
+    """
+    Walk directory trees once, listing each level's directories concurrently,
+    and return every file matching any GVCF extension.
+    """
+    found = []
+    level = list(directories)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while level:
+            next_level = []
+            for files, subdirs in pool.map(scan_func, level):
+                found.extend(files)
+                next_level.extend(subdirs)
+            level = next_level
+    return found
+
+
+def _dedupe_by_inode(paths):
+    """
+    Drop paths that point to an already-seen file (symlinks, repeated inputs, hard links).
+    """
+    seen = set()
+    unique = []
+    for path in paths:
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def gather_gvcfs(paths, threads=DEFAULT_WALK_THREADS):
     """
     Gather .g.vcf, .g.vcf.gz, .gvcf, .gvcf.gz, and .gvcf.bgz files from the specified paths (files/dirs).
     Returns a list of string paths for hail.vds.new_combiner().
 
+    Directories are walked in a single concurrent os.scandir pass that matches all
+    extensions at once. Files reached more than once (symlinks, overlapping inputs)
+    are returned only once.
+
+    URIs such as hdfs://, s3a:// or gs:// are listed through Hail's Hadoop FS layer
+    (hl.hadoop_ls) with the same extension rules, so a Hail session must be running.
+    file:// URIs are treated as local paths.
+
     Args:
-        paths (list of str or Path): List of file or directory paths to search for GVCF files.
+        paths (list of str or Path): List of file or directory paths or URIs to search for GVCF files.
+        threads (int): Number of threads listing directories concurrently.
 
     Returns:
-        list of str: Resolved paths to valid GVCF files.
+        list of str: Absolute, sorted paths to valid GVCF files.
     """
-    valid_extensions = [".g.vcf", ".g.vcf.gz", ".gvcf", ".gvcf.gz", ".gvcf.bgz"]
     gvcfs = []
+    directories = []
+    remote = []
 
     for path in paths:
-        path = Path(path)
+        if is_remote(path):
+            remote.append(str(path))
+            continue
+        path = Path(to_local_path(path))
         if path.is_file():
             # Check file extensions
-            if any(path.name.endswith(ext) for ext in valid_extensions):
-                gvcfs.append(str(path.resolve()))
+            if is_gvcf(path.name):
+                gvcfs.append(os.path.abspath(path))
         elif path.is_dir():
-            # Recursively find valid GVCFs in directories
-            for ext in valid_extensions:
-                for f in path.rglob(f"*{ext}"):
-                    gvcfs.append(str(f.resolve()))
+            directories.append(os.path.abspath(path))
+
+    if directories:
+        gvcfs.extend(walk_gvcfs(directories, threads=threads))
 
+    gvcfs = _dedupe_by_inode(sorted(gvcfs))
+    if remote:
+        gvcfs.extend(sorted(set(walk_gvcfs(remote, threads=threads, scan_func=_scan_hadoop_directory))))
     return gvcfs
+
+
+def read_file_list(list_path):
+    """
+    Read a GVCF manifest instead of walking the filesystem.
+
+    Accepted layouts:
+        - one path per line
+        - TSV with a header row naming a 'path' column and optionally a 'sample' (or 's') column
+        - headerless two-column TSV of sample and path (the path column is recognized by its extension)
+    Blank lines and lines starting with '#' are ignored.
+
+    Returns:
+        tuple: (list of paths in manifest order, dict of path -> sample ID for rows that have one)
+    """
+    with open(list_path) as f:
+        rows = [line.rstrip("\n").split("\t") for line in f if line.strip() and not line.startswith("#")]
+
+    if not rows:
+        return [], {}
+
+    path_col, sample_col = 0, None
+    header = [c.strip().lower() for c in rows[0]]
+    if "path" in header:
+        path_col = header.index("path")
+        sample_col = next((header.index(c) for c in ("sample", "s") if c in header), None)
+        rows = rows[1:]
+    elif len(rows[0]) > 1:
+        path_col = next((i for i, c in enumerate(rows[0]) if is_gvcf(c.strip())), len(rows[0]) - 1)
+        sample_col = 1 - path_col if len(rows[0]) == 2 else None
+
+    paths, samples, seen = [], {}, set()
+    for n, row in enumerate(rows, start=1):
+        if path_col >= len(row):
+            raise ValueError(f"{list_path}: row {n} has no path column")
+        path = row[path_col].strip()
+        path = path if is_remote(path) else os.path.abspath(to_local_path(path))
+        if path in seen:
+            continue
+        seen.add(path)
+        paths.append(path)
+        if sample_col is not None and sample_col < len(row) and row[sample_col].strip():
+            samples[path] = row[sample_col].strip()
+    return paths, samples
@@ -0,0 +1,138 @@
+import json
+import math
+import time
+
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import remove_tree
+from gvcf_to_vds_pipeline.utils.fingerprint import fingerprint
+
+DEFAULT_PLAN_FILENAME = "combiner-plan.json"
+# Written next to the saved plan: fingerprint of the inputs the plan was made for.
+PLAN_INPUTS_SUFFIX = ".inputs.json"
+
+
+def default_plan_path(temp_path):
+    return f"{temp_path.rstrip('/')}/{DEFAULT_PLAN_FILENAME}"
+
+
+def combine_fingerprint(gvcf_paths, vds_paths, output_path, reference_genome, intervals, tuning):
+    """
+    Fingerprint of everything that determines a combiner plan.
+    """
+    return fingerprint(
+        sorted(gvcf_paths), list(vds_paths), output_path, str(reference_genome),
+        [str(i) for i in intervals or []], tuning
+    )
+
+
+def saved_plan_matches(save_path, inputs_fingerprint, restart=False):
+    """
+    Decide whether to resume from a plan saved by an earlier, interrupted run.
+
+    :return: True to resume, False to start a new combine (no plan, or restart requested)
+    :raises ValueError: if a plan exists but was made for different inputs
+    """
+    if not hl.hadoop_exists(save_path):
+        return False
+    if restart:
+        hl.utils.info(f"[INFO] Discarding saved combiner plan {save_path} (--restart)")
+        return False
+
+    recorded = None
+    if hl.hadoop_exists(save_path + PLAN_INPUTS_SUFFIX):
+        with hl.hadoop_open(save_path + PLAN_INPUTS_SUFFIX) as f:
+            recorded = json.load(f).get("fingerprint")
+    if recorded != inputs_fingerprint:
+        raise ValueError(
+            f"A saved combiner plan at {save_path} was made for different inputs, output or settings. "
+            "Rerun with the original inputs to resume it, pass --restart to discard it, "
+            "or use a different --save_plan/--temp."
+        )
+    return True
+
+
+def record_plan_inputs(save_path, inputs_fingerprint):
+    with hl.hadoop_open(save_path + PLAN_INPUTS_SUFFIX, "w") as f:
+        json.dump({"fingerprint": inputs_fingerprint}, f)
+
+
+def remove_saved_plan(save_path):
+    """
+    Delete a finished combine's plan, so the next run with the same temp path starts fresh.
+    """
+    remove_tree(save_path)
+    remove_tree(save_path + PLAN_INPUTS_SUFFIX)
+
+
+def _pending_gvcfs(combiner):
+    return len(combiner._gvcfs)
+
+
+def _pending_vds_paths(combiner):
+    return {md.path for group in combiner._vdses.values() for md in group}
+
+
+def _remaining_steps(n_gvcfs, n_datasets, gvcf_batch_size, branch_factor):
+    """
+    Steps left: GVCF import jobs, then VDS merge rounds (as projected by plan_combine).
+    """
+    gvcf_jobs = math.ceil(n_gvcfs / (gvcf_batch_size * branch_factor)) if n_gvcfs else 0
+    n_datasets += math.ceil(n_gvcfs / branch_factor) if n_gvcfs else 0
+    merge_jobs = 0
+    while n_datasets > 1:
+        n_datasets = math.ceil(n_datasets / branch_factor)
+        merge_jobs += 1
+    return gvcf_jobs + merge_jobs
+
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def run_combiner(combiner, temp_path, keep_paths=()):
+    """
+    Run a combiner to completion one step at a time, reporting progress after each
+    step: GVCFs imported, datasets left to merge, throughput and an estimated time left.
+
+    The plan is saved to the combiner's save_path before the first step and after every
+    step, as combiner.run() does. Intermediate VDSs under temp_path are deleted once a
+    step has merged them into a newer one and the plan saved after it no longer refers to
+    them, so a resumed run never needs them. Paths in keep_paths (e.g. the input VDS) are
+    never deleted.
+    """
+    temp_root = temp_path.rstrip("/") + "/"
+    keep = {p.rstrip("/") for p in keep_paths}
+    gvcfs_at_start = _pending_gvcfs(combiner)
+    started = time.time()
+    steps = 0
+
+    combiner.save()
+    while not combiner.finished:
+        before = _pending_vds_paths(combiner)
+        combiner.step()
+        combiner.save()
+        steps += 1
+
+        merged = {p for p in before - _pending_vds_paths(combiner)
+                  if p.startswith(temp_root) and p.rstrip("/") not in keep}
+        for path in merged:
+            remove_tree(path)
+
+        elapsed = time.time() - started
+        gvcfs_left = _pending_gvcfs(combiner)
+        datasets_left = len(_pending_vds_paths(combiner))
+        imported = gvcfs_at_start - gvcfs_left
+        steps_left = 0 if combiner.finished else _remaining_steps(
+            gvcfs_left, datasets_left, combiner._gvcf_batch_size, combiner._branch_factor
+        )
+        rate = f", {imported / elapsed * 3600:.0f} GVCFs/h" if imported else ""
+        eta = f", ETA ~{_format_duration(elapsed / steps * steps_left)}" if steps_left else ""
+        hl.utils.info(
+            f"[PROGRESS] Step {steps}: {imported}/{gvcfs_at_start} GVCF(s) imported, "
+            f"{datasets_left} dataset(s) left to merge, {_format_duration(elapsed)} elapsed{rate}{eta}"
+            + (f"; removed {len(merged)} merged intermediate(s)" if merged else "")
+        )
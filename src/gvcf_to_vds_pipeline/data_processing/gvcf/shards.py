@@ -0,0 +1,206 @@
+import json
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.contigs import PRIMARY_CONTIG_LENGTHS
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import exists
+
+SHARD_MANIFEST_FILENAME = "shards.json"
+
+_INTERVAL_RE = re.compile(r"^[\[(]?([^:\[\]()]+):(\d+)-(\d+)[\])]?$")
+
+
+def _interval_length(interval, reference_genome):
+    """
+    Approximate bases covered by an interval string, used to balance shards.
+    """
+    m = _INTERVAL_RE.match(interval.replace(",", "").strip())
+    if m:
+        return max(1, int(m.group(3)) - int(m.group(2)) + 1)
+    return PRIMARY_CONTIG_LENGTHS[reference_genome].get(interval.strip(), 1)
+
+
+def chunk_genome(reference_genome, chunk_size):
+    """
+    Primary contigs cut into chunk_size pieces, in genome order, as interval strings.
+    These match the partitions the combiner would import with import_interval_size.
+    """
+    chunks = []
+    for contig, length in PRIMARY_CONTIG_LENGTHS[reference_genome].items():
+        for start in range(1, length + 1, chunk_size):
+            chunks.append(f"{contig}:{start}-{min(start + chunk_size - 1, length)}")
+    return chunks
+
+
+def plan_shards(intervals, n_shards, reference_genome):
+    """
+    Split import intervals into n_shards groups of consecutive intervals with
+    similar total length. Groups do not overlap and stay in genome order, so the
+    shard VDSs can be concatenated without reshuffling.
+
+    Every shard imports its own intervals exactly as the single combine would, so
+    reference blocks running past a shard boundary are kept whole in the earlier shard.
+
+    :param intervals: import intervals in genome order
+    :return: list of {"name", "intervals", "bp"}
+    """
+    if n_shards < 1:
+        raise ValueError("--shards must be at least 1")
+    n_shards = min(n_shards, len(intervals))
+    lengths = [_interval_length(i, reference_genome) for i in intervals]
+    target = sum(lengths) / n_shards
+
+    shards, current, current_bp, done_bp = [], [], 0, 0
+    for n, (interval, length) in enumerate(zip(intervals, lengths), start=1):
+        current.append(interval)
+        current_bp += length
+        remaining_shards = n_shards - len(shards) - 1
+        if remaining_shards and (
+            done_bp + current_bp >= target * (len(shards) + 1) or len(intervals) - n == remaining_shards
+        ):
+            shards.append({"intervals": current, "bp": current_bp})
+            done_bp += current_bp
+            current, current_bp = [], 0
+    if current:
+        shards.append({"intervals": current, "bp": current_bp})
+
+    width = len(str(len(shards) - 1))
+    for n, shard in enumerate(shards):
+        shard["name"] = f"shard-{n:0{width}d}"
+    return shards
+
+
+def build_shard_manifest(shards, shard_dir, temp_path, dest, gvcf_paths, prescan, plan):
+    """
+    Everything a shard job needs to run on its own, possibly on another host:
+    inputs, reference genome, combiner parameters and its output, temp and plan paths.
+    """
+    shard_dir = shard_dir.rstrip("/")
+    temp_path = temp_path.rstrip("/")
+    return {
+        "output": dest,
+        "reference_genome": prescan["reference_genome"],
+        "contig_recoding": prescan["contig_recoding"],
+        "total_bytes": prescan["total_bytes"],
+        "gvcfs": [{"path": p, "sample": prescan["samples"].get(p)} for p in gvcf_paths],
+        "combiner": {k: plan[k] for k in ("gvcf_batch_size", "branch_factor", "target_records")},
+        "shards": [
+            {
+                "name": shard["name"],
+                "bp": shard["bp"],
+                "intervals": shard["intervals"],
+                "dest": f"{shard_dir}/{shard['name']}.vds",
+                "temp": f"{temp_path}/{shard['name']}",
+                "save_plan": f"{shard_dir}/plans/{shard['name']}.json",
+            }
+            for shard in shards
+        ],
+    }
+
+
+def save_shard_manifest(manifest, path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=1)
+
+
+def load_shard_manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_shard(manifest, name):
+    for shard in manifest["shards"]:
+        if shard["name"] == name:
+            return shard
+    raise ValueError(f"No shard '{name}' in manifest; shards are {', '.join(s['name'] for s in manifest['shards'])}")
+
+
+def shard_complete(shard):
+    """
+    True if the shard's VDS has been completely written.
+    """
+    return all(exists(f"{shard['dest']}/{c}/_SUCCESS") for c in ("reference_data", "variant_data"))
+
+
+def shard_argv(manifest_path, shard):
+    """
+    readgvcfs arguments that run one shard of the manifest.
+    """
+    return [
+        "readgvcfs", "--shard_manifest", str(manifest_path), "--shard", shard["name"],
+        "-d", shard["dest"], "--temp", shard["temp"], "--save_plan", shard["save_plan"],
+    ]
+
+
+def run_shards(manifest_path, manifest, workers, spark_args=(), log_dir=None):
+    """
+    Run the shards of a manifest as independent processes, `workers` at a time.
+    Each process starts its own Spark session. Shards already written are skipped,
+    so shards can also be run elsewhere (see shard_argv) and finished here.
+
+    :param spark_args: extra CLI arguments for every shard, e.g. Spark settings
+    :return: list of shard names that were run
+    """
+    log_dir = Path(log_dir or Path(manifest_path).parent / "logs")
+    log_dir.mkdir(parents=True, exist_ok=True)
+    pending = [s for s in manifest["shards"] if not shard_complete(s)]
+    skipped = len(manifest["shards"]) - len(pending)
+    if skipped:
+        print(f"[INFO] {skipped} shard(s) already complete; skipping them.")
+
+    def run(shard):
+        argv = [sys.executable, "-m", "gvcf_to_vds_pipeline", *shard_argv(manifest_path, shard), *spark_args]
+        log_path = log_dir / f"{shard['name']}.log"
+        print(f"[INFO] Starting {shard['name']} ({len(shard['intervals'])} interval(s)); log: {log_path}")
+        with open(log_path, "w") as log:
+            returncode = subprocess.run(argv, stdout=log, stderr=subprocess.STDOUT).returncode
+        print(f"[INFO] {shard['name']} {'done' if returncode == 0 else f'failed (exit {returncode})'}")
+        return shard["name"], returncode, log_path
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(run, pending))
+
+    failed = [(name, log_path) for name, returncode, log_path in results if returncode != 0]
+    if failed:
+        raise RuntimeError(
+            "Shard combine failed for: " + ", ".join(f"{name} (see {log})" for name, log in failed)
+            + ". Rerun the same command to retry only the failed shards."
+        )
+    return [name for name, _, _ in results]
+
+
+def shard_spark_args(spark_profile, spark_conf_pairs, conf, workers):
+    """
+    Spark arguments for shard processes: the caller's profile and overrides, with a
+    local session's cores and driver memory divided between concurrent workers.
+    """
+    spark_args = ["--spark_profile", spark_profile]
+    for pair in spark_conf_pairs:
+        spark_args += ["--spark_conf", pair]
+    m = re.fullmatch(r"local\[(\d+)\]", conf.get("spark.master", ""))
+    if m and workers > 1:
+        spark_args += ["--spark_conf", f"spark.master=local[{max(1, int(m.group(1)) // workers)}]"]
+        memory = re.fullmatch(r"(\d+)g", conf.get("spark.driver.memory", ""))
+        if memory:
+            spark_args += ["--spark_conf", f"spark.driver.memory={max(1, int(memory.group(1)) // workers)}g"]
+    return spark_args
+
+
+def format_shard_plan(manifest, manifest_path):
+    """
+    Readable shard plan with the command that runs each shard.
+    """
+    lines = [f"Shard plan ({len(manifest['shards'])} shard(s), manifest {manifest_path}):"]
+    for shard in manifest["shards"]:
+        first, last = shard["intervals"][0], shard["intervals"][-1]
+        status = "complete" if shard_complete(shard) else "pending"
+        lines.append(
+            f"  {shard['name']}: {len(shard['intervals'])} interval(s), {shard['bp']:,} bp, "
+            f"{first} .. {last} [{status}]"
+        )
+        lines.append(f"    gvcf-to-vds {' '.join(shard_argv(manifest_path, shard))}")
+    return "\n".join(lines)
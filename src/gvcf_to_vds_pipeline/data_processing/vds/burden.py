@@ -0,0 +1,162 @@
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.vds.table_store import VersionedTable
+from gvcf_to_vds_pipeline.data_processing.vds.variant_qc import _call_expr
+from gvcf_to_vds_pipeline.utils.fingerprint import dataset_signature, fingerprint
+
+BURDEN_CACHE_DIRNAME = "burden_cache"
+_LOCUS_TYPE = hl.ttuple(hl.tstr, hl.tint32, hl.tint32)
+
+
+def _targets_table(gene_loci, reference_genome):
+    """
+    Table keyed by interval with the gene each interval belongs to.
+    """
+    ht = hl.Table.parallelize(
+        [
+            {"gene": gene, "contig": contig, "start": start, "end": end}
+            for gene, loci in gene_loci.items() for contig, start, end in loci
+        ],
+        hl.tstruct(gene=hl.tstr, contig=hl.tstr, start=hl.tint32, end=hl.tint32)
+    )
+    ht = ht.annotate(interval=hl.locus_interval(
+        ht.contig, ht.start, ht.end, includes_end=True, reference_genome=reference_genome
+    ))
+    return ht.key_by("interval").select("gene")
+
+
+def qualifying_counts(vds, gene_loci, new_genes, new_samples, max_af, min_gq, min_dp, af_table=None):
+    """
+    Count qualifying variants per gene and sample in one pass over variant_data.
+
+    A sample's call at a site qualifies if it carries an alternate allele with AF <= max_af
+    and passes the GQ/DP thresholds. AF comes from af_table (keyed by locus, alleles with a
+    per-alternate AF array, e.g. variant_qc output) or, if None, from the VDS cohort as
+    AC / (2 * n_samples). Reference data is never read.
+
+    Only (gene, sample) pairs with a new gene or a new sample are computed.
+    :return: Table keyed by [gene, s] with n_qualifying
+    """
+    vd = vds.variant_data
+    rg = vd.locus.dtype.reference_genome
+    targets = _targets_table(gene_loci, rg)
+    vd = hl.filter_intervals(vd, targets.interval.collect())
+
+    gt = _call_expr(vd)
+    if af_table is not None:
+        af = hl.coalesce(af_table[vd.row_key].AF, hl.empty_array(hl.tfloat64))
+    else:
+        n_samples = vd.count_cols()
+        af = hl.agg.call_stats(gt, vd.alleles).AC[1:].map(lambda ac: ac / (2 * n_samples))
+    vd = vd.annotate_rows(alt_af=af, gene=targets.index(vd.locus, all_matches=True).gene)
+    vd = vd.explode_rows(vd.gene)
+
+    gt = _call_expr(vd)
+    carries_rare = hl.range(gt.ploidy).any(
+        lambda i: (gt[i] > 0) & (hl.or_else(vd.alt_af[gt[i] - 1], 0.0) <= max_af)
+    )
+    passes = hl.is_defined(gt) & carries_rare
+    if min_gq is not None and "GQ" in vd.entry:
+        passes = passes & (hl.or_else(vd.GQ, 0) >= min_gq)
+    if min_dp is not None and "DP" in vd.entry:
+        passes = passes & (hl.or_else(vd.DP, 0) >= min_dp)
+
+    counts = vd.group_rows_by(vd.gene).aggregate(n_qualifying=hl.agg.count_where(passes))
+    counts = counts.filter_entries(
+        hl.literal(set(new_genes), hl.tset(hl.tstr)).contains(counts.gene)
+        | hl.literal(set(new_samples), hl.tset(hl.tstr)).contains(counts.s)
+    )
+    return counts.entries().select("n_qualifying")
+
+
+class BurdenCache(VersionedTable):
+    """
+    Per-(gene, sample) qualifying counts for one set of burden parameters, stored
+    under cache_dir/<fingerprint>/. Globals record which genes (with their loci and
+    a fingerprint of them) and samples have been computed, including genes with no
+    variants. Every cached gene covers every cached sample.
+    """
+
+    def __init__(self, cache_dir, key):
+        super().__init__(f"{cache_dir.rstrip('/')}/{key}")
+
+    def load(self):
+        ht = super().load()
+        # Caches written before the loci were stored cannot be extended to new samples.
+        return ht if ht is not None and "loci" in ht.globals else None
+
+    def save(self, ht, genes, loci, samples):
+        """
+        :param genes: {gene: loci fingerprint}
+        :param loci: {gene: [(contig, start, end), ...]}
+        """
+        return super().save(ht.select_globals(
+            genes=hl.literal(genes, hl.tdict(hl.tstr, hl.tstr)),
+            loci=hl.literal(
+                {gene: [tuple(locus) for locus in gene_loci] for gene, gene_loci in loci.items()},
+                hl.tdict(hl.tstr, hl.tarray(_LOCUS_TYPE))
+            ),
+            samples=hl.literal(sorted(samples), hl.tarray(hl.tstr))
+        ))
+
+
+def burden_counts(vds_path, gene_loci, max_af=0.01, min_gq=20, min_dp=10, af_table_path=None, cache_dir=None):
+    """
+    Genes x samples counts of qualifying rare variants, reusing cached per-gene results.
+
+    Cached results are keyed by the filters and AF source. With a fixed af_table, adding
+    genes or samples only computes the new (gene, sample) pairs. With cohort AF, the AF of
+    every site changes when samples are added, so the sample set is part of the key.
+
+    :param gene_loci: {gene: [(contig, start, end), ...]}, 1-based inclusive
+    :param cache_dir: defaults to <vds_path>/burden_cache
+    :return: MatrixTable with rows keyed by gene, columns by s, entry n_qualifying
+    """
+    vds = hl.vds.read_vds(vds_path)
+    samples = set(vds.variant_data.s.collect())
+    genes = set(gene_loci)
+
+    af_table = hl.read_table(af_table_path) if af_table_path else None
+    key = fingerprint(
+        {"max_af": max_af, "min_gq": min_gq, "min_dp": min_dp},
+        {"af_table": af_table_path, "signature": dataset_signature(af_table_path)} if af_table_path
+        else {"cohort_af_samples": fingerprint(sorted(samples))}
+    )
+    cache = BurdenCache(cache_dir or f"{vds_path.rstrip('/')}/{BURDEN_CACHE_DIRNAME}", key)
+    cached = cache.load()
+    cached_genes, cached_loci, cached_samples = {}, {}, set()
+    if cached is not None:
+        g = hl.eval(cached.globals)
+        cached_genes, cached_samples = dict(g.genes), set(g.samples)
+        cached_loci = {gene: [tuple(locus) for locus in loci] for gene, loci in g.loci.items()}
+
+    # A gene is reused only if it resolved to the same loci (annotation and padding unchanged).
+    gene_fps = {gene: fingerprint(sorted(loci)) for gene, loci in gene_loci.items()}
+    new_genes = {gene for gene, fp in gene_fps.items() if cached_genes.get(gene) != fp}
+    new_samples = samples - cached_samples
+    hl.utils.info(
+        f"[INFO] Burden cache {cache.root}: {len(genes - new_genes)} gene(s) cached, "
+        f"{len(new_genes)} new or changed gene(s), {len(new_samples)} new sample(s)"
+    )
+
+    if new_genes or new_samples:
+        # New samples are counted for every cached gene too, requested now or not,
+        # so that no cached gene is left without them.
+        todo = {**cached_loci, **gene_loci} if new_samples else {g: gene_loci[g] for g in new_genes}
+        fresh = qualifying_counts(vds, todo, new_genes, new_samples, max_af, min_gq, min_dp, af_table)
+        if cached is None:
+            merged = fresh
+        else:
+            stale = hl.literal(new_genes, hl.tset(hl.tstr))
+            merged = cached.filter(~stale.contains(cached.gene)).union(fresh)
+        cached = cache.save(
+            merged, {**cached_genes, **gene_fps}, {**cached_loci, **gene_loci}, samples | cached_samples
+        )
+
+    # Full grid of requested genes x current samples; genes without variants get 0.
+    gene_list, sample_list = sorted(genes), sorted(samples)
+    mt = hl.utils.range_matrix_table(len(gene_list), len(sample_list))
+    mt = mt.key_rows_by(gene=hl.literal(gene_list)[mt.row_idx])
+    mt = mt.key_cols_by(s=hl.literal(sample_list)[mt.col_idx])
+    mt = mt.select_entries(n_qualifying=hl.coalesce(cached[mt.gene, mt.s].n_qualifying, 0))
+    return mt.drop("row_idx", "col_idx")
@@ -0,0 +1,123 @@
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.vds.operations import (
+    parse_intervals,
+    read_sample_file,
+    vds_reference_genome
+)
+from gvcf_to_vds_pipeline.utils.metrics import timed
+
+# Keys a cohort may carry in the cohort spec file.
+COHORT_KEYS = {"intervals", "exclude_samples", "output"}
+
+
+def read_cohort_map(map_path):
+    """
+    Read a sample -> cohort mapping.
+
+    Accepted layouts:
+        - TSV with a header row naming 'sample' (or 's') and 'cohort' columns
+        - headerless two-column TSV of sample and cohort
+    A sample may be listed under several cohorts. Blank lines and lines starting with '#' are ignored.
+
+    :return: dict of cohort -> list of sample IDs, in file order
+    """
+    with open(map_path) as f:
+        rows = [line.rstrip("\n").split("\t") for line in f if line.strip() and not line.startswith("#")]
+    if not rows:
+        raise ValueError(f"{map_path}: no cohort assignments")
+
+    sample_col, cohort_col = 0, 1
+    header = [c.strip().lower() for c in rows[0]]
+    if "cohort" in header:
+        cohort_col = header.index("cohort")
+        sample_col = next((header.index(c) for c in ("sample", "s") if c in header), None)
+        if sample_col is None:
+            raise ValueError(f"{map_path}: header has a 'cohort' column but no 'sample' column")
+        rows = rows[1:]
+
+    cohorts = {}
+    for n, row in enumerate(rows, start=1):
+        if max(sample_col, cohort_col) >= len(row):
+            raise ValueError(f"{map_path}: row {n} needs a sample and a cohort column")
+        sample, cohort = row[sample_col].strip(), row[cohort_col].strip()
+        members = cohorts.setdefault(cohort, [])
+        if sample not in members:
+            members.append(sample)
+    return cohorts
+
+
+def plan_cohorts(cohort_samples, out_dir, spec=None):
+    """
+    Attach output paths and per-cohort filters to the cohort membership.
+
+    :param cohort_samples: dict of cohort -> sample IDs (from read_cohort_map)
+    :param out_dir: cohorts without an 'output' in the spec are written to <out_dir>/<cohort>.vds
+    :param spec: optional {cohorts: {name: {intervals, exclude_samples, output}}}
+    :return: dict of cohort -> {samples, intervals, output}
+    """
+    overrides = (spec or {}).get("cohorts", {})
+    unknown = set(overrides) - set(cohort_samples)
+    if unknown:
+        raise ValueError(f"Cohort spec names cohort(s) with no samples in the map: {sorted(unknown)}")
+
+    plan = {}
+    for cohort, samples in cohort_samples.items():
+        options = overrides.get(cohort) or {}
+        bad_keys = set(options) - COHORT_KEYS
+        if bad_keys:
+            raise ValueError(f"Cohort '{cohort}': unknown key(s) {sorted(bad_keys)}")
+        if options.get("exclude_samples"):
+            excluded = set(read_sample_file(options["exclude_samples"]))
+            samples = [s for s in samples if s not in excluded]
+        output = options.get("output")
+        if not output:
+            if not out_dir:
+                raise ValueError(f"Cohort '{cohort}' has no 'output' path and no output directory was given.")
+            output = f"{out_dir.rstrip('/')}/{cohort}.vds"
+        plan[cohort] = {"samples": samples, "intervals": options.get("intervals"), "output": output}
+
+    outputs = [c["output"] for c in plan.values()]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("Two cohorts would be written to the same output path.")
+    return plan
+
+
+def split_cohorts(vds_path, plan, metrics=None):
+    """
+    Write one VDS per cohort from a single read of the input.
+
+    Cohorts sharing the same interval filter are written together by
+    hl.vds.write_variant_datasets, in one Spark job per group. Samples not in the
+    VDS are reported and skipped; a cohort left with no samples is an error.
+
+    :param plan: output of plan_cohorts
+    :return: dict of cohort -> number of samples written
+    """
+    with timed(metrics, "read"):
+        vds = hl.vds.read_vds(vds_path)
+        present = set(vds.variant_data.s.collect())
+
+    written = {}
+    groups = {}
+    for cohort, options in plan.items():
+        samples = [s for s in options["samples"] if s in present]
+        missing = len(options["samples"]) - len(samples)
+        if missing:
+            hl.utils.warning(f"Cohort '{cohort}': {missing} sample(s) not in {vds_path}; skipped.")
+        if not samples:
+            raise ValueError(f"Cohort '{cohort}' has no samples in {vds_path}.")
+        written[cohort] = len(samples)
+        groups.setdefault(tuple(options["intervals"] or ()), []).append((cohort, samples))
+
+    rg = vds_reference_genome(vds)
+    for n, (intervals, members) in enumerate(groups.items(), start=1):
+        with timed(metrics, f"group{n}:transform"):
+            base = hl.vds.filter_intervals(vds, parse_intervals(intervals, rg)) if intervals else vds
+            subsets = [hl.vds.filter_samples(base, samples, keep=True) for _, samples in members]
+        paths = [plan[cohort]["output"] for cohort, _ in members]
+        with timed(metrics, f"group{n}:write"):
+            hl.vds.write_variant_datasets(subsets, paths, overwrite=True)
+        for cohort, samples in members:
+            hl.utils.info(f"[INFO] Cohort '{cohort}': {len(samples)} sample(s) -> {plan[cohort]['output']}")
+    return written
@@ -0,0 +1,121 @@
+import math
+import statistics
+
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.vds.sample_qc import carry_forward_sample_qc
+from gvcf_to_vds_pipeline.utils.metrics import timed
+from gvcf_to_vds_pipeline.utils.resources import format_bytes
+
+DEFAULT_PARTITION_MB = 128
+
+
+def _part_sizes(directory):
+    if not hl.hadoop_exists(directory):
+        return []
+    parts = [e for e in hl.hadoop_ls(directory) if not e["is_dir"] and e["path"].rsplit("/", 1)[-1].startswith("part-")]
+    return [e["size_bytes"] for e in sorted(parts, key=lambda e: e["path"])]
+
+
+def partition_sizes(mt_path):
+    """
+    On-disk bytes of each partition of a written MatrixTable (row and entry files together).
+    """
+    rows = _part_sizes(f"{mt_path}/rows/rows/parts")
+    entries = _part_sizes(f"{mt_path}/entries/rows/parts")
+    if entries and len(entries) != len(rows):
+        raise ValueError(f"{mt_path}: row and entry partition files do not match")
+    return [r + e for r, e in zip(rows, entries or [0] * len(rows))]
+
+
+def partition_stats(vds_path):
+    """
+    Partition size statistics of reference_data and variant_data, from file sizes only.
+
+    :return: {component: {n_partitions, total_bytes, min_bytes, median_bytes, max_bytes, skew}},
+        where skew is the largest partition over the median
+    """
+    stats = {}
+    for component in ("reference_data", "variant_data"):
+        sizes = partition_sizes(f"{vds_path.rstrip('/')}/{component}")
+        median = statistics.median(sizes) if sizes else 0
+        stats[component] = {
+            "n_partitions": len(sizes),
+            "total_bytes": sum(sizes),
+            "min_bytes": min(sizes, default=0),
+            "median_bytes": median,
+            "max_bytes": max(sizes, default=0),
+            "skew": round(max(sizes) / median, 2) if median else None,
+        }
+    return stats
+
+
+def format_partition_stats(before, after):
+    """
+    Side-by-side before/after table of partition_stats.
+    """
+    lines = [f"{'':<16}{'':<8}{'partitions':>11}{'total':>12}{'min':>12}{'median':>12}{'max':>12}{'max/median':>12}"]
+    for component in ("reference_data", "variant_data"):
+        for label, stats in (("before", before), ("after", after)):
+            s = stats[component]
+            lines.append(
+                f"{component:<16}{label:<8}{s['n_partitions']:>11}{format_bytes(s['total_bytes']):>12}"
+                f"{format_bytes(s['min_bytes']):>12}{format_bytes(s['median_bytes']):>12}"
+                f"{format_bytes(s['max_bytes']):>12}{str(s['skew']):>12}"
+            )
+    return "\n".join(lines)
+
+
+def ref_block_max_length(vds):
+    """
+    The maximum reference block length recorded in the VDS globals, or None if not recorded.
+    """
+    ref = vds.reference_data
+    if "ref_block_max_length" not in ref.globals:
+        return None
+    return hl.eval(ref.ref_block_max_length)
+
+
+def compact_vds(vds_path, out_path, n_partitions=None, partition_mb=DEFAULT_PARTITION_MB,
+                max_ref_block=None, metrics=None):
+    """
+    Rewrite a VDS with balanced partitions and, optionally, reference blocks truncated
+    to at most max_ref_block bases.
+
+    Partition boundaries are recomputed from the reference data's row distribution and
+    applied when the VDS is read, so both components are repartitioned on the same
+    intervals. The maximum reference block length is stored in the output's globals,
+    which lets interval filters on the compacted VDS read only the partitions they need.
+
+    :param n_partitions: target partition count; by default the on-disk size over partition_mb
+    :param max_ref_block: split reference blocks longer than this many bases
+    :return: (partition_stats before, partition_stats after)
+    """
+    if out_path.rstrip("/") == vds_path.rstrip("/"):
+        raise ValueError("compact cannot overwrite its input; write to a new path and swap it in afterwards.")
+
+    with timed(metrics, "read"):
+        before = partition_stats(vds_path)
+        vds = hl.vds.read_vds(vds_path)
+        if n_partitions is None:
+            total = sum(s["total_bytes"] for s in before.values())
+            n_partitions = max(1, math.ceil(total / (partition_mb * 1024 * 1024)))
+        hl.utils.info(f"[INFO] compact: repartitioning into {n_partitions} partition(s)")
+        intervals = vds.reference_data._calculate_new_partitions(n_partitions)
+        vds = hl.vds.read_vds(vds_path, intervals=intervals)
+
+    with timed(metrics, "transform"):
+        if max_ref_block is not None:
+            vds = hl.vds.truncate_reference_blocks(vds, max_ref_block_base_pairs=max_ref_block)
+
+    with timed(metrics, "write"):
+        vds.write(out_path, overwrite=True)
+        if max_ref_block is None:
+            hl.vds.store_ref_block_max_length(out_path)
+        carry_forward_sample_qc(vds_path, out_path)
+
+    after = partition_stats(out_path)
+    hl.utils.info(
+        f"[INFO] compact: max reference block length {ref_block_max_length(hl.vds.read_vds(out_path))} bp"
+    )
+    return before, after
@@ -0,0 +1,47 @@
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.ledger import IngestionLedger
+
+
+def _align_columns(mt, samples, path):
+    order = mt.s.collect()
+    if order == samples:
+        return mt
+    if sorted(order) != sorted(samples):
+        raise ValueError(f"{path} has different samples than the first shard; shards must share one GVCF list")
+    index = {s: i for i, s in enumerate(order)}
+    return mt.choose_cols([index[s] for s in samples])
+
+
+def concat_vds(vds_paths, out_path):
+    """
+    Concatenate VDSs that hold the same samples over disjoint, ordered genomic ranges
+    (e.g. the shards of a sharded combine) into one VDS.
+
+    Rows are unioned in the order given, so the shards' partitions are kept as they
+    are, one after another. Columns are reordered to match the first shard if needed.
+    The ingestion ledgers of the shards are merged into the output.
+    """
+    vdss = [hl.vds.read_vds(p) for p in vds_paths]
+    samples = vdss[0].variant_data.s.collect()
+
+    reference = [_align_columns(v.reference_data, samples, p) for v, p in zip(vdss, vds_paths)]
+    variant = [_align_columns(v.variant_data, samples, p) for v, p in zip(vdss, vds_paths)]
+
+    reference_data = reference[0].union_rows(*reference[1:])
+    if "ref_block_max_length" in reference_data.globals:
+        lengths = [hl.eval(r.ref_block_max_length) for r in reference]
+        reference_data = reference_data.annotate_globals(
+            ref_block_max_length=hl.missing(reference_data.ref_block_max_length.dtype) if None in lengths
+            else max(lengths)
+        )
+    variant_data = variant[0].union_rows(*variant[1:])
+
+    hl.vds.VariantDataset(reference_data, variant_data).write(out_path, overwrite=True)
+
+    ledger = IngestionLedger()
+    shard_ledgers = [IngestionLedger.load(path) for path in vds_paths]
+    for shard_ledger in shard_ledgers:
+        ledger.entries.update(shard_ledger.entries)
+    ledger.complete = all(shard_ledger.complete for shard_ledger in shard_ledgers)
+    ledger.save(out_path)
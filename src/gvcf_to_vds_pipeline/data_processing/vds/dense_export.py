@@ -0,0 +1,90 @@
+import hail as hl
+
+
+def spark_compatible(ht):
+    """
+    Convert top-level Hail types Spark cannot store: loci become contig/position
+    columns, calls become strings (e.g. 0/1) and tuples become arrays.
+    """
+    ht = ht.key_by()
+    fields = {}
+    for name, dtype in ht.row.dtype.items():
+        if isinstance(dtype, hl.tlocus):
+            prefix = "" if name == "locus" else f"{name}_"
+            fields[f"{prefix}contig"] = ht[name].contig
+            fields[f"{prefix}position"] = ht[name].position
+        elif dtype == hl.tcall:
+            fields[name] = hl.str(ht[name])
+        elif isinstance(dtype, hl.ttuple):
+            fields[name] = [ht[name][i] for i in range(len(dtype.types))]
+        else:
+            fields[name] = ht[name]
+    return ht.select(**fields)
+
+
+def global_entries(mt):
+    """
+    Replace the combiner's local-allele entry fields (LGT, LA, LAD) with global GT and AD,
+    keeping DP and GQ, so the dense data can be read by VCF/PLINK tools.
+    """
+    entries = {}
+    if "GT" in mt.entry:
+        entries["GT"] = mt.GT
+    elif "LGT" in mt.entry:
+        entries["GT"] = hl.vds.lgt_to_gt(mt.LGT, mt.LA)
+    if "AD" in mt.entry:
+        entries["AD"] = mt.AD
+    elif "LAD" in mt.entry:
+        entries["AD"] = hl.vds.local_to_global(mt.LAD, mt.LA, hl.len(mt.alleles), fill_value=0, number="R")
+    for field in ("DP", "GQ"):
+        if field in mt.entry:
+            entries[field] = mt[field]
+    return mt.select_entries(**entries)
+
+
+def _contigs(mt):
+    return mt.aggregate_rows(hl.agg.collect_as_set(mt.locus.contig))
+
+
+def export_vcf_shards(mt, out_path, shard_by="partition"):
+    """
+    Export block-gzipped, tabix-indexed VCF shards.
+
+    partition: out_path is a directory with one shard per partition, written in parallel.
+    contig: one <out_path>/<contig>.vcf.bgz per contig; each export is itself parallel.
+    """
+    if shard_by == "partition":
+        hl.export_vcf(mt, out_path, parallel="header_per_shard", tabix=True)
+        return
+    rg = mt.locus.dtype.reference_genome
+    for contig in sorted(_contigs(mt), key=rg.contigs.index):
+        part = hl.filter_intervals(mt, [hl.parse_locus_interval(contig, reference_genome=rg)])
+        hl.export_vcf(part, f"{out_path.rstrip('/')}/{contig}.vcf.bgz", tabix=True)
+
+
+def export_plink(mt, out_path, shard_by="partition"):
+    """
+    Export PLINK .bed/.bim/.fam. Multi-allelic sites are split first, as PLINK is biallelic.
+    With shard_by='contig', writes <out_path>/<contig>.{bed,bim,fam}; otherwise one fileset at out_path.
+    """
+    mt = hl.split_multi_hts(mt)
+    if shard_by == "partition":
+        hl.export_plink(mt, out_path, call=mt.GT, ind_id=mt.s)
+        return
+    rg = mt.locus.dtype.reference_genome
+    for contig in sorted(_contigs(mt), key=rg.contigs.index):
+        part = hl.filter_intervals(mt, [hl.parse_locus_interval(contig, reference_genome=rg)])
+        hl.export_plink(part, f"{out_path.rstrip('/')}/{contig}", call=part.GT, ind_id=part.s)
+
+
+def export_parquet(mt, out_path, shard_by="partition"):
+    """
+    Export entries (one row per variant and sample) as Parquet, one file per partition,
+    or partitioned into contig=<name> directories with shard_by='contig'.
+    """
+    entries = spark_compatible(mt.entries())
+    df = entries.to_spark(flatten=True)
+    writer = df.write.mode("overwrite")
+    if shard_by == "contig":
+        writer = writer.partitionBy("contig")
+    writer.parquet(out_path)
@@ -1,61 +1,334 @@
 # src/data_processing/vds/operations.py
+from collections import Counter, defaultdict
+
 import hail as hl
 
-def filter_samples(vds_path, sample_file, keep=True, out_path=None):
+from gvcf_to_vds_pipeline.data_processing.vds.burden import burden_counts
+from gvcf_to_vds_pipeline.data_processing.vds.dense_export import (
+    export_parquet,
+    export_plink,
+    export_vcf_shards,
+    global_entries,
+    spark_compatible
+)
+from gvcf_to_vds_pipeline.data_processing.vds.sample_filters import read_sample_table, select_samples
+from gvcf_to_vds_pipeline.data_processing.vds.sample_qc import incremental_sample_qc
+from gvcf_to_vds_pipeline.data_processing.vds.shared_reference import write_variant_only
+from gvcf_to_vds_pipeline.data_processing.vds.variant_qc import export_sites_vcf, sparse_variant_qc
+from gvcf_to_vds_pipeline.utils.metrics import timed
+from gvcf_to_vds_pipeline.utils.result_cache import run_cached, step_key, vds_key
+
+
+def read_sample_file(sample_file):
+    """
+    Read one sample ID per line, skipping blank lines.
+    """
+    with open(sample_file) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_intervals(intervals, reference_genome=None):
+    """
+    Parse interval strings (e.g. chr1:1-100000) into Hail locus intervals.
+    Uses Hail's default reference genome if reference_genome is None.
+    """
+    return [hl.parse_locus_interval(i, reference_genome=reference_genome) for i in intervals]
+
+
+def vds_reference_genome(vds):
+    """
+    The reference genome a VariantDataset's loci are on.
+    """
+    return vds.reference_data.locus.dtype.reference_genome
+
+
+def _cached_key(cache, vds_path, op, params):
+    return step_key(vds_key(vds_path), op, params) if cache is not None else None
+
+
+def filter_samples(vds_path, sample_file=None, keep=True, out_path=None, where=None, metadata=None,
+                   recompute_qc=False, cache=None, metrics=None):
     """
-    Filter samples in a VariantDataset by a list of sample IDs.
-    If keep=True, only these samples are retained. Otherwise, these are removed.
+    Filter samples in a VariantDataset by a sample table and/or an expression over
+    per-sample fields (see select_samples). Samples are matched with a join, so large
+    lists are never embedded in the query.
+    If keep=True, only the selected samples are retained. Otherwise, these are removed.
     Overwrites the VDS if out_path is not specified.
+
+    :param cache: optional ResultCache; a result for the same input and parameters is linked instead of recomputed
     """
     if out_path is None:
         out_path = vds_path
+    if not sample_file and not where:
+        raise ValueError("filter_samples needs a sample table, an expression, or both.")
 
-    vds = hl.vds.read_vds(vds_path)
-    with open(sample_file) as f:
-        sample_list = [line.strip() for line in f if line.strip()]
+    def write(path):
+        with timed(metrics, "read"):
+            vds = hl.vds.read_vds(vds_path)
+            selected = select_samples(vds, vds_path, sample_file, where, metadata, recompute_qc)
+
+        with timed(metrics, "transform"):
+            # filter_samples() is a built-in hail.vds function:
+            vds_filtered = hl.vds.filter_samples(vds, selected, keep=keep)
+        with timed(metrics, "write"):
+            vds_filtered.write(path, overwrite=True)
 
-    # filter_samples() is a built-in hail.vds function:
-    vds_filtered = hl.vds.filter_samples(vds, sample_list, keep=keep)
-    vds_filtered.write(out_path, overwrite=True)
+    params = {"samples": sample_file, "keep": keep}
+    params.update({k: v for k, v in (("where", where), ("metadata", metadata)) if v})
+    run_cached(cache, _cached_key(cache, vds_path, "filter_samples", params), "filter_samples", params,
+               vds_path, out_path, write)
 
 
-def filter_intervals(vds_path, intervals, keep=True, out_path=None):
+def filter_intervals(vds_path, intervals, keep=True, out_path=None, cache=None, metrics=None):
     """
     Keep or remove intervals from both reference and variant data.
     Overwrites the input VDS if out_path not provided.
+
+    :param cache: optional ResultCache; a result for the same input and parameters is linked instead of recomputed
     """
     if out_path is None:
         out_path = vds_path
 
-    vds = hl.vds.read_vds(vds_path)
-    parsed_intervals = [hl.parse_locus_interval(i) for i in intervals]
-    vds_filt = hl.vds.filter_intervals(vds, parsed_intervals, keep=keep)
-    vds_filt.write(out_path, overwrite=True)
+    def write(path):
+        with timed(metrics, "read"):
+            vds = hl.vds.read_vds(vds_path)
+        with timed(metrics, "transform"):
+            vds_filt = hl.vds.filter_intervals(
+                vds, parse_intervals(intervals, vds_reference_genome(vds)), keep=keep
+            )
+        with timed(metrics, "write"):
+            vds_filt.write(path, overwrite=True)
+
+    params = {"intervals": list(intervals), "keep": keep}
+    run_cached(cache, _cached_key(cache, vds_path, "filter_intervals", params), "filter_intervals", params,
+               vds_path, out_path, write)
 
 
-def run_sample_qc(vds_path):
+def run_sample_qc(vds_path, recompute=False, metrics=None):
     """
-    Run sample_qc on the variant_data of a VDS, returning a table of metrics.
+    Run sample_qc on a VDS, returning a table of metrics.
+    Results are stored with the VDS; only samples without stored results are computed.
     """
-    vds = hl.vds.read_vds(vds_path)
-    # sample_qc returns a table:
-    qc_ht = hl.vds.sample_qc(vds)
+    with timed(metrics, "transform"):
+        # sample_qc returns a table:
+        qc_ht = incremental_sample_qc(vds_path, recompute=recompute)
     return qc_ht
 
 
-def split_multi(vds_path, out_path, filter_changed_loci=False):
+def disjoint_segments(ranges):
+    """
+    Cut possibly overlapping target ranges at every boundary into disjoint segments,
+    each listing the targets that cover it. Adjacent segments covered by the same
+    targets are joined.
+
+    :param ranges: iterable of (contig, start, end, target), 1-based with end exclusive
+    :return: list of (contig, start, end, sorted target names), end exclusive
+
+    >>> disjoint_segments([("1", 100, 200, "A"), ("1", 150, 300, "B"), ("1", 150, 160, "A")])
+    [('1', 100, 150, ['A']), ('1', 150, 200, ['A', 'B']), ('1', 200, 300, ['B'])]
+    """
+    by_contig = defaultdict(list)
+    for contig, start, end, target in ranges:
+        if end > start:
+            by_contig[contig].append((start, end, target))
+
+    segments = []
+    for contig, contig_ranges in by_contig.items():
+        events = defaultdict(list)
+        for start, end, target in contig_ranges:
+            events[start].append((target, 1))
+            events[end].append((target, -1))
+        active = Counter()
+        bounds = sorted(events)
+        for point, next_point in zip(bounds, bounds[1:]):
+            for target, change in events[point]:
+                active[target] += change
+            targets = sorted(t for t, n in active.items() if n > 0)
+            if not targets:
+                continue
+            last = segments[-1] if segments else None
+            if last and last[0] == contig and last[2] == point and last[3] == targets:
+                segments[-1] = (contig, last[1], next_point, targets)
+            else:
+                segments.append((contig, point, next_point, targets))
+    return segments
+
+
+def _target_segments(targets, rg):
+    """
+    Table of disjoint intervals keyed by interval, each with the targets it belongs to.
+    """
+    names = [name for name, loci in targets.items() for _ in loci]
+    parsed = hl.eval(hl.literal([interval for loci in targets.values() for interval in loci]).map(
+        lambda interval: hl.parse_locus_interval(interval, reference_genome=rg)
+    ))
+    ranges = [
+        (i.start.contig,
+         i.start.position + (0 if i.includes_start else 1),
+         i.end.position + (1 if i.includes_end else 0),
+         name)
+        for i, name in zip(parsed, names)
+    ]
+    return hl.Table.parallelize(
+        [{"interval": hl.Interval(hl.Locus(contig, start, rg), hl.Locus(contig, end - 1, rg), includes_end=True),
+          "targets": covering}
+         for contig, start, end, covering in disjoint_segments(ranges)],
+        hl.tstruct(interval=hl.tinterval(hl.tlocus(rg)), targets=hl.tarray(hl.tstr)),
+        key="interval"
+    )
+
+
+def gene_coverage(vds_path, targets, dp_thresholds=(10, 20), gq_thresholds=(0, 20, 30, 40), metrics=None):
+    """
+    Depth and GQ coverage per target (e.g. gene) and sample, computed with
+    hl.vds.interval_coverage from the reference blocks.
+
+    interval_coverage needs disjoint intervals, so overlapping targets (padded
+    neighbouring genes, -i intervals inside a gene) are cut into disjoint segments,
+    and each segment's coverage is counted once for every target it belongs to.
+
+    :param targets: dict of target name -> list of interval strings (a gene's loci)
+    :return: (per-sample table keyed by [target, s], per-target table averaged over samples)
+    """
+    with timed(metrics, "read"):
+        vds = hl.vds.read_vds(vds_path)
+        rg = vds_reference_genome(vds)
+
+    with timed(metrics, "transform"):
+        segments = _target_segments(targets, rg)
+        cov = hl.vds.interval_coverage(
+            vds, segments, gq_thresholds=tuple(gq_thresholds), dp_thresholds=tuple(dp_thresholds)
+        )
+        # interval_coverage keeps only the interval; look the targets up again.
+        cov = cov.annotate_rows(target=segments[cov.interval].targets).explode_rows("target")
+        # A target may span several segments (overlaps, PAR copies): sum bases, then divide.
+        by_target = cov.group_rows_by(cov.target).aggregate_rows(
+            n_bases=hl.agg.sum(cov.interval_size)
+        ).aggregate(
+            sum_dp=hl.agg.sum(cov.sum_dp),
+            bases_over_dp=hl.agg.array_sum(
+                [cov.bases_over_dp_threshold[i] for i in range(len(dp_thresholds))]
+            ),
+            bases_over_gq=hl.agg.array_sum(
+                [cov.bases_over_gq_threshold[i] for i in range(len(gq_thresholds))]
+            ),
+        )
+        n = hl.float64(by_target.n_bases)
+        by_target = by_target.select_entries(
+            mean_dp=by_target.sum_dp / n,
+            **{f"frac_dp_ge_{t}": by_target.bases_over_dp[i] / n for i, t in enumerate(dp_thresholds)},
+            **{f"frac_gq_ge_{t}": by_target.bases_over_gq[i] / n for i, t in enumerate(gq_thresholds)},
+        )
+        summary = by_target.annotate_rows(
+            n_samples=hl.agg.count(),
+            **{f if f == "mean_dp" else f"mean_{f}": hl.agg.mean(by_target[f]) for f in by_target.entry},
+        ).rows()
+        per_sample = by_target.entries()
+    return per_sample, summary
+
+
+def run_variant_qc(vds_path, out_path, vcf_path=None, intervals=None, metrics=None):
+    """
+    Compute site-level QC (AC, AN, AF, call rate, genotype counts) on the sparse VDS
+    and write it as a Hail Table keyed by [locus, alleles], optionally also as a sites VCF.
+    """
+    with timed(metrics, "read"):
+        vds = hl.vds.read_vds(vds_path)
+    with timed(metrics, "transform"):
+        if intervals:
+            vds = hl.vds.filter_intervals(vds, parse_intervals(intervals, vds_reference_genome(vds)))
+        qc_ht = sparse_variant_qc(vds)
+    with timed(metrics, "write"):
+        qc_ht = qc_ht.checkpoint(out_path, overwrite=True)
+    if vcf_path:
+        with timed(metrics, "export_vcf"):
+            export_sites_vcf(qc_ht, vcf_path)
+
+
+def run_burden(vds_path, gene_loci, out_path, max_af=0.01, min_gq=20, min_dp=10,
+               af_table_path=None, cache_dir=None, metrics=None):
+    """
+    Write a genes x samples table of qualifying rare-variant counts.
+    A .mt path is written as a MatrixTable; anything else is exported as a
+    tab-separated matrix with one row per gene and one column per sample.
+    """
+    with timed(metrics, "transform"):
+        mt = burden_counts(
+            vds_path, gene_loci, max_af=max_af, min_gq=min_gq, min_dp=min_dp,
+            af_table_path=af_table_path, cache_dir=cache_dir
+        )
+    with timed(metrics, "write"):
+        if out_path.rstrip("/").endswith(".mt"):
+            mt.write(out_path, overwrite=True)
+        else:
+            mt.n_qualifying.export(out_path)
+
+
+def write_table(ht, out_path):
+    """
+    Write a Hail Table: native format for .ht paths, Parquet for .parquet paths,
+    otherwise tab-separated text (block-gzipped if the path ends in .bgz).
+    """
+    out_path = out_path.rstrip("/")
+    if out_path.endswith(".ht"):
+        ht.write(out_path, overwrite=True)
+    elif out_path.endswith(".parquet"):
+        spark_compatible(ht).to_spark(flatten=True).write.mode("overwrite").parquet(out_path)
+    else:
+        ht.export(out_path)
+
+
+def split_multi(vds_path, out_path, filter_changed_loci=False, cache=None, metrics=None):
     """
     Split the multi-allelic variants in a VariantDataset.
+    Reference blocks are untouched, so only variant_data is written and
+    reference_data is shared with the input where possible.
+
+    :param cache: optional ResultCache; a result for the same input and parameters is linked instead of recomputed
     """
-    vds = hl.vds.read_vds(vds_path)
-    vds_split = hl.vds.split_multi(vds, filter_changed_loci=filter_changed_loci)
-    vds_split.write(out_path, overwrite=True)
+    def write(path):
+        with timed(metrics, "read"):
+            vds = hl.vds.read_vds(vds_path)
+        with timed(metrics, "transform"):
+            vds_split = hl.vds.split_multi(vds, filter_changed_loci=filter_changed_loci)
+        with timed(metrics, "write"):
+            method = write_variant_only(vds_split, vds_path, path)
+        hl.utils.info(
+            f"[INFO] split_multi: reference_data {'hard-linked from input' if method == 'hardlink' else 'rewritten'}"
+        )
+
+    params = {"filter_changed_loci": filter_changed_loci}
+    run_cached(cache, _cached_key(cache, vds_path, "split_multi", params), "split_multi", params,
+               vds_path, out_path, write)
 
 
-def to_dense_mt(vds_path, out_path):
+def to_dense_mt(vds_path, out_path, intervals=None, samples=None, fmt="mt", shard_by="partition", metrics=None):
     """
     Convert a VariantDataset to a dense MatrixTable for certain analyses.
+    Only the requested intervals and samples are densified. The result is written
+    as a MatrixTable, or exported directly as sharded VCF, PLINK or Parquet.
+
+    :param intervals: interval strings to restrict to; reference blocks are split at their edges
+    :param samples: sample table to keep (see read_sample_table)
+    :param fmt: "mt", "vcf", "plink" or "parquet"
+    :param shard_by: "partition" or "contig", for the export formats
     """
-    vds = hl.vds.read_vds(vds_path)
-    dense_mt = hl.vds.to_dense_mt(vds)
-    dense_mt.write(out_path, overwrite=True)
+    with timed(metrics, "read"):
+        vds = hl.vds.read_vds(vds_path)
+    with timed(metrics, "transform"):
+        if samples:
+            vds = hl.vds.filter_samples(vds, read_sample_table(samples), keep=True)
+        if intervals:
+            vds = hl.vds.filter_intervals(
+                vds, parse_intervals(intervals, vds_reference_genome(vds)), split_reference_blocks=True
+            )
+        dense_mt = hl.vds.to_dense_mt(vds)
+    with timed(metrics, "write"):
+        if fmt == "mt":
+            dense_mt.write(out_path, overwrite=True)
+        elif fmt == "vcf":
+            export_vcf_shards(global_entries(dense_mt), out_path, shard_by)
+        elif fmt == "plink":
+            export_plink(global_entries(dense_mt), out_path, shard_by)
+        else:
+            export_parquet(global_entries(dense_mt), out_path, shard_by)
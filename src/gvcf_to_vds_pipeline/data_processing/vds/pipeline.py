@@ -0,0 +1,174 @@
+import inspect
+import json
+from pathlib import Path
+
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.vds.operations import (
+    parse_intervals,
+    vds_reference_genome
+)
+from gvcf_to_vds_pipeline.data_processing.vds.sample_filters import read_sample_table
+from gvcf_to_vds_pipeline.data_processing.vds.shared_reference import write_variant_only
+from gvcf_to_vds_pipeline.utils.metrics import timed
+from gvcf_to_vds_pipeline.utils.result_cache import check_cacheable_output, run_cached, step_key, vds_key
+
+
+def _split_multi(vds, filter_changed_loci=False):
+    return hl.vds.split_multi(vds, filter_changed_loci=filter_changed_loci)
+
+
+def _filter_samples(vds, samples, keep=True):
+    return hl.vds.filter_samples(vds, read_sample_table(samples), keep=keep)
+
+
+def _filter_intervals(vds, intervals, keep=True):
+    return hl.vds.filter_intervals(vds, parse_intervals(intervals, vds_reference_genome(vds)), keep=keep)
+
+
+def _to_dense_mt(vds):
+    return hl.vds.to_dense_mt(vds)
+
+
+# op name -> (function, required parameters, optional parameters)
+PIPELINE_OPS = {
+    "split_multi": (_split_multi, set(), {"filter_changed_loci"}),
+    "filter_samples": (_filter_samples, {"samples"}, {"keep"}),
+    "filter_intervals": (_filter_intervals, {"intervals"}, {"keep"}),
+    "to_dense_mt": (_to_dense_mt, set(), set()),
+}
+
+# Ops that leave reference_data untouched; their outputs can share it with the input.
+VARIANT_ONLY_OPS = {"split_multi"}
+
+# Keys every step may carry in addition to its operation parameters.
+STEP_KEYS = {"op", "output", "checkpoint"}
+
+
+def load_pipeline_spec(spec_path):
+    """
+    Load a pipeline step file (.json, or .yaml/.yml if PyYAML is installed).
+
+    Expected layout:
+        input: path to the input VDS
+        steps: list of {op: <name>, <params>..., output: <path>, checkpoint: <path>}
+    """
+    spec_path = Path(spec_path)
+    with spec_path.open() as f:
+        if spec_path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Reading YAML pipeline files requires PyYAML (pip install pyyaml).")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def validate_pipeline_spec(spec):
+    """
+    Check the step list before any data is touched. Raises ValueError on the first problem.
+    """
+    if not spec.get("input"):
+        raise ValueError("Pipeline spec needs an 'input' VDS path.")
+    steps = spec.get("steps")
+    if not steps:
+        raise ValueError("Pipeline spec needs a non-empty 'steps' list.")
+
+    for n, step in enumerate(steps, start=1):
+        op = step.get("op")
+        if op not in PIPELINE_OPS:
+            raise ValueError(f"Step {n}: unknown op '{op}'. Choose from: {', '.join(PIPELINE_OPS)}")
+        _, required, optional = PIPELINE_OPS[op]
+        params = set(step) - STEP_KEYS
+        missing = required - params
+        if missing:
+            raise ValueError(f"Step {n} ({op}): missing parameter(s) {sorted(missing)}")
+        unknown = params - required - optional
+        if unknown:
+            raise ValueError(f"Step {n} ({op}): unknown parameter(s) {sorted(unknown)}")
+        if op == "to_dense_mt":
+            if n != len(steps):
+                raise ValueError(f"Step {n}: to_dense_mt produces a MatrixTable and must be the last step.")
+            if not step.get("output"):
+                raise ValueError(f"Step {n}: to_dense_mt needs an 'output' path.")
+
+    if not any(step.get("output") for step in steps):
+        raise ValueError("No step is marked with an 'output' path; the pipeline would write nothing.")
+
+
+def _params_with_defaults(func, params):
+    """
+    Step parameters with the op's defaults filled in, so equivalent steps get the same cache key.
+    """
+    defaults = {
+        name: p.default for name, p in inspect.signature(func).parameters.items()
+        if p.default is not inspect.Parameter.empty
+    }
+    return {**defaults, **params}
+
+
+def run_pipeline(spec, metrics=None, cache=None):
+    """
+    Compose the steps lazily on one VDS. Data is only written at steps with an
+    'output' or a 'checkpoint' path. Outputs in the middle of the pipeline are
+    read back, so later steps continue from the written data instead of
+    recomputing everything from the input.
+    While only variant-only ops have run since the last written VDS, outputs
+    share its reference_data instead of rewriting it.
+    With a ResultCache, each written step is keyed by the input and every step up to it;
+    a cached step is linked, and the lazily composed steps before it never run.
+    Returns the list of paths written.
+    """
+    validate_pipeline_spec(spec)
+
+    steps = spec["steps"]
+    if cache is not None:
+        for n, step in enumerate(steps, start=1):
+            for field in ("checkpoint", "output"):
+                if step.get(field):
+                    check_cacheable_output(step[field], f"Step {n} {field}")
+    with timed(metrics, "read"):
+        ds = hl.vds.read_vds(spec["input"])
+    # Written VDS whose reference_data ds still carries unchanged, if any.
+    reference_source = spec["input"]
+
+    key = vds_key(spec["input"]) if cache is not None else None
+
+    def write(ds, path, read_back, op, params):
+        def write_to(target):
+            if reference_source is not None and isinstance(ds, hl.vds.VariantDataset):
+                write_variant_only(ds, reference_source, target)
+            else:
+                ds.write(target, overwrite=True)
+
+        run_cached(cache, key, op, params, spec["input"], path, write_to)
+        if not read_back:
+            return ds
+        return hl.vds.read_vds(path) if isinstance(ds, hl.vds.VariantDataset) else hl.read_matrix_table(path)
+
+    written = []
+    for n, step in enumerate(steps, start=1):
+        func, _, _ = PIPELINE_OPS[step["op"]]
+        params = {k: v for k, v in step.items() if k not in STEP_KEYS}
+        with timed(metrics, f"step{n}:{step['op']}"):
+            ds = func(ds, **params)
+        if cache is not None:
+            key = step_key(key, step["op"], _params_with_defaults(func, params))
+        if step["op"] not in VARIANT_ONLY_OPS:
+            reference_source = None
+
+        if step.get("checkpoint"):
+            with timed(metrics, f"step{n}:checkpoint"):
+                ds = write(ds, step["checkpoint"], True, step["op"], params)
+            reference_source = step["checkpoint"]
+            hl.utils.info(f"[INFO] Step {n} ({step['op']}): checkpointed -> {step['checkpoint']}")
+            written.append(step["checkpoint"])
+        if step.get("output"):
+            with timed(metrics, f"step{n}:write"):
+                ds = write(ds, step["output"], n < len(steps), step["op"], params)
+            if n < len(steps):
+                reference_source = step["output"]
+            hl.utils.info(f"[INFO] Step {n} ({step['op']}): wrote -> {step['output']}")
+            written.append(step["output"])
+
+    return written
@@ -0,0 +1,111 @@
+import ast
+
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.vds.sample_qc import incremental_sample_qc
+
+# Column names accepted as the sample ID in sample tables, in any case.
+SAMPLE_ID_COLUMNS = ("s", "sample")
+
+
+def _sample_id_column(columns):
+    """
+    The first column named like a sample ID column (case-insensitive), or None.
+    """
+    return next((c for c in columns if c.lower() in SAMPLE_ID_COLUMNS), None)
+
+
+def _key_by_sample(ht, path, column=None):
+    column = column or _sample_id_column(ht.row)
+    if column is None:
+        raise ValueError(f"{path}: no sample ID column (expected one of {', '.join(SAMPLE_ID_COLUMNS)})")
+    ht = ht.key_by()
+    if column != "s":
+        ht = ht.rename({column: "s"})
+    return ht.key_by("s")
+
+
+def read_sample_table(path):
+    """
+    Read a sample table keyed by s, to filter by join instead of an in-memory list.
+
+    Accepted inputs:
+        - Hail Table (.ht) with an 's' or 'sample' field
+        - Parquet with an 's' or 'sample' column
+        - TSV with a header row naming an 's' or 'sample' column in any position;
+          sample IDs are read as strings, other columns are kept (types imputed)
+          and can be used in filter expressions
+        - plain text with one sample ID per line
+    Column names are matched in any case (e.g. 'Sample'). The first non-blank line of
+    a text file is a header if one of its columns is such a name.
+    Blank lines and lines starting with '#' are ignored in text files.
+    """
+    path = path.rstrip("/")
+    if path.endswith(".ht"):
+        return _key_by_sample(hl.read_table(path), path)
+    if path.endswith(".parquet"):
+        from pyspark.sql import SparkSession
+
+        df = SparkSession.builder.getOrCreate().read.parquet(path)
+        return _key_by_sample(hl.Table.from_spark(df), path)
+
+    with hl.hadoop_open(path) as f:
+        first = next((line for line in f if line.strip() and not line.startswith("#")), "")
+    column = _sample_id_column(c.strip() for c in first.split("\t"))
+    if column is not None:
+        # Sample IDs stay strings (e.g. "1001") to join with the VDS's s; other columns are imputed.
+        ht = hl.import_table(
+            path, impute=True, types={column: hl.tstr}, comment="#", skip_blank_lines=True, missing=""
+        )
+        return _key_by_sample(ht, path, column)
+    ht = hl.import_table(path, no_header=True, comment="#", skip_blank_lines=True)
+    return ht.select(s=ht.f0.strip()).key_by("s")
+
+
+def _eval_where(ht, where):
+    fields = {name: ht[name] for name in ht.row if name != "s"}
+    try:
+        condition = eval(compile(where, "<where>", "eval"), {"hl": hl, "__builtins__": {}}, fields)
+    except NameError as e:
+        raise ValueError(f"Sample filter '{where}': {e}. Available fields: {', '.join(sorted(fields))}")
+    if not isinstance(condition, hl.expr.BooleanExpression):
+        raise ValueError(f"Sample filter '{where}' is not a boolean expression over sample fields.")
+    return condition
+
+
+def select_samples(vds, vds_path, sample_table=None, where=None, metadata=None, recompute_qc=False):
+    """
+    Samples of the VDS selected by a sample table and/or a boolean expression.
+
+    The expression is Python over the per-sample fields, e.g. "call_rate < 0.95" or
+    "(n_singleton > 500) | (ancestry == 'AFR')". Fields come from the extra columns of
+    sample_table, from metadata, and from the sample QC stored with the VDS, which is
+    only read (or computed for new samples) if the expression uses a field not found
+    elsewhere. Samples whose value is missing do not match.
+    With both a table and an expression, a sample must be in the table and match.
+
+    :param vds: the VariantDataset read from vds_path
+    :param sample_table: path of a table for read_sample_table
+    :param metadata: path of a per-sample table (same formats) providing fields for where
+    :return: Table keyed by s
+    """
+    samples = vds.variant_data.cols().select()
+    tables = [read_sample_table(p) for p in (sample_table, metadata) if p]
+    if sample_table:
+        samples = samples.filter(hl.is_defined(tables[0][samples.s]))
+    if not where:
+        return samples
+
+    known = {name for t in tables for name in t.row if name != "s"}
+    names = {node.id for node in ast.walk(ast.parse(where, mode="eval")) if isinstance(node, ast.Name)} - {"hl"}
+    if names - known:
+        tables.append(incremental_sample_qc(vds_path, recompute=recompute_qc))
+
+    fields = {}
+    for t in tables:
+        for name in t.row:
+            if name != "s" and name not in fields:
+                fields[name] = t[samples.s][name]
+    samples = samples.annotate(**fields)
+    samples = samples.filter(hl.or_else(_eval_where(samples, where), False))
+    return samples.select()
@@ -0,0 +1,131 @@
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.vds.table_store import VersionedTable
+from gvcf_to_vds_pipeline.utils.fingerprint import dataset_signature, fingerprint
+
+SAMPLE_QC_DIRNAME = "sample_qc"
+# Bump when the stored metrics change, so older results are recomputed.
+SAMPLE_QC_VERSION = 2
+# sample_qc fields that depend on allele counts across the whole cohort, not just the sample.
+COHORT_FIELDS = ("n_singleton", "n_singleton_ti", "n_singleton_tv", "r_ti_tv_singleton")
+
+
+def sample_qc_store(vds_path):
+    """
+    Stored per-sample QC results of a VDS, kept inside the VDS directory.
+    """
+    return VersionedTable(f"{vds_path.rstrip('/')}/{SAMPLE_QC_DIRNAME}")
+
+
+def vds_qc_signature(vds_path):
+    return str(dataset_signature(vds_path))
+
+
+def cohort_singletons(vds):
+    """
+    Per-sample singleton counts over the whole cohort: alleles carried by the
+    sample whose allele count across all samples in the VDS is exactly one.
+
+    :return: Table keyed by s with the COHORT_FIELDS
+    """
+    vd = vds.variant_data
+    gt = vd.GT if "GT" in vd.entry else hl.vds.lgt_to_gt(vd.LGT, vd.LA)
+    vd = vd.annotate_entries(_GT=gt)
+    vd = vd.annotate_rows(_AC=hl.agg.call_stats(vd._GT, hl.len(vd.alleles)).AC)
+    singleton = hl.range(1, hl.len(vd.alleles)).filter(
+        lambda i: (vd._AC[i] == 1) & hl.or_else(vd._GT.one_hot_alleles(hl.len(vd.alleles))[i] > 0, False)
+    )
+    ti = singleton.filter(lambda i: hl.is_transition(vd.alleles[0], vd.alleles[i]))
+    tv = singleton.filter(lambda i: hl.is_transversion(vd.alleles[0], vd.alleles[i]))
+    vd = vd.annotate_cols(
+        n_singleton=hl.agg.sum(hl.len(singleton)),
+        n_singleton_ti=hl.agg.sum(hl.len(ti)),
+        n_singleton_tv=hl.agg.sum(hl.len(tv)),
+    )
+    ht = vd.cols()
+    return ht.select(
+        ht.n_singleton, ht.n_singleton_ti, ht.n_singleton_tv,
+        r_ti_tv_singleton=hl.divide_null(hl.float64(ht.n_singleton_ti), ht.n_singleton_tv),
+    )
+
+
+def _load_valid(store, vds_path):
+    """
+    Stored results, or None if they were made by another QC version or for a
+    dataset other than the one at vds_path.
+    """
+    cached = store.load()
+    if cached is None:
+        return None
+    if "qc_version" not in cached.globals or hl.eval(cached.qc_version) != SAMPLE_QC_VERSION:
+        hl.utils.info("[INFO] Stored sample QC was computed by an older version; recomputing.")
+        return None
+    if "vds_signature" not in cached.globals or hl.eval(cached.vds_signature) != vds_qc_signature(vds_path):
+        hl.utils.info("[INFO] Stored sample QC was computed for different data; recomputing.")
+        return None
+    return cached
+
+
+def incremental_sample_qc(vds_path, recompute=False):
+    """
+    hl.vds.sample_qc results for every sample in the VDS, computing only samples
+    missing from the stored results. Most metrics depend only on the sample's calls
+    and reference blocks, so stored rows stay valid when samples are added or removed.
+    The singleton counts (COHORT_FIELDS) depend on allele counts across the cohort,
+    so they are recomputed for every sample from variant_data whenever the sample set changes.
+
+    Stored results are used only if their QC version and VDS signature match;
+    otherwise every sample is computed again.
+
+    :param recompute: ignore stored results and compute every sample
+    :return: Table keyed by s
+    """
+    vds = hl.vds.read_vds(vds_path)
+    samples = set(vds.variant_data.s.collect())
+    sample_set = fingerprint(sorted(samples))
+    store = sample_qc_store(vds_path)
+
+    cached = None if recompute else _load_valid(store, vds_path)
+    if cached is not None and hl.eval(cached.sample_set) == sample_set:
+        return cached
+    cached_samples = set(cached.s.collect()) if cached is not None else set()
+
+    new_samples = samples - cached_samples
+    removed = cached_samples - samples
+    hl.utils.info(
+        f"[INFO] Sample QC: {len(samples & cached_samples)} stored, {len(new_samples)} to compute, "
+        f"{len(removed)} dropped"
+    )
+
+    if cached is None:
+        merged = hl.vds.sample_qc(vds)
+    else:
+        # Singletons are cohort-wide: keep the per-sample metrics only and recount them.
+        parts = [cached.filter(hl.literal(samples, hl.tset(hl.tstr)).contains(cached.s))]
+        if new_samples:
+            parts.append(hl.vds.sample_qc(hl.vds.filter_samples(vds, sorted(new_samples), keep=True)))
+        parts = [p.drop(*[f for f in COHORT_FIELDS if f in p.row]) for p in parts]
+        merged = parts[0].union(*parts[1:]) if len(parts) > 1 else parts[0]
+        hl.utils.info("[INFO] Sample QC: recounting singletons over the whole cohort")
+        merged = merged.annotate(**cohort_singletons(vds)[merged.s])
+
+    merged = merged.select_globals(
+        qc_version=SAMPLE_QC_VERSION,
+        sample_set=sample_set,
+        vds_signature=vds_qc_signature(vds_path),
+    )
+    return store.save(merged)
+
+
+def carry_forward_sample_qc(existing_vds, output_path):
+    """
+    Copy stored sample QC of existing_vds into a VDS written from it (a combine
+    adding samples, or a rewrite of the same data), so the next sample_qc run only
+    computes the new samples. The copy is stamped with the output's signature; its
+    sample-set fingerprint stays that of existing_vds, so if samples were added the
+    singleton counts are recounted over the new cohort before they are used.
+    """
+    store = sample_qc_store(existing_vds)
+    cached = _load_valid(store, existing_vds) if store.latest_path() else None
+    if cached is not None:
+        sample_qc_store(output_path).save(cached.annotate_globals(vds_signature=vds_qc_signature(output_path)))
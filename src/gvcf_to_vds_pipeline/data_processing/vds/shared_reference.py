@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import time
+
+import hail as hl
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import is_remote, to_local_path
+
+REFERENCE_DATA = "reference_data"
+VARIANT_DATA = "variant_data"
+# Written next to reference_data/ when it was shared from another VDS.
+SHARED_REFERENCE_FILENAME = "reference_data.shared.json"
+
+
+def _tree_files(root):
+    """
+    {relative path: size} of every file under root.
+    """
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            files[os.path.relpath(full, root)] = os.path.getsize(full)
+    return files
+
+
+def _link_tree(src, dst):
+    """
+    Recreate the directory tree of src at dst, hard-linking every file.
+    Hail never modifies a written file in place, so linked files stay valid even if
+    the source VDS is later overwritten (that unlinks its names, not the data).
+    """
+    for dirpath, _, filenames in os.walk(src):
+        target_dir = os.path.join(dst, os.path.relpath(dirpath, src))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in filenames:
+            os.link(os.path.join(dirpath, name), os.path.join(target_dir, name))
+
+
+def share_reference_data(source_vds_path, out_path):
+    """
+    Make out_path/reference_data a hard-linked copy of source_vds_path/reference_data.
+
+    :return: the integrity record written to SHARED_REFERENCE_FILENAME, or None if the
+        data could not be linked (remote filesystem, different device, no permission)
+    """
+    if is_remote(source_vds_path) or is_remote(out_path):
+        return None
+
+    src = os.path.join(to_local_path(source_vds_path), REFERENCE_DATA)
+    dst = os.path.join(to_local_path(out_path), REFERENCE_DATA)
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+    try:
+        _link_tree(src, dst)
+    except OSError as e:
+        shutil.rmtree(dst, ignore_errors=True)
+        hl.utils.info(f"[INFO] Cannot hard-link reference data ({e}); writing a full copy instead.")
+        return None
+
+    files = _tree_files(dst)
+    if files != _tree_files(src):
+        raise RuntimeError(f"Linked reference data at {dst} does not match {src}")
+
+    record = {
+        "source": os.path.abspath(src),
+        "method": "hardlink",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n_files": len(files),
+        "total_bytes": sum(files.values()),
+        "files": files,
+    }
+    with open(os.path.join(to_local_path(out_path), SHARED_REFERENCE_FILENAME), "w") as f:
+        json.dump(record, f, indent=2)
+    return record
+
+
+def write_variant_only(vds, source_vds_path, out_path):
+    """
+    Write a VDS whose reference_data is unchanged from source_vds_path.
+    Only variant_data is written through Hail; reference_data is hard-linked from the
+    source when both are on the same local filesystem, and written in full otherwise.
+
+    :param vds: VariantDataset whose reference_data is exactly that of source_vds_path
+    :return: "hardlink" or "write", how reference_data was produced
+    """
+    if os.path.normpath(str(source_vds_path)) == os.path.normpath(str(out_path)):
+        raise ValueError("Variant-only writes need an output path different from the input VDS.")
+
+    vds.variant_data.write(os.path.join(str(out_path), VARIANT_DATA), overwrite=True)
+    if share_reference_data(source_vds_path, out_path) is not None:
+        return "hardlink"
+
+    vds.reference_data.write(os.path.join(str(out_path), REFERENCE_DATA), overwrite=True)
+    stale_record = os.path.join(to_local_path(out_path), SHARED_REFERENCE_FILENAME)
+    if not is_remote(out_path) and os.path.exists(stale_record):
+        os.remove(stale_record)
+    return "write"
@@ -0,0 +1,45 @@
+import os
+
+import hail as hl
+
+
+class VersionedTable:
+    """
+    A Hail Table that is replaced as a whole, stored as root/v<N>.ht.
+
+    Hail cannot overwrite a table while reading from it, so each save writes the
+    next version and then removes the older ones.
+    """
+
+    def __init__(self, root):
+        self.root = root.rstrip("/")
+
+    def versions(self):
+        if not hl.hadoop_exists(self.root):
+            return []
+        return sorted(
+            int(os.path.basename(e["path"].rstrip("/"))[1:-3])
+            for e in hl.hadoop_ls(self.root)
+            if e["is_dir"] and e["path"].rstrip("/").endswith(".ht")
+        )
+
+    def latest_path(self):
+        versions = self.versions()
+        return f"{self.root}/v{versions[-1]}.ht" if versions else None
+
+    def load(self):
+        """
+        Latest version, or None if nothing was saved yet.
+        """
+        path = self.latest_path()
+        return hl.read_table(path) if path else None
+
+    def save(self, ht):
+        """
+        Write ht as the next version and return it read back.
+        """
+        versions = self.versions()
+        ht = ht.checkpoint(f"{self.root}/v{(versions[-1] + 1) if versions else 1}.ht", overwrite=True)
+        for old in versions:
+            hl.current_backend().fs.rmtree(f"{self.root}/v{old}.ht")
+        return ht
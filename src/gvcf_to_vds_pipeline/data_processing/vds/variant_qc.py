@@ -0,0 +1,125 @@
+import hail as hl
+
+
+def _reference_block_length(ref):
+    """
+    Bases covered by each reference block after its first, from END (or LEN in newer Hail).
+    """
+    if "END" in ref.entry:
+        return ref.END - ref.locus.position
+    return ref.LEN - 1
+
+
+def _call_expr(vd):
+    if "GT" in vd.entry:
+        return vd.GT
+    return hl.vds.lgt_to_gt(vd.LGT, vd.LA)
+
+
+def reference_coverage_at_sites(vds):
+    """
+    Number of samples whose reference blocks cover each variant site, without densifying.
+
+    Each block adds +1 at its start and -1 just past its end. Events are keyed by locus,
+    merged with the variant sites, and a running sum over them gives the coverage at
+    every site. Only the block-end events need sorting, never the sample x site matrix.
+
+    :return: Table keyed by locus with an int64 field n_ref
+    """
+    ref = vds.reference_data
+    length = _reference_block_length(ref)
+    blocks = ref.select_rows(
+        n_starts=hl.agg.count_where(hl.is_defined(length)),
+        lengths=hl.agg.filter(hl.is_defined(length), hl.agg.counter(length)),
+    ).rows()
+
+    starts = blocks.select(delta=hl.int64(blocks.n_starts), is_site=False)
+
+    ends = blocks.select(end=hl.array(blocks.lengths))
+    ends = ends.explode("end")
+    # Global positions let a block ending on a contig's last base decrement at the next contig's start.
+    end_gpos = ends.locus.global_position() + ends.end[0] + 1
+    ends = ends.key_by(
+        locus=hl.or_missing(
+            end_gpos < hl.int64(sum(ends.locus.dtype.reference_genome.lengths.values())),
+            hl.locus_from_global_position(end_gpos, reference_genome=ends.locus.dtype.reference_genome)
+        )
+    )
+    ends = ends.filter(hl.is_defined(ends.locus))
+    ends = ends.select(delta=-ends.end[1], is_site=False)
+
+    sites = vds.variant_data.rows().key_by("locus")
+    sites = sites.select(delta=hl.int64(0), is_site=True)
+
+    events = starts.union(ends, sites)
+    events = events.group_by(events.locus).aggregate(
+        delta=hl.agg.sum(events.delta),
+        is_site=hl.agg.any(events.is_site),
+    )
+    events = events.annotate(n_ref=hl.scan.sum(events.delta) + events.delta)
+    return events.filter(events.is_site).select("n_ref")
+
+
+def sparse_variant_qc(vds):
+    """
+    Site-level AC, AN, AF, call rate and genotype counts from a sparse VDS.
+
+    Calls in variant_data are counted with hl.agg.call_stats; samples with no call at
+    a site but a reference block over it count as homozygous reference (diploid).
+
+    :return: Table keyed by [locus, alleles]; AC, AF and homozygote_count are per
+        alternate allele
+    """
+    vd = vds.variant_data
+    n_samples = vd.count_cols()
+    coverage = reference_coverage_at_sites(vds)
+
+    gt = _call_expr(vd)
+    vd = vd.annotate_rows(n_ref=hl.coalesce(coverage[vd.locus].n_ref, 0))
+    qc = vd.annotate_rows(
+        call_stats=hl.agg.call_stats(gt, vd.alleles),
+        n_called_variant=hl.agg.count_where(hl.is_defined(gt)),
+        n_het=hl.agg.count_where(gt.is_het()),
+        n_hom_var=hl.agg.count_where(gt.is_hom_var()),
+        n_hom_ref_variant=hl.agg.count_where(gt.is_hom_ref()),
+    ).rows()
+
+    cs = qc.call_stats
+    an = cs.AN + 2 * hl.int32(qc.n_ref)
+    ac = cs.AC[1:]
+    n_called = qc.n_called_variant + qc.n_ref
+    return qc.select(
+        AC=ac,
+        AN=an,
+        AF=hl.or_missing(an > 0, ac.map(lambda c: c / an)),
+        homozygote_count=cs.homozygote_count[1:],
+        n_called=n_called,
+        call_rate=n_called / n_samples,
+        n_het=qc.n_het,
+        n_hom_var=qc.n_hom_var,
+        n_hom_ref=qc.n_hom_ref_variant + qc.n_ref,
+    )
+
+
+VCF_INFO_METADATA = {
+    "AC": {"Number": "A", "Type": "Integer", "Description": "Allele count in genotypes, per alternate allele"},
+    "AN": {"Number": "1", "Type": "Integer", "Description": "Total number of called alleles, including reference blocks"},
+    "AF": {"Number": "A", "Type": "Float", "Description": "Allele frequency, per alternate allele"},
+    "nhomalt": {"Number": "A", "Type": "Integer", "Description": "Number of homozygous individuals, per alternate allele"},
+    "call_rate": {"Number": "1", "Type": "Float", "Description": "Fraction of samples with a call or reference block"},
+    "n_het": {"Number": "1", "Type": "Integer", "Description": "Number of heterozygous samples"},
+}
+
+
+def export_sites_vcf(ht, out_path):
+    """
+    Export the output of sparse_variant_qc as a sites-only VCF (tabix-indexed if bgzipped).
+    """
+    sites = ht.select(info=hl.struct(
+        AC=ht.AC, AN=ht.AN, AF=ht.AF, nhomalt=ht.homozygote_count, call_rate=ht.call_rate, n_het=ht.n_het
+    ))
+    hl.export_vcf(
+        sites, out_path,
+        metadata={"info": VCF_INFO_METADATA},
+        tabix=out_path.endswith((".bgz", ".gz"))
+    )
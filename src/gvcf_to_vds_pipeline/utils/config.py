@@ -9,11 +9,18 @@ def load_gene_config():
     with config_path.open() as f:
         return json.load(f)
 
-def get_target_genes():
+def gene_set_names():
     """
-    Example function that returns a list of genes from config.
+    Names of the gene panels defined in gene_config.json.
+    """
+    return sorted(load_gene_config())
+
+def get_target_genes(gene_set):
+    """
+    Returns the genes of a named panel from gene_config.json (e.g. intersect_genes_tshc),
+    with surrounding whitespace stripped and blank names dropped.
     """
     data = load_gene_config()
-    if "target_genes" in data:
-        return data["target_genes"]
-    return []
+    if gene_set not in data:
+        raise ValueError(f"Unknown gene set '{gene_set}'. Choose from: {', '.join(sorted(data))}")
+    return [g.strip() for g in data[gene_set] if g.strip()]
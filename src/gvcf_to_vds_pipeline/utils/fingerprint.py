@@ -0,0 +1,25 @@
+import hashlib
+import json
+
+
+def fingerprint(*parts, length=16):
+    """
+    Short, stable hash of JSON-serialisable parameters, used to key cached results.
+    Dict key order does not matter; list order does.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:length]
+
+
+def dataset_signature(path):
+    """
+    (size, modification time) of the _SUCCESS marker Hail writes when a Table,
+    MatrixTable or VDS component finishes, so rewrites of the dataset are detected.
+    """
+    import hail as hl
+
+    for marker in (f"{path}/_SUCCESS", f"{path}/variant_data/_SUCCESS"):
+        if hl.hadoop_exists(marker):
+            st = hl.hadoop_stat(marker)
+            return st["size_bytes"], st["modification_time"]
+    raise ValueError(f"{path} is not a completely written Hail dataset")
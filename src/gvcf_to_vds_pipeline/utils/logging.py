@@ -5,8 +5,13 @@ def setup_logging(level=logging.INFO):
     logger = logging.getLogger("hail_vds_pipeline")
     logger.setLevel(level)
 
+    # Calling this twice (e.g. in the session server) must not duplicate output.
+    if any(getattr(h, "_pipeline_console", False) for h in logger.handlers):
+        return logger
+
     ch = logging.StreamHandler(sys.stdout)
     ch.setLevel(level)
+    ch._pipeline_console = True
     formatter = logging.Formatter(
         "[%(asctime)s] [%(levelname)s] %(name)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
@@ -0,0 +1,237 @@
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import urllib.request
+
+from gvcf_to_vds_pipeline.utils.resources import format_bytes
+
+logger = logging.getLogger("hail_vds_pipeline")
+
+# Stage fields summed into the report's Spark totals.
+STAGE_TOTAL_FIELDS = (
+    "numTasks", "executorRunTime", "executorCpuTime", "jvmGcTime",
+    "inputBytes", "outputBytes", "shuffleReadBytes", "shuffleWriteBytes",
+    "memoryBytesSpilled", "diskBytesSpilled",
+)
+
+
+def _spark_stages(sc):
+    with urllib.request.urlopen(f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}/stages", timeout=10) as r:
+        return json.load(r)
+
+
+def last_stage_id(sc):
+    """
+    Highest Spark stage ID submitted so far (-1 before the first stage), or None if
+    the Spark UI cannot be read. Stages created later have higher IDs.
+    """
+    if not sc.uiWebUrl:
+        return None
+    try:
+        return max((s.get("stageId", -1) for s in _spark_stages(sc)), default=-1)
+    except (OSError, ValueError):
+        return None
+
+
+class RunMetrics:
+    """
+    Timers and counters for one command run, written as a JSON report.
+
+    Phase timing is always on and costs nothing measurable. Data sizes, output
+    row/partition counts and Spark stage metrics are only collected when the run
+    is enabled (--report_metrics or --metrics_out).
+    """
+
+    def __init__(self, command, argv=None, enabled=False, report_path=None):
+        self.command = command
+        self.argv = argv if argv is not None else sys.argv[1:]
+        self.enabled = enabled or report_path is not None
+        self.report_path = report_path
+        self.started = time.time()
+        self.phases = []
+        self.inputs = []
+        self.outputs = []
+        self.counters = {}
+        self.spark = None
+        self.status = "running"
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            args.command,
+            enabled=getattr(args, "report_metrics", False),
+            report_path=getattr(args, "metrics_out", None)
+        )
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Time a block of work, e.g. 'read', 'transform' or 'write'.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - start
+            self.phases.append({"name": name, "seconds": round(elapsed, 3)})
+            logger.info(f"{self.command}: phase '{name}' took {elapsed:.1f}s")
+
+    def count(self, key, value):
+        self.counters[key] = value
+
+    def record_input(self, path):
+        if self.enabled:
+            self.inputs.append({"path": str(path), "bytes": path_size(path)})
+
+    def record_output(self, path, kind=None):
+        """
+        Record a written dataset's size and, for Hail tables/matrix tables/VDSs,
+        its partition and row counts (read from metadata, no extra pass over the data).
+        """
+        if not self.enabled:
+            return
+        entry = {"path": str(path), "bytes": path_size(path)}
+        if kind:
+            entry.update(dataset_counts(path, kind))
+        self.outputs.append(entry)
+
+    def collect_spark_metrics(self, sc, after_stage=None):
+        """
+        Pull per-stage task metrics (shuffle, spill, GC time, ...) from the Spark UI's REST API.
+
+        :param after_stage: only count stages with a higher ID (see last_stage_id), for a
+            run sharing its Spark session with earlier ones
+        """
+        if not self.enabled:
+            return
+        if not sc.uiWebUrl:
+            self.spark = {"error": "Spark UI disabled; no stage metrics available"}
+            return
+        try:
+            stages = _spark_stages(sc)
+        except (OSError, ValueError) as e:
+            self.spark = {"error": f"Could not read stage metrics: {e}"}
+            return
+        if after_stage is not None:
+            stages = [s for s in stages if s.get("stageId", -1) > after_stage]
+
+        totals = {field: sum(s.get(field, 0) or 0 for s in stages) for field in STAGE_TOTAL_FIELDS}
+        self.spark = {
+            "application_id": sc.applicationId,
+            "n_stages": len(stages),
+            "totals": totals,
+            "stages": [
+                {"stage_id": s.get("stageId"), "name": s.get("name"), "status": s.get("status"),
+                 **{field: s.get(field) for field in STAGE_TOTAL_FIELDS}}
+                for s in stages
+            ],
+        }
+
+    def to_dict(self):
+        return {
+            "command": self.command,
+            "argv": self.argv,
+            "status": self.status,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "wall_seconds": round(time.time() - self.started, 3),
+            "host": {"hostname": platform.node(), "python": platform.python_version(), "cpus": os.cpu_count()},
+            "phases": self.phases,
+            "counters": self.counters,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+            "spark": self.spark,
+        }
+
+    def finish(self, status="done"):
+        """
+        Write the report (if --metrics_out was given) and log a summary (if enabled).
+        """
+        self.status = status
+        report = self.to_dict()
+        if self.report_path:
+            with open(self.report_path, "w") as f:
+                json.dump(report, f, indent=2)
+            logger.info(f"Wrote run report to {self.report_path}")
+        if self.enabled:
+            logger.info(format_report(report))
+
+
+def timed(metrics, name):
+    """
+    metrics.phase(name), or a no-op when no RunMetrics is given.
+    """
+    return metrics.phase(name) if metrics is not None else contextlib.nullcontext()
+
+
+def path_size(path):
+    """
+    Total bytes under a local or Hadoop-FS path (file or directory).
+    """
+    path = str(path)
+    if "://" in path and not path.startswith("file://"):
+        import hail as hl
+        total = 0
+        pending = [path]
+        while pending:
+            for entry in hl.hadoop_ls(pending.pop()):
+                if entry["is_dir"]:
+                    pending.append(entry["path"])
+                else:
+                    total += entry["size_bytes"]
+        return total
+
+    path = path[len("file://"):] if path.startswith("file://") else path
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def dataset_counts(path, kind):
+    """
+    Partition and row counts of a written Hail dataset: kind is 'vds', 'mt' or 'ht'.
+    """
+    import hail as hl
+
+    if kind == "vds":
+        vds = hl.vds.read_vds(path)
+        return {
+            "n_samples": vds.variant_data.count_cols(),
+            "variant_rows": vds.variant_data.count_rows(),
+            "variant_partitions": vds.variant_data.n_partitions(),
+            "reference_rows": vds.reference_data.count_rows(),
+            "reference_partitions": vds.reference_data.n_partitions(),
+        }
+    if kind == "mt":
+        mt = hl.read_matrix_table(path)
+        return {"rows": mt.count_rows(), "cols": mt.count_cols(), "partitions": mt.n_partitions()}
+    ht = hl.read_table(path)
+    return {"rows": ht.count(), "partitions": ht.n_partitions()}
+
+
+def format_report(report):
+    lines = [f"Run report for '{report['command']}' ({report['status']}, {report['wall_seconds']:.1f}s):"]
+    for phase in report["phases"]:
+        lines.append(f"  phase {phase['name']:<12} {phase['seconds']:>10.1f}s")
+    for entry in report["inputs"]:
+        lines.append(f"  input  {entry['path']} ({format_bytes(entry['bytes'])})")
+    for entry in report["outputs"]:
+        lines.append(f"  output {entry['path']} ({format_bytes(entry['bytes'])})")
+    spark = report.get("spark") or {}
+    if "totals" in spark:
+        t = spark["totals"]
+        lines.append(
+            f"  spark  {spark['n_stages']} stage(s), {t['numTasks']} task(s), "
+            f"run {t['executorRunTime'] / 1000:.1f}s, GC {t['jvmGcTime'] / 1000:.1f}s, "
+            f"shuffle r/w {format_bytes(t['shuffleReadBytes'])}/{format_bytes(t['shuffleWriteBytes'])}, "
+            f"spill mem/disk {format_bytes(t['memoryBytesSpilled'])}/{format_bytes(t['diskBytesSpilled'])}"
+        )
+    elif "error" in spark:
+        lines.append(f"  spark  {spark['error']}")
+    return "\n".join(lines)
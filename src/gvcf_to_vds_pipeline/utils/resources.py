@@ -0,0 +1,31 @@
+import os
+
+
+def detect_host_resources():
+    """
+    Returns the cores and physical memory (bytes) available to this process.
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+
+    try:
+        memory_bytes = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory_bytes = None
+
+    return {"cores": cores, "memory_bytes": memory_bytes}
+
+
+def format_bytes(n_bytes):
+    """
+    Human-readable byte count, e.g. 1.5 GiB.
+    """
+    if n_bytes is None:
+        return "unknown"
+    size = float(n_bytes)
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
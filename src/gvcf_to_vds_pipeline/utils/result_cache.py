@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import time
+
+from gvcf_to_vds_pipeline.data_processing.gvcf.fs import is_remote
+from gvcf_to_vds_pipeline.utils.fingerprint import dataset_signature, fingerprint
+from gvcf_to_vds_pipeline.utils.metrics import path_size
+from gvcf_to_vds_pipeline.utils.resources import format_bytes
+
+DEFAULT_CACHE_MAX_GB = 100
+ENTRY_FILENAME = "entry.json"
+RESULT_DIRNAME = "result"
+STAGING_SUFFIX = ".partial"
+
+
+def vds_key(vds_path):
+    """
+    Cache key of an input VDS: its location plus the signatures of both components,
+    so a rewritten VDS gets a new key.
+    """
+    return fingerprint(
+        "vds", os.path.abspath(vds_path),
+        dataset_signature(f"{vds_path}/reference_data"), dataset_signature(f"{vds_path}/variant_data")
+    )
+
+
+def _param_signature(value):
+    if isinstance(value, str) and os.path.isfile(value):
+        st = os.stat(value)
+        return {"file": os.path.abspath(value), "size": st.st_size, "mtime": int(st.st_mtime)}
+    if isinstance(value, (list, tuple)):
+        return [_param_signature(v) for v in value]
+    return value
+
+
+def step_key(parent_key, op, params):
+    """
+    Cache key of applying op with params to the dataset identified by parent_key.
+    Keys chain, so a command and the same step inside a pipeline share results.
+    Parameters naming local files (e.g. sample lists) include the file's size and mtime.
+    """
+    return fingerprint(parent_key, op, {k: _param_signature(v) for k, v in sorted(params.items())})
+
+
+def link_or_copy_tree(src, dst):
+    """
+    Recreate src at dst with hard links, copying files that cannot be linked (other device).
+    """
+    if os.path.isfile(src):
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+        return
+    for dirpath, _, filenames in os.walk(src):
+        target_dir = os.path.join(dst, os.path.relpath(dirpath, src))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in filenames:
+            source, target = os.path.join(dirpath, name), os.path.join(target_dir, name)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+class ResultCache:
+    """
+    Size-bounded, content-addressed store of derived datasets on a local or
+    network-mounted filesystem.
+
+    Each entry is <root>/<key>/ with the written dataset in result/ and its
+    description (operation, parameters, input, size, last use) in entry.json.
+    Outputs are hard-linked from the cache, so a hit costs no copy and evicting an
+    entry never breaks an output already handed out. Entries are evicted least
+    recently used first once the cache is over max_bytes.
+    """
+
+    def __init__(self, root, max_bytes=None):
+        if "://" in str(root) and not str(root).startswith("file://"):
+            raise ValueError(f"The result cache needs a local or network-mounted directory, not {root}")
+        self.root = str(root)[len("file://"):] if str(root).startswith("file://") else str(root)
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def result_path(self, key):
+        return os.path.join(self._entry_dir(key), RESULT_DIRNAME)
+
+    def entries(self):
+        """
+        Descriptions of all complete entries, least recently used first.
+        """
+        found = []
+        for name in os.listdir(self.root):
+            entry_file = os.path.join(self.root, name, ENTRY_FILENAME)
+            if os.path.isfile(entry_file):
+                with open(entry_file) as f:
+                    found.append(json.load(f))
+        return sorted(found, key=lambda e: e["last_used"])
+
+    def lookup(self, key):
+        """
+        Path of the cached result for key, marking it as used, or None on a miss.
+        """
+        entry_file = os.path.join(self._entry_dir(key), ENTRY_FILENAME)
+        if not os.path.isfile(entry_file):
+            return None
+        with open(entry_file) as f:
+            entry = json.load(f)
+        entry["last_used"] = time.time()
+        entry["hits"] = entry.get("hits", 0) + 1
+        with open(entry_file, "w") as f:
+            json.dump(entry, f, indent=1)
+        return self.result_path(key)
+
+    def staging_path(self, key):
+        """
+        Where to write a new result for key; it becomes visible on commit().
+        """
+        staging = self._entry_dir(key) + STAGING_SUFFIX
+        _remove(staging)
+        os.makedirs(staging)
+        return os.path.join(staging, RESULT_DIRNAME)
+
+    def commit(self, key, op, params, source):
+        """
+        Publish the result written to staging_path(key).
+        """
+        staging = self._entry_dir(key) + STAGING_SUFFIX
+        now = time.time()
+        entry = {
+            "key": key, "op": op, "params": params, "source": source,
+            "bytes": path_size(os.path.join(staging, RESULT_DIRNAME)),
+            "created": now, "last_used": now, "hits": 0,
+        }
+        with open(os.path.join(staging, ENTRY_FILENAME), "w") as f:
+            json.dump(entry, f, indent=1, default=str)
+        _remove(self._entry_dir(key))
+        os.rename(staging, self._entry_dir(key))
+        return self.result_path(key)
+
+    def link(self, key, out_path):
+        """
+        Hard-link the cached result for key to out_path, replacing whatever is there.
+        """
+        out_path = str(out_path)[len("file://"):] if str(out_path).startswith("file://") else str(out_path)
+        _remove(out_path)
+        link_or_copy_tree(self.result_path(key), out_path)
+
+    def eviction_candidates(self, max_bytes=None, keep=()):
+        """
+        Least recently used entries that must go for the cache to fit in max_bytes
+        (the cache's own limit by default). Entries in keep are never chosen.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return []
+        entries = self.entries()
+        total = sum(e["bytes"] for e in entries)
+        chosen = []
+        for entry in entries:
+            if total <= max_bytes:
+                break
+            if entry["key"] in keep:
+                continue
+            total -= entry["bytes"]
+            chosen.append(entry)
+        return chosen
+
+    def evict(self, max_bytes=None, keep=()):
+        """
+        Remove the entries chosen by eviction_candidates.
+        :return: list of evicted entries
+        """
+        evicted = self.eviction_candidates(max_bytes, keep)
+        for entry in evicted:
+            _remove(self._entry_dir(entry["key"]))
+        return evicted
+
+    def clear(self):
+        for name in os.listdir(self.root):
+            _remove(os.path.join(self.root, name))
+
+
+def check_cacheable_output(path, arg="output"):
+    """
+    Cached results are hard-linked or copied into place on the local filesystem,
+    so an output written through the cache must be a local path.
+
+    :raises ValueError: for a remote output
+    """
+    if is_remote(path):
+        raise ValueError(f"{arg} {path} is remote; --result_cache only works with local outputs.")
+
+
+def run_cached(cache, key, op, params, source, out_path, write):
+    """
+    Produce out_path through the cache: link a cached result if there is one,
+    otherwise call write(path) into the cache and link the new result.
+    Without a cache, write(out_path) is called directly.
+
+    :return: True on a cache hit
+    """
+    if cache is None:
+        write(out_path)
+        return False
+    check_cacheable_output(out_path)
+    if cache.lookup(key):
+        cache.link(key, out_path)
+        print(f"[INFO] Cache hit for {op}: linked {cache.result_path(key)} -> {out_path}")
+        return True
+
+    write(cache.staging_path(key))
+    cache.commit(key, op, params, source)
+    cache.link(key, out_path)
+    for entry in cache.evict(keep={key}):
+        print(f"[INFO] Evicted cached {entry['op']} result {entry['key']} ({format_bytes(entry['bytes'])})")
+    return False
+
+
+def format_cache_entries(entries):
+    """
+    Readable listing of cache entries, most recently used first.
+    """
+    lines = [f"{'key':<18}{'op':<18}{'size':>12}  {'last used':<20}{'hits':>6}  source"]
+    for e in reversed(entries):
+        last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e["last_used"]))
+        lines.append(
+            f"{e['key']:<18}{e['op']:<18}{format_bytes(e['bytes']):>12}  {last_used:<20}{e.get('hits', 0):>6}  {e['source']}"
+        )
+    lines.append(f"{len(entries)} entr{'y' if len(entries) == 1 else 'ies'}, "
+                 f"{format_bytes(sum(e['bytes'] for e in entries))} total")
+    return "\n".join(lines)
@@ -0,0 +1,102 @@
+import json
+import re
+from pathlib import Path
+
+from gvcf_to_vds_pipeline.utils.resources import detect_host_resources
+
+PROFILE_NAMES = ("auto", "laptop", "workstation", "cluster")
+# Hosts with less memory than this get the laptop profile under "auto".
+LAPTOP_MAX_MEMORY_GB = 48
+
+_MEMORY_UNITS = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+def load_spark_profiles():
+    """
+    Loads spark_profiles.json from src/config/spark_profiles.json
+    """
+    config_path = Path(__file__).parent / "../config/spark_profiles.json"
+    with config_path.open() as f:
+        return json.load(f)
+
+
+def parse_memory(value):
+    """
+    Parse a Spark memory string (e.g. 512m, 8g) into bytes.
+    """
+    m = re.fullmatch(r"\s*(\d+)\s*([kmgt])?b?\s*", str(value).lower())
+    if not m:
+        raise ValueError(f"Cannot parse memory size '{value}'")
+    return int(m.group(1)) * _MEMORY_UNITS.get(m.group(2), 1)
+
+
+def parse_spark_conf_overrides(pairs):
+    """
+    Turn repeated --spark_conf key=value arguments into a dict.
+    """
+    overrides = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        if not sep or not key.strip():
+            raise ValueError(f"--spark_conf expects key=value, got '{pair}'")
+        overrides[key.strip()] = value.strip()
+    return overrides
+
+
+def choose_profile(profile, host):
+    if profile != "auto":
+        return profile
+    memory_gb = (host["memory_bytes"] or 0) / 1024 ** 3
+    return "laptop" if memory_gb < LAPTOP_MAX_MEMORY_GB else "workstation"
+
+
+def resolve_profile_conf(profile="auto", overrides=None, host=None):
+    """
+    Compute the Spark settings of a named profile for this host, then apply overrides.
+
+    :param profile: one of PROFILE_NAMES
+    :param overrides: dict of Spark settings that take precedence over the profile
+    :param host: detected host resources (see detect_host_resources); detected if None
+    :return: (resolved profile name, dict of Spark settings)
+    """
+    host = host or detect_host_resources()
+    name = choose_profile(profile, host)
+    spec = load_spark_profiles()[name]
+
+    conf = {}
+    if spec["local"]:
+        cores = max(1, host["cores"] - spec.get("reserve_cores", 0))
+        conf["spark.master"] = f"local[{cores}]"
+
+    if host["memory_bytes"]:
+        driver_gb = host["memory_bytes"] / 1024 ** 3 * spec["driver_memory_fraction"]
+        if spec.get("max_driver_memory_gb"):
+            driver_gb = min(driver_gb, spec["max_driver_memory_gb"])
+        driver_gb = max(driver_gb, spec.get("min_driver_memory_gb", 1))
+        conf["spark.driver.memory"] = f"{int(driver_gb)}g"
+    else:
+        conf["spark.driver.memory"] = f"{spec.get('min_driver_memory_gb', 1)}g"
+
+    conf.update(spec.get("conf", {}))
+    conf.update(overrides or {})
+    return name, conf
+
+
+def conf_resources(conf, host=None):
+    """
+    Cores and memory (bytes) that Spark will use under conf, for sizing work.
+    Local mode uses local[N] and the driver memory; cluster mode uses executor settings
+    (per executor) when given, falling back to the host.
+    """
+    host = host or detect_host_resources()
+    master = conf.get("spark.master", "")
+    m = re.fullmatch(r"local\[(\d+|\*)(?:,\d+)?\]", master)
+    if m:
+        cores = host["cores"] if m.group(1) == "*" else int(m.group(1))
+        return {"cores": cores, "memory_bytes": parse_memory(conf["spark.driver.memory"])}
+    if master == "local":
+        return {"cores": 1, "memory_bytes": parse_memory(conf["spark.driver.memory"])}
+
+    cores = int(conf.get("spark.executor.cores", host["cores"]))
+    memory = conf.get("spark.executor.memory")
+    return {"cores": cores, "memory_bytes": parse_memory(memory) if memory else host["memory_bytes"]}